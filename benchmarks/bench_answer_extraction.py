@@ -0,0 +1,79 @@
+# benchmarks/bench_answer_extraction.py
+# Benchmark trích câu trả lời: regex mỗi request vs tính sẵn lúc ingest
+# Chức năng:
+# - Sinh corpus FAQ markdown giả (**Q:** / **A:**, heading, MỤC:, bullet)
+# - "per-request": tách token + soft_match + chuỗi regex như build_answer_from_chunks cũ
+# - "precomputed": ChunkCatalog + token set có sẵn, chỉ chọn câu trả lời
+# - In thời gian trung bình mỗi request (µs)
+#
+# Chạy: python -m benchmarks.bench_answer_extraction --docs 40 --requests 2000
+
+import argparse
+import random
+import time
+
+from models.chunk_catalog import ChunkCatalog, best_answer, extract_answer_text, is_answerable
+from models.tokenizer import token_set, tokenize
+
+
+TOPICS = ["lịch trình", "script", "proxy", "profile", "API", "automation", "cookie", "fingerprint"]
+
+
+def _make_chunk(i: int) -> str:
+    topic = random.choice(TOPICS)
+    bullets = "\n".join(f"- Bước {k}: cấu hình **{topic}** mục {k}" for k in range(1, 6))
+    return (
+        f"### MỤC: Hướng dẫn {topic} {i}\n"
+        f"**Q:** Cách tạo {topic} số {i} trong Hidemium?\n"
+        f"**A:** Để tạo {topic}, bạn mở Hidemium và làm theo các bước sau:\n"
+        f"{bullets}\n---\n"
+    )
+
+
+def _per_request(docs, query):
+    tokens = set(tokenize(query))
+    valid = [d.strip() for d in docs if d and is_answerable(d)]
+    need = max(1, len(tokens) // 3)
+    matched = [d for d in valid if len(tokens & token_set(d)) >= need]
+    return extract_answer_text((matched or valid)[0])[:800].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    docs = [_make_chunk(i) for i in range(args.docs)]
+    ids = [f"chunk-{i}" for i in range(args.docs)]
+    query = "cách tạo lịch trình chạy script"
+
+    t0 = time.perf_counter()
+    catalog = ChunkCatalog()
+    catalog.add(ids, docs, [{"source": "faq.md"}] * len(ids))
+    doc_tokens = [frozenset(token_set(d)) for d in docs]
+    ingest_ms = (time.perf_counter() - t0) * 1000
+
+    q_tokens = tokenize(query)
+
+    t0 = time.perf_counter()
+    for _ in range(args.requests):
+        a = _per_request(docs, query)
+    per_request_us = (time.perf_counter() - t0) / args.requests * 1e6
+
+    t0 = time.perf_counter()
+    for _ in range(args.requests):
+        b = best_answer(catalog.get_many(ids), doc_tokens, q_tokens)
+    precomputed_us = (time.perf_counter() - t0) / args.requests * 1e6
+
+    assert a == b, "hai cách phải cho cùng câu trả lời"
+    print(f"docs/request={args.docs} requests={args.requests}")
+    print(f"ingest (một lần)   : {ingest_ms:8.2f} ms")
+    print(f"per-request regex  : {per_request_us:8.1f} µs/request")
+    print(f"precomputed        : {precomputed_us:8.1f} µs/request")
+    print(f"speedup            : {per_request_us / precomputed_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_chunker.py
+# Benchmark chia chunk: services.utils.split_text vs services.chunker (markdown + token)
+# Chức năng:
+# - Sinh file markdown lớn giả lập (heading, đoạn văn, list, code, cặp Q/A) hoặc dùng --file
+# - split_text: đọc toàn file vào bộ nhớ rồi chia theo số từ
+# - iter_markdown_chunks: đọc file dạng luồng (models.ingest.iter_text)
+# - So sánh: MB/s, số chunk, token trung bình / lớn nhất (cùng tokenizer),
+#   số chunk vượt giới hạn model, số cặp Q/A bị cắt rời, bộ nhớ đỉnh (tracemalloc)
+#
+# Chạy: python -m benchmarks.bench_chunker --mb 20 --size 256 --overlap 32
+
+import argparse
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from models.ingest import iter_text
+from services.chunker import get_tokenizer, iter_markdown_chunks
+from services.utils import split_text
+
+WORDS = (
+    "hidemium profile proxy trình duyệt automation script api cookie "
+    "tài khoản đăng nhập cấu hình lịch trình chạy nhóm đồng bộ fingerprint "
+    "tạo xoá sửa import export puppeteer selenium playwright"
+).split()
+
+# Giới hạn token đầu vào của model embedding (MiniLM)
+MODEL_MAX_TOKENS = 256
+
+_Q_RE = re.compile(r"\*\*Q:\*\* (\S+)")
+_A_RE = re.compile(r"\*\*A:\*\* (\S+)")
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _make_markdown(path: Path, mb: float, seed: int = 0) -> int:
+    rng = random.Random(seed)
+    target = int(mb * 1024 * 1024)
+    written = 0
+    qa = 0
+    with open(path, "w", encoding="utf-8") as f:
+        section = 0
+        while written < target:
+            section += 1
+            parts = [f"# Chương {section}\n"]
+            for sub in range(rng.randint(2, 4)):
+                parts.append(f"## Mục {section}.{sub}\n")
+                for _ in range(rng.randint(1, 4)):
+                    parts.append(_sentence(rng, rng.randint(30, 160)) + "\n")
+                if rng.random() < 0.4:
+                    parts.append("\n".join(f"- {_sentence(rng, 8)}" for _ in range(5)) + "\n")
+                if rng.random() < 0.2:
+                    parts.append("```\nhidemium.start(profile_id)\n# chạy script\n```\n")
+                for _ in range(rng.randint(0, 3)):
+                    qa += 1
+                    parts.append(f"**Q:** qa{qa} {_sentence(rng, 10)}\n")
+                    parts.append(f"**A:** qa{qa} {_sentence(rng, rng.randint(20, 80))}\n")
+            text = "\n".join(parts) + "\n"
+            f.write(text)
+            written += len(text.encode("utf-8"))
+    return qa
+
+
+# Cặp Q/A bị cắt rời: có Q mà không có A tương ứng trong cùng chunk (hoặc ngược lại)
+def _broken_qa(chunks) -> int:
+    broken = 0
+    for text in chunks:
+        qs = set(_Q_RE.findall(text))
+        as_ = set(_A_RE.findall(text))
+        broken += len(qs ^ as_)
+    return broken
+
+
+def _collect(make_chunks):
+    return [c if isinstance(c, str) else c.text for c in make_chunks()]
+
+
+# Lượt đo tốc độ và lượt đo bộ nhớ chạy riêng (tracemalloc làm chậm cấp phát)
+def _measure(name, make_chunks, size_mb, tok):
+    t0 = time.perf_counter()
+    chunks = _collect(make_chunks)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    _collect(make_chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    counts = tok.count_many(chunks)
+    over = sum(1 for n in counts if n > MODEL_MAX_TOKENS)
+    print(
+        f"{name:<14} | {size_mb / elapsed:7.2f} MB/s | {len(chunks):7d} chunks | "
+        f"tokens avg {sum(counts) / max(1, len(counts)):6.1f} max {max(counts, default=0):5d} | "
+        f">{MODEL_MAX_TOKENS} tok {over:6d} | broken Q/A {_broken_qa(chunks):6d} | "
+        f"peak {peak / 1024 / 1024:7.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", type=Path, default=None)
+    parser.add_argument("--mb", type=float, default=20)
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--overlap", type=int, default=32)
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.file
+    if path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".md", delete=False)
+        tmp.close()
+        path = Path(tmp.name)
+        pairs = _make_markdown(path, args.mb)
+        print(f"generated {path} ({pairs} Q/A pairs)")
+
+    size_mb = path.stat().st_size / 1024 / 1024
+    tok = get_tokenizer()
+    print(f"file={size_mb:.1f} MiB size={args.size} overlap={args.overlap} tokenizer={type(tok).__name__}")
+
+    try:
+        _measure(
+            "split_text",
+            lambda: split_text(path.read_text(encoding="utf-8"), args.size, args.overlap),
+            size_mb,
+            tok,
+        )
+        _measure(
+            "markdown",
+            lambda: iter_markdown_chunks(iter_text(path), args.size, args.overlap),
+            size_mb,
+            tok,
+        )
+    finally:
+        if tmp is not None:
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_embedding_batcher.py
+# Benchmark micro-batching embedding câu truy vấn
+# Chức năng:
+# - So sánh embed từng câu một (đường cũ) với EmbeddingBatcher
+# - Mô phỏng N request đồng thời, mỗi request embed 1 câu
+# - In throughput (query/s) và latency p50 / p99 cho từng chế độ
+#
+# Chạy: python -m benchmarks.bench_embedding_batcher --concurrency 16 --requests 512
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from models.embeddings import EmbeddingBatcher
+
+
+QUERIES = [
+    "Hidemium API là gì",
+    "cách tạo lịch trình chạy script",
+    "what is Hidemium api?",
+    "giới thiệu về công ty bạn đi",
+    "cách kết nối profile với Puppeteer",
+    "làm sao import proxy hàng loạt",
+    "how to start a profile via API",
+    "tính năng automation của Hidemium",
+]
+
+
+def _load_embed_fn():
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    fn = DefaultEmbeddingFunction()
+    return lambda texts: np.asarray(fn(list(texts)), dtype=np.float32)
+
+
+def _run(label: str, embed_one, concurrency: int, total: int):
+    latencies = []
+
+    def task(i: int):
+        t0 = time.perf_counter()
+        embed_one(f"{QUERIES[i % len(QUERIES)]} #{i}")
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(task, range(total)))
+    elapsed = time.perf_counter() - t0
+
+    lat = np.asarray(latencies)
+    print(
+        f"{label:<14} | {total / elapsed:8.1f} q/s | "
+        f"p50 {np.percentile(lat, 50):7.2f} ms | p99 {np.percentile(lat, 99):7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    embed_fn = _load_embed_fn()
+    embed_fn(["warmup"])
+
+    print(f"concurrency={args.concurrency} requests={args.requests}")
+    _run("one-at-a-time", lambda q: embed_fn([q]), args.concurrency, args.requests)
+
+    batcher = EmbeddingBatcher(embed_fn, args.max_batch, args.max_wait_ms)
+    _run("micro-batch", lambda q: batcher.embed([q]), args.concurrency, args.requests)
+    print(f"batcher stats: {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
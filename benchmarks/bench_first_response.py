@@ -0,0 +1,111 @@
+# benchmarks/bench_first_response.py
+# Benchmark hồi quy thời gian tới phản hồi đầu tiên (cold start)
+# Chức năng:
+# - Mỗi lượt: khởi động uvicorn main:app trong process con mới, đo
+#   + health: tới khi /api/v1/health trả 200 (server nhận request)
+#   + ready: tới khi /api/v1/ready trả 200 (làm nóng xong)
+#   + first_chat: POST /api/v1/chat đầu tiên xong (tính từ lúc khởi động)
+# - Lặp N lượt, in trung vị; --max-seconds: thoát mã lỗi nếu trung vị
+#   first_chat vượt ngưỡng (dùng trong CI để chặn hồi quy cold start)
+# - --no-chat: bỏ qua bước chat (không gọi Gemini)
+#
+# Chạy: python -m benchmarks.bench_first_response --runs 3 --max-seconds 20
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional
+
+import jwt
+
+from config.config import settings
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _request(url: str, body: Optional[dict] = None, token: Optional[str] = None, timeout: float = 120) -> int:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method="POST" if data else "GET")
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return 0
+
+
+def _wait_for(url: str, start: float, deadline: float, proc: subprocess.Popen) -> float:
+    while time.perf_counter() - start < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        if _request(url, timeout=2) == 200:
+            return time.perf_counter() - start
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} not ready after {deadline}s")
+
+
+def _one_run(port: int, deadline: float, chat: bool, message: str) -> Dict[str, float]:
+    base = f"http://127.0.0.1:{port}/api/v1"
+    token = jwt.encode({"sub": "bench_first_response"}, settings.JWT_SECRET, algorithm="HS256")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        timings = {"health": _wait_for(f"{base}/health", start, deadline, proc)}
+        timings["ready"] = _wait_for(f"{base}/ready", start, deadline, proc)
+        if chat:
+            status = _request(f"{base}/chat", {"message": message, "session_id": f"bench-{port}"}, token, deadline)
+            if status != 200:
+                raise RuntimeError(f"/chat returned {status}")
+            timings["first_chat"] = time.perf_counter() - start
+        return timings
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--deadline", type=float, default=300.0)
+    parser.add_argument("--message", default="Hidemium là gì?")
+    parser.add_argument("--no-chat", action="store_true")
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.runs):
+        timings = _one_run(args.port, args.deadline, not args.no_chat, args.message)
+        runs.append(timings)
+        print(f"run {i + 1}: " + " | ".join(f"{k} {v:6.2f} s" for k, v in timings.items()))
+
+    median = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+    print("median: " + " | ".join(f"{k} {v:6.2f} s" for k, v in median.items()))
+
+    if args.max_seconds is not None:
+        metric = "first_chat" if "first_chat" in median else "ready"
+        if median[metric] > args.max_seconds:
+            print(f"FAIL: median {metric} {median[metric]:.2f} s > {args.max_seconds:.2f} s")
+            sys.exit(1)
+        print(f"OK: median {metric} {median[metric]:.2f} s <= {args.max_seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_flat_index.py
+# Benchmark chỉ mục vector phẳng (models.flat_index): int8 / float16 vs float32
+# Chức năng:
+# - Sinh N vector chuẩn hoá theo cụm (giống embedding MiniLM của các chunk cùng chủ đề)
+# - Câu truy vấn = vector của một chunk + nhiễu (tìm lại chunk gần nó)
+# - Với mỗi N (mặc định 1k / 10k / 100k): recall@k so với float32 chính xác,
+#   độ trễ p50 / p95 mỗi lần query (batch câu như retrieval mở rộng), bộ nhớ ma trận
+# - Tuỳ chọn (--chroma): so với collection Chroma HNSW trong bộ nhớ
+#
+# Chạy: python -m benchmarks.bench_flat_index --sizes 1000 10000 100000 --k 15
+
+import argparse
+import time
+
+import numpy as np
+
+from models.flat_index import FlatIndex
+
+
+def _make_corpus(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def _make_queries(corpus: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picked = corpus[rng.integers(0, len(corpus), count)]
+    queries = picked + 0.3 * rng.standard_normal(picked.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def _build(dtype: str, corpus: np.ndarray) -> FlatIndex:
+    index = FlatIndex(dtype=dtype)
+    ids = [f"c{i}" for i in range(len(corpus))]
+    index.add_vectors(ids, [{} for _ in ids], corpus)
+    return index
+
+
+# Collection rỗng: chỉ đo phần top-k, không tính lần đọc document theo id
+class _NoDocuments:
+    def get(self, ids=None, include=None):
+        return {}
+
+
+def _run(search, queries: np.ndarray, batch: int):
+    latencies = []
+    results = []
+    for i in range(0, len(queries), batch):
+        t0 = time.perf_counter()
+        results.extend(search(queries[i:i + batch]))
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def _flat_search(index: FlatIndex, k: int):
+    docs = _NoDocuments()
+    return lambda q: index.query(q, k, collection=docs)["ids"]
+
+
+def _chroma_search(corpus: np.ndarray, k: int):
+    import chromadb
+
+    client = chromadb.EphemeralClient()
+    coll = client.create_collection(f"bench_{len(corpus)}", metadata={"hnsw:space": "l2"})
+    ids = [f"c{i}" for i in range(len(corpus))]
+    for i in range(0, len(ids), 5000):
+        coll.add(ids=ids[i:i + 5000], embeddings=corpus[i:i + 5000].tolist())
+    return lambda q: coll.query(query_embeddings=q.tolist(), n_results=k, include=[])["ids"]
+
+
+def _recall(results, truth, k: int) -> float:
+    hits = sum(len(set(r[:k]) & set(t[:k])) for r, t in zip(results, truth))
+    return hits / (k * len(truth))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--chroma", action="store_true")
+    args = parser.parse_args()
+
+    print(f"dim={args.dim} k={args.k} queries={args.queries} batch={args.batch}")
+    for n in args.sizes:
+        corpus = _make_corpus(n, args.dim, clusters=max(8, n // 200))
+        queries = _make_queries(corpus, args.queries)
+
+        exact = _build("float32", corpus)
+        truth, p50, p95 = _run(_flat_search(exact, args.k), queries, args.batch)
+        rows = [("float32", 1.0, p50, p95, exact.stats()["matrix_bytes"])]
+
+        for dtype in ("float16", "int8"):
+            index = _build(dtype, corpus)
+            found, p50, p95 = _run(_flat_search(index, args.k), queries, args.batch)
+            rows.append((dtype, _recall(found, truth, args.k), p50, p95, index.stats()["matrix_bytes"]))
+
+        if args.chroma:
+            found, p50, p95 = _run(_chroma_search(corpus, args.k), queries, args.batch)
+            rows.append(("chroma hnsw", _recall(found, truth, args.k), p50, p95, None))
+
+        print(f"\nN={n}")
+        for name, recall, p50, p95, nbytes in rows:
+            mem = f"{nbytes / 1024 / 1024:8.1f} MiB" if nbytes is not None else "       n/a"
+            print(f"  {name:<12} | recall@{args.k} {recall:.4f} | p50 {p50:7.2f} ms | p95 {p95:7.2f} ms | {mem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_parallel_embed.py
+# Benchmark embed chunk lúc ingest: tại chỗ vs pool 1 / 2 / 4 process
+# Chức năng:
+# - Sinh N chunk giả lập (độ dài như CHUNK_SIZE) và chia batch như ingest
+# - Đo chunk/s khi embed tuần tự trong process chính
+# - Đo chunk/s với ParallelEmbedder (shared memory, giữ thứ tự) cho từng số worker
+# - Thời gian khởi động pool (nạp model ở mỗi worker + kiểm tra vector worker
+#   trùng vector tại chỗ) được tính riêng
+# - --factory "module:tên": embedding function khác model MiniLM mặc định, ví dụ
+#   benchmarks.bench_parallel_embed:SyntheticEmbedding (không cần tải model ONNX,
+#   chỉ đo overhead của pool / shared memory)
+#
+# Chạy: python -m benchmarks.bench_parallel_embed --chunks 2000 --workers 1 2 4
+
+import argparse
+import importlib
+import os
+import random
+import time
+import zlib
+
+import numpy as np
+
+from models.parallel_embed import ParallelEmbedder
+
+WORDS = (
+    "hidemium profile proxy trình duyệt automation script api cookie "
+    "tài khoản đăng nhập cấu hình lịch trình chạy nhóm đồng bộ fingerprint "
+    "tạo xoá sửa import export puppeteer selenium playwright"
+).split()
+
+
+def _make_chunks(n: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) for _ in range(n)]
+
+
+def _batches(chunks, size):
+    return [chunks[i:i + size] for i in range(0, len(chunks), size)]
+
+
+# Embedding giả lập tốn CPU cỡ một encoder nhỏ: token → vector băm, qua vài lớp
+# ma trận cố định (seed cố định → mọi process cho cùng kết quả)
+class SyntheticEmbedding:
+    def __init__(self, dim: int = 384, layers: int = 6):
+        rng = np.random.default_rng(0)
+        self.dim = dim
+        self.layers = [rng.standard_normal((dim, dim)).astype(np.float32) / np.sqrt(dim) for _ in range(layers)]
+
+    def __call__(self, texts):
+        out = []
+        for text in texts:
+            tokens = text.split()[:256]
+            h = np.zeros((len(tokens) or 1, self.dim), dtype=np.float32)
+            for i, tok in enumerate(tokens):
+                h[i, zlib.crc32(tok.encode("utf-8")) % self.dim] = 1.0
+                h[i, (i * 7) % self.dim] += 0.5
+            for w in self.layers:
+                h = np.tanh(h @ w)
+            v = h.mean(axis=0)
+            out.append(v / (np.linalg.norm(v) or 1.0))
+        return np.stack(out)
+
+
+def _load_fn(factory):
+    if not factory:
+        from models import lazy_deps
+
+        return lazy_deps.embedding_functions().DefaultEmbeddingFunction()
+    module, _, name = factory.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+def _bench_serial(batches, fn):
+    fn(["warmup"])
+    t0 = time.perf_counter()
+    total = 0
+    for batch in batches:
+        total += len(np.asarray(fn(batch), dtype=np.float32))
+    return total / (time.perf_counter() - t0)
+
+
+def _bench_pool(batches, workers, factory, reference):
+    embedder = ParallelEmbedder(workers, factory=factory, reference=reference)
+    t0 = time.perf_counter()
+    embedder.embed(["warmup"])
+    startup = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    total = 0
+    order = []
+    for idx, vectors in embedder.map_ordered((i, b) for i, b in enumerate(batches)):
+        order.append(idx)
+        total += len(vectors)
+    elapsed = time.perf_counter() - t0
+    embedder.shutdown()
+
+    assert order == sorted(order), "batches returned out of order"
+    return total / elapsed, startup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--factory", default=None)
+    args = parser.parse_args()
+
+    batches = _batches(_make_chunks(args.chunks, args.words), args.batch)
+    print(
+        f"chunks={args.chunks} words/chunk={args.words} batch={args.batch} "
+        f"cpus={os.cpu_count()} fn={args.factory or 'DefaultEmbeddingFunction'}"
+    )
+
+    fn = _load_fn(args.factory)
+    serial = _bench_serial(batches, fn)
+    print(f"{'in-process':<12} | {serial:8.1f} chunks/s")
+
+    for workers in args.workers:
+        rate, startup = _bench_pool(batches, workers, args.factory, fn)
+        print(
+            f"{f'{workers} worker(s)':<12} | {rate:8.1f} chunks/s | "
+            f"x{rate / serial:4.2f} | pool startup {startup:5.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
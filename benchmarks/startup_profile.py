@@ -0,0 +1,119 @@
+# benchmarks/startup_profile.py
+# Profile thời gian khởi động: import main + các bước làm nóng
+# Chức năng:
+# - Chạy `python -X importtime -c "import main"` trong process con (cache import sạch)
+#   → top module theo thời gian cộng dồn / tự thân, gom self-time theo package gốc
+#   (code của repo vs thư viện ngoài) để thấy ai kéo chậm cold start
+# - Tuỳ chọn (--warmup): chạy services.warmup trong process con, in thời gian từng bước
+#   + thời gian import các thư viện nặng đi qua models.lazy_deps
+#
+# Chạy: python -m benchmarks.startup_profile --top 25 --warmup
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+FIRST_PARTY = {p.name for p in ROOT.iterdir() if p.is_dir() and any(p.glob("*.py"))} | {"main"}
+
+_WARMUP_SCRIPT = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+import_ms = (time.perf_counter() - t0) * 1000
+from services.warmup import warmup
+from models import lazy_deps
+asyncio.run(warmup.run(retry=False))
+print(json.dumps({"import_ms": import_ms, "warmup": warmup.snapshot(), "lazy": lazy_deps.import_timings()}))
+"""
+
+
+# Dòng "import time:  self [us] | cumulative | imported package" → (module, self_us, cum_us)
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+        except ValueError:
+            continue
+    return rows
+
+
+def _profile_imports(python: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"import main failed (exit {proc.returncode})")
+    return wall, _parse_importtime(proc.stderr)
+
+
+def _report_imports(wall: float, rows: List[Tuple[str, int, int]], top: int):
+    total_us = sum(self_us for _, self_us, _ in rows)
+    print(f"import main: {wall * 1000:.0f} ms wall (interpreter included), "
+          f"{total_us / 1000:.0f} ms in {len(rows)} module imports")
+
+    print(f"\nTop {top} theo thời gian cộng dồn:")
+    for name, _, cum in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"  {cum / 1000:9.1f} ms  {name}")
+
+    print(f"\nTop {top} theo thời gian tự thân:")
+    for name, self_us, _ in sorted(rows, key=lambda r: -r[1])[:top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name}")
+
+    by_root: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_root[name.split(".")[0]] += self_us
+    print(f"\nTheo package gốc (self-time cộng lại), top {top}:")
+    for root, us in sorted(by_root.items(), key=lambda kv: -kv[1])[:top]:
+        kind = "repo" if root in FIRST_PARTY else "lib"
+        print(f"  {us / 1000:9.1f} ms  {kind:<4}  {root}")
+
+
+def _report_warmup(python: str):
+    proc = subprocess.run([python, "-c", _WARMUP_SCRIPT], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"warmup failed (exit {proc.returncode})")
+    data = json.loads(proc.stdout.strip().splitlines()[-1])
+    snap = data["warmup"]
+
+    print(f"\nLàm nóng: {snap['status']} trong {snap['total_ms']} ms (import main {data['import_ms']:.0f} ms)")
+    for step in snap["steps"]:
+        flag = "ok " if step["ok"] else ("ERR" if step["critical"] else "err")
+        print(f"  {step['ms']:9.1f} ms  {flag} {step['step']}" + (f"  ({step['error']})" if not step["ok"] else ""))
+    if data["lazy"]:
+        print("\nImport trễ (models.lazy_deps):")
+        for name, ms in sorted(data["lazy"].items(), key=lambda kv: -kv[1]):
+            print(f"  {ms:9.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--warmup", action="store_true")
+    parser.add_argument("--python", default=sys.executable)
+    args = parser.parse_args()
+
+    wall, rows = _profile_imports(args.python)
+    _report_imports(wall, rows, args.top)
+    if args.warmup:
+        _report_warmup(args.python)
+
+
+if __name__ == "__main__":
+    main()
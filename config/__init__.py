@@ -1,11 +1,28 @@
 from .config import Settings, settings
-from .intent_engine import detect_intent
-from .quick_reply import QuickReplyHandler
-from .cskh_system import CSKHSystem
 
 UPLOAD_DIR = settings.UPLOAD_DIR
 DB_PATH = settings.DB_PATH
 
+# Import lười (PEP 562): intent / quick reply / CSKH (kéo theo FastAPI templating)
+# chỉ nạp khi được dùng lần đầu
+_LAZY = {
+    "detect_intent": (".intent_engine", "detect_intent"),
+    "QuickReplyHandler": (".quick_reply", "QuickReplyHandler"),
+    "CSKHSystem": (".cskh_system", "CSKHSystem"),
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+
+        module, attr = _LAZY[name]
+        value = getattr(import_module(module, __name__), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "Settings",
     "settings",
@@ -14,11 +14,51 @@ class Settings(BaseSettings):
     SESSION_SECRET: str | None = None
     CORS_ALLOW_ORIGINS: list[str] = ["*"]
 
-    CHUNK_SIZE: int = 500
-    CHUNK_OVERLAP: int = 50
+    CHUNK_SIZE: int = 256
+    CHUNK_OVERLAP: int = 32
+    CHUNK_TOKENIZER: str = ""
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2.onnx"
+    EMBEDDING_MAX_TOKENS: int = 256
+    EMBEDDING_CACHE_DIR: Path = Path("data/embedding_cache")
+    EMBEDDING_CACHE_DTYPE: str = "float32"
     LLM_MODEL: str = "gemini-2.5-flash-lite"
 
+    ANSWER_CACHE_SIZE: int = 1024
+    ANSWER_CACHE_TTL: int = 3600
+
+    VECTOR_EXECUTOR_WORKERS: int = 4
+    VECTOR_MAX_CONCURRENCY: int = 4
+    VECTOR_QUEUE_TIMEOUT: float = 10.0
+    VECTOR_CALL_TIMEOUT: float = 30.0
+
+    EMBED_BATCH_ENABLED: bool = True
+    EMBED_BATCH_MAX_SIZE: int = 32
+    EMBED_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBED_BATCH_TIMEOUT: float = 30.0
+
+    QUERY_EMBED_CACHE_SIZE: int = 4096
+    QUERY_EMBED_PREWARM: bool = True
+    WARMUP_QUERIES: list[str] = []
+    WARMUP_RETRIES: int = 3
+    WARMUP_RETRY_DELAY: float = 5.0
+    WARMUP_RETRY_MAX_DELAY: float = 60.0
+
+    LEXICAL_FOLD_DIACRITICS: bool = False
+
+    QA_MATCH_THRESHOLD: float = 0.75
+
+    RETRIEVAL_BACKEND: str = "chroma"
+    FLAT_INDEX_DTYPE: str = "int8"
+    RETRIEVAL_FUSION: str = "minmax"
+    RETRIEVAL_RRF_K: int = 60
+    RETRIEVAL_MMR_LAMBDA: float = 0.75
+    RETRIEVAL_DUP_THRESHOLD: float = 0.95
+    RETRIEVAL_EARLY_EXIT_SCORE: float = 0.8
+
+    UPLOAD_READ_BLOCK_SIZE: int = 1024 * 1024
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_EMBED_WORKERS: int = 0
+
     API_RATE_CHAT: str = "100/minute"
     API_RATE_UPLOAD: str = "10/hour"
     API_RATE_ADMIN: str = "10/minute"
@@ -42,10 +42,20 @@ def _load_words(filename: str) -> set:
 # =========================
 # KEYWORDS
 # =========================
-GREETINGS     = _load_words("greetings.md")
-CHITCHAT      = _load_words("chitchat.md")
-LIGHT_INSULTS = _load_words("light_insults.md")
-HEAVY_INSULTS = _load_words("heavy_insults.md")
+# Danh sách từ đọc từ data/intents khi dùng lần đầu (không đọc file lúc import),
+# _load_words cache theo mtime nên sửa file có hiệu lực ngay
+_WORD_FILES = {
+    "GREETINGS": "greetings.md",
+    "CHITCHAT": "chitchat.md",
+    "LIGHT_INSULTS": "light_insults.md",
+    "HEAVY_INSULTS": "heavy_insults.md",
+}
+
+
+def __getattr__(name: str):
+    if name in _WORD_FILES:
+        return _load_words(_WORD_FILES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 GOODBYE_WORDS = {"bye", "tạm biệt", "goodbye", "see you", "ngủ ngon"}
 THANK_WORDS   = {"cảm ơn", "cám ơn", "thanks", "thank you"}
@@ -135,9 +145,9 @@ def detect_intent(message: str) -> Optional[str]:
     if len(msg.split()) > 8:
         return None
 
-    if any(w in msg for w in HEAVY_INSULTS):
+    if any(w in msg for w in _load_words("heavy_insults.md")):
         return "heavy_insult"
-    if any(w in msg for w in LIGHT_INSULTS):
+    if any(w in msg for w in _load_words("light_insults.md")):
         return "light_insult"
 
     if any(p in msg for p in INTRODUCTION_PATTERNS) and any(
@@ -149,9 +159,9 @@ def detect_intent(message: str) -> Optional[str]:
         return "thanks"
     if any(w in msg for w in GOODBYE_WORDS):
         return "goodbye"
-    if any(w in msg for w in GREETINGS):
+    if any(w in msg for w in _load_words("greetings.md")):
         return "greeting"
-    if any(w in msg for w in CHITCHAT):
+    if any(w in msg for w in _load_words("chitchat.md")):
         return "chitchat"
 
     return None
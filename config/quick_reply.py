@@ -64,10 +64,17 @@ class QuickReplyHandler:
         return random.choice(self.responses.get(lang, self.responses["vi"]))
 
 
-_quick_reply_handler = QuickReplyHandler()
+_quick_reply_handler = None
+
+# Handler dùng chung, tạo (đọc greetings.md) ở lần dùng đầu thay vì lúc import
+def _handler() -> QuickReplyHandler:
+    global _quick_reply_handler
+    if _quick_reply_handler is None:
+        _quick_reply_handler = QuickReplyHandler()
+    return _quick_reply_handler
 
 def is_greeting_or_thanks(message: str) -> bool:
-    return _quick_reply_handler.is_greeting_or_thanks(message)
+    return _handler().is_greeting_or_thanks(message)
 
 def get_quick_response(message: str = "", target_lang: str = "vi") -> str:
-    return _quick_reply_handler.get_quick_response(message, target_lang)
\ No newline at end of file
+    return _handler().get_quick_response(message, target_lang)
\ No newline at end of file
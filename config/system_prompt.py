@@ -9,4 +9,8 @@ def get_system_prompt() -> str:
 
 def save_system_prompt(content: str):
     PROMPT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    PROMPT_PATH.write_text(content.strip(), encoding="utf-8")
\ No newline at end of file
+    PROMPT_PATH.write_text(content.strip(), encoding="utf-8")
+
+    # Prompt đã lắp sẵn trong bộ nhớ không còn đúng
+    from services.prompt_cache import prompt_cache
+    prompt_cache.invalidate("save_system_prompt")
\ No newline at end of file
@@ -1,10 +1,22 @@
 from fastapi import APIRouter
 
+from services.resources import resources as shared_resources
+
 class BaseController:
-    def __init__(self, app, templates):
+    def __init__(self, app, templates, resources=None):
         self.router = APIRouter()
         self.templates = templates
         self.app = app
+        # Container tài nguyên dùng chung (vector store, DB, ...) – không tự tạo bản riêng
+        self.resources = resources or shared_resources
+
+    @property
+    def vector(self):
+        return self.resources.vector
+
+    @property
+    def db(self):
+        return self.resources.db
 
     def register(self):
-        self.app.include_router(self.router)
\ No newline at end of file
+        self.app.include_router(self.router)
@@ -4,15 +4,13 @@ from fastapi import Form, Request
 from fastapi.responses import HTMLResponse
 
 from .base_controller import BaseController
-from services.chat_service import ChatService
-from models.db import get_chat_history
-from models.db import _db
 
 
 class ChatController(BaseController):
-    def __init__(self, app, templates):
-        super().__init__(app, templates)
-        self.chat_service = ChatService()
+    # ChatService dùng chung của container (không tạo thêm bản thứ hai)
+    @property
+    def chat_service(self):
+        return self.resources.chat_service
 
     def register(self):
         self.router.get("/", response_class=HTMLResponse)(self.home)
@@ -44,7 +42,7 @@ class ChatController(BaseController):
     # API: LIST SESSIONS
     # =========================
     async def list_sessions(self):
-        conn = _db._get_conn()
+        conn = self.db._get_conn()
         c = conn.cursor()
         c.execute("""
             SELECT DISTINCT session_id, MIN(timestamp) as created_at
@@ -64,5 +62,7 @@ class ChatController(BaseController):
     # API: LOAD 1 SESSION
     # =========================
     async def load_session(self, session_id: str):
+        from models.db import get_chat_history
+
         history = get_chat_history(session_id)
         return {"history": history}
@@ -2,14 +2,10 @@ from fastapi import Form, Request
 from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from pathlib import Path
 from .base_controller import BaseController
-from models.db import DatabaseManager
 from config.config import settings
+from services.prompt_cache import prompt_cache
 
 class ConfigController(BaseController):
-    def __init__(self, app, templates):
-        super().__init__(app, templates)
-        self.db = DatabaseManager()
-
     def register(self):
         self.router.get("/get-current-prompt")(self.get_prompt)
         self.router.get("/config", response_class=HTMLResponse)(self.config_page)
@@ -17,7 +13,7 @@ class ConfigController(BaseController):
         super().register()
 
     async def get_prompt(self):
-        return PlainTextResponse(self.db.get_system_prompt())
+        return PlainTextResponse(prompt_cache.system_prompt())
 
     async def config_page(self, request: Request):
         prompt_path = Path("data/systemprompt.md")
@@ -32,5 +28,5 @@ class ConfigController(BaseController):
     async def update_config(self, chunk_size: int = Form(...), chunk_overlap: int = Form(...),
                             bot_rules: str = Form(...), reingest: bool = Form(False)):
         from services.config_service import ConfigService
-        service = ConfigService()
+        service = ConfigService(self.resources)
         return await service.update(chunk_size, chunk_overlap, bot_rules, reingest)
\ No newline at end of file
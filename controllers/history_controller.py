@@ -3,13 +3,8 @@ from fastapi.responses import HTMLResponse
 import sqlite3
 from datetime import datetime
 from .base_controller import BaseController
-from models.db import DatabaseManager
 
 class HistoryController(BaseController):
-    def __init__(self, app, templates):
-        super().__init__(app, templates)
-        self.db = DatabaseManager()
-
     def register(self):
         self.router.get("/history", response_class=HTMLResponse)(self.history_page)
         super().register()
@@ -3,14 +3,15 @@ from datetime import datetime
 from collections import defaultdict
 import asyncio
 
-from models.vector_store import VectorStoreManager
-from models.db import DatabaseManager
+from models.corpus import corpus_state
+from models.source_registry import source_registry
+from services.prompt_cache import prompt_cache
 from middleware.badword_filter import BadWordFilter
 from models.multilingual_handler import MultilingualHandler
 from config.intent_engine import IntentEngine
 from config.quick_reply import QuickReplyHandler
 from config.cskh_system import CSKHSystem
-from models.gemini_client import chat_with_gemini
+from services.resources import resources as shared_resources
 
 
 # Controller xử lý chat theo kiến trúc cũ (all-in-one)
@@ -19,12 +20,10 @@ from models.gemini_client import chat_with_gemini
 # - Kết hợp vector search + Gemini
 # - Lưu lịch sử hội thoại và session memory
 class MainController:
-    def __init__(self):
-        # Vector store để truy vấn dữ liệu
-        self.vector_store = VectorStoreManager()
-
-        # Database lưu chat history
-        self.db = DatabaseManager()
+    def __init__(self, resources=None):
+        # Container tài nguyên dùng chung: vector store, facade async
+        # (executor riêng, không chặn event loop), database lưu chat history
+        self.resources = resources or shared_resources
 
         # Bộ lọc từ ngữ không phù hợp
         self.badword = BadWordFilter()
@@ -44,6 +43,18 @@ class MainController:
         # Session memory tạm thời (in-memory)
         self.session_memory: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
 
+    @property
+    def vector_store(self):
+        return self.resources.vector
+
+    @property
+    def async_vector(self):
+        return self.resources.async_vector
+
+    @property
+    def db(self):
+        return self.resources.db
+
     # Hàm xử lý chat chính
     # Chức năng:
     # - Nhận message từ user
@@ -95,26 +106,17 @@ class MainController:
             return {"response": resp, "language": lang}
 
         # ================= RAG PIPELINE =================
-        # Lấy collection từ vector store
-        coll = self.vector_store.get_collection()
-        raw = coll.get(include=["metadatas"]) or {}
-        metadatas = raw.get("metadatas", [])
-
-        # Lấy danh sách source file hiện có
-        all_sources = {
-            m.get("source", "")
-            for m in metadatas
-            if isinstance(m, dict)
-        }
-
-        # Kiểm tra user có hỏi đích danh 1 file không
-        target_file = None
-        msg_lower = message.lower()
-        for src in all_sources:
-            name = src.lower().replace(".md", "")
-            if name and name in msg_lower:
-                target_file = src
-                break
+        # Danh mục file nạp một lần rồi cập nhật theo ingest / xoá
+        if not corpus_state.loaded:
+            try:
+                await self.async_vector.run(
+                    "ensure_loaded", corpus_state.ensure_loaded, self.vector_store
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        # Kiểm tra user có hỏi đích danh 1 file không (Aho-Corasick trên tên file)
+        target_file = source_registry.match(message)
 
         # Lấy lịch sử session để build query
         history = self.session_memory[session_id]
@@ -124,22 +126,22 @@ class MainController:
 
         # Nếu chỉ định file → chỉ search trong file đó
         if target_file:
-            data = coll.get(
-                where={"source": target_file},
-                include=["documents", "metadatas"]
-            ) or {}
-            chunks = list(zip(
-                data.get("documents", []),
-                data.get("metadatas", [])
-            ))
+            try:
+                chunks = await self.async_vector.run(
+                    "chunks_for", source_registry.chunks_for, target_file, self.vector_store
+                )
+            except asyncio.TimeoutError:
+                chunks = []
         else:
             # Hybrid search (vector + BM25)
-            result = self.vector_store.query_documents(
-                query,
-                session_id,
-                n_results=100,
-                alpha=0.7
-            ) or ([], [], [])
+            try:
+                result = await self.async_vector.query_documents_batch(
+                    [query],
+                    n_results=100,
+                    alpha=0.7
+                ) or ([], [], [])
+            except asyncio.TimeoutError:
+                result = ([], [], [])
 
             docs, metas, _ = result
             chunks = list(zip(docs, metas))
@@ -161,8 +163,8 @@ class MainController:
             else "Hiện tại chưa có thông tin này."
         )
 
-        # Inject BOT RULE đầy đủ trước khi gọi LLM
-        self.vector_store.inject_bot_rule(force_full=True)
+        # BOT RULE đầy đủ: chỉ inject lại khi prompt đổi / collection reset
+        prompt_cache.ensure_bot_rule(self.vector_store)
 
         # Chuẩn bị history cho Gemini
         history_for_llm: List[Dict[str, str]] = []
@@ -178,7 +180,9 @@ class MainController:
                     "content": h["answer"]
                 })
 
-        # Gọi Gemini (chạy thread + timeout)
+        # Gọi Gemini (chạy thread + timeout; SDK chỉ được import ở lượt gọi đầu)
+        from models.gemini_client import chat_with_gemini
+
         try:
             response = await asyncio.wait_for(
                 asyncio.to_thread(
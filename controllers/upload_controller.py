@@ -3,21 +3,28 @@
 # Chức năng:
 # - Hiển thị trang upload tài liệu
 # - Nhận file từ client và chuyển cho UploadService xử lý
+# - Báo tiến độ ingest (polling JSON hoặc server-sent events)
+# - Tra trạng thái job ingest nền (/jobs/{id})
+
+import asyncio
+import json
 
 from fastapi import File, Request, UploadFile, Form, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from .base_controller import BaseController
 from config.config import settings  
 from services.upload_service import UploadService
+from services.ingest_progress import ingest_progress
+from models.jobs import job_store
 
 
 class UploadController(BaseController):
     # Controller upload dữ liệu
     # Chức năng:
     # - Kết nối giao diện upload với service xử lý backend
-    def __init__(self, app, templates):
-        super().__init__(app, templates)
-        self.service = UploadService()
+    def __init__(self, app, templates, resources=None):
+        super().__init__(app, templates, resources)
+        self.service = UploadService(self.resources)
 
     # Đăng ký route cho controller
     # Chức năng:
@@ -25,6 +32,9 @@ class UploadController(BaseController):
     def register(self):
         self.router.get("/data-loader", response_class=HTMLResponse)(self.data_loader_page)
         self.router.post("/upload")(self.upload_files)
+        self.router.get("/upload/progress/{upload_id}")(self.upload_progress)
+        self.router.get("/upload/events/{upload_id}")(self.upload_events)
+        self.router.get("/jobs/{job_id}")(self.job_status)
         super().register()
 
     # Trang giao diện upload dữ liệu
@@ -50,6 +60,7 @@ class UploadController(BaseController):
         files: list[UploadFile] = File(...),
         client_start_time: float | None = Form(default=None),
         client_total_size: int | None = Form(default=None),
+        upload_id: str | None = Form(default=None),
     ):
         if not files:
             raise HTTPException(status_code=400, detail="No files were uploaded.")
@@ -58,4 +69,47 @@ class UploadController(BaseController):
             files=files,
             client_start_time=client_start_time,
             client_total_size=client_total_size,
+            upload_id=upload_id,
+        )
+
+    # Trạng thái job ingest nền
+    # Chức năng:
+    # - state (queued / running / done / failed), tiến độ từng file,
+    #   kết quả (số chunk, embed mới / dùng lại) và thời gian chạy
+    async def job_status(self, job_id: str):
+        job = job_store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JSONResponse(job)
+
+    # API polling tiến độ ingest của một lượt upload
+    async def upload_progress(self, upload_id: str):
+        snapshot = ingest_progress.snapshot(upload_id)
+        if snapshot is None:
+            return JSONResponse({"upload_id": upload_id, "done": False, "files": {}})
+        return JSONResponse(snapshot)
+
+    # Server-sent events tiến độ ingest
+    # Chức năng:
+    # - Gửi trạng thái mỗi khi có thay đổi (kiểm tra mỗi 0.5s)
+    # - Dừng khi lượt upload kết thúc hoặc client ngắt kết nối
+    async def upload_events(self, request: Request, upload_id: str):
+        async def stream():
+            last = None
+            while True:
+                if await request.is_disconnected():
+                    break
+                snapshot = ingest_progress.snapshot(upload_id)
+                stamp = snapshot and snapshot["updated_at"]
+                if snapshot and stamp != last:
+                    last = stamp
+                    yield f"data: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+                    if snapshot["done"]:
+                        break
+                await asyncio.sleep(0.5)
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
@@ -3,34 +3,31 @@
 # Chức năng:
 # - Quản lý file đã ingest vào vector store
 # - Reset toàn bộ vector store
-# - Hiển thị danh sách chunk theo từng file
+# - Hiển thị danh sách file (tổng hợp) và chunk theo trang
 # - Cho phép xoá file hoặc từng chunk riêng lẻ
 
 from fastapi import Form, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from collections import defaultdict
 import secrets
 import shutil
 from pathlib import Path
-from models.vector_store import vector_store_manager
 from requests import request
 
 from config import config
 
 from .base_controller import BaseController
-from models.vector_store import VectorStoreManager, get_stats
-from models.db import DatabaseManager
+from models.corpus import corpus_state
+from models.source_registry import source_registry
+from services.prompt_cache import BOT_RULE_SOURCE
 from config.config import Settings
 
 
 class VectorController(BaseController):
     # Controller quản lý vector store
     # Chức năng:
-    # - Kết nối UI quản trị với vector store và database
-    def __init__(self, app, templates):
-        super().__init__(app, templates)
-        self.vector = VectorStoreManager()
-        self.db = DatabaseManager()
+    # - Kết nối UI quản trị với vector store và database (self.vector / self.db
+    #   lấy từ container dùng chung, xem BaseController)
 
     # Đăng ký các route cho controller
     # Chức năng:
@@ -39,6 +36,7 @@ class VectorController(BaseController):
         self.router.post("/delete-file")(self.delete_file)
         self.router.post("/reset-vectorstore")(self.reset_vs)
         self.router.get("/vector-manager", response_class=HTMLResponse)(self.vector_manager)
+        self.router.get("/vector-manager/chunks")(self.list_chunks)
         self.router.post("/delete-chunk")(self.delete_chunk)
 
         super().register()
@@ -70,6 +68,7 @@ class VectorController(BaseController):
 
         # Xoá toàn bộ chunk tương ứng trong vector store
         self.vector.get_collection().delete(where={"source": filename})
+        corpus_state.source_removed(filename)
 
         return RedirectResponse("/vector-manager", status_code=303)
 
@@ -89,6 +88,7 @@ class VectorController(BaseController):
 
         # Reset vector store
         self.vector.reset_vectorstore()
+        corpus_state.reset()
 
         # Xoá toàn bộ file upload
         if config.settings.UPLOAD_DIR.exists():
@@ -105,68 +105,54 @@ class VectorController(BaseController):
 
     # Trang quản lý vector store
     # Chức năng:
-    # - Hiển thị danh sách file và chunk
-    # - Thống kê tổng số file, chunk
+    # - Hiển thị danh sách file kèm tổng hợp (số chunk, token, loại chunk)
+    # - Tổng hợp lấy từ source registry (cập nhật lúc ingest / xoá),
+    #   không đọc toàn bộ chunk trong collection
+    # - Chunk của từng file được tải theo trang qua /vector-manager/chunks
     async def vector_manager(
         self,
         request: Request,
         limit_per_file: int = 50
     ):
+        from models.vector_store import get_stats
+
         # Tạo CSRF token cho session
         request.session["csrf_token"] = secrets.token_hex(16)
 
-        coll = vector_store_manager.get_collection()
-        data = coll.get(include=["documents", "metadatas"])
-
-        chunks_by_file = defaultdict(list)
-
-        # Gom các chunk theo source file
-        for doc_id, doc, meta in zip(
-            data.get("ids", []),
-            data.get("documents", []),
-            data.get("metadatas", [])
-        ):
-            if meta.get("source") == "BOT_RULE":
-                continue
-
-            source = meta.get("source", "unknown.md")
-
-            # Tạo preview ngắn cho mỗi chunk
-            preview = " ".join(doc.split()[:30])
-            if len(doc.split()) > 30:
-                preview += " ..."
-
-            chunks_by_file[source].append({
-                "id": doc_id,
-                "preview": preview,
-                "title": meta.get("title", "Không có tiêu đề"),
-                "word_count": len(doc.split()),
-                "chunk_type": meta.get("chunk_type", "text"),
-                "token_count": meta.get("token_count", 0)
-            })
-
-        # Tổng số chunk (trước khi giới hạn hiển thị)
-        total_chunks = sum(len(chunks) for chunks in chunks_by_file.values())
-
-        # Giới hạn số chunk hiển thị trên mỗi file
-        for source in chunks_by_file:
-            chunks_by_file[source] = chunks_by_file[source][:limit_per_file]
-
-        total_files = len(chunks_by_file)
+        await run_in_threadpool(corpus_state.ensure_loaded, self.vector)
+        files = source_registry.summaries(exclude=(BOT_RULE_SOURCE,))
 
         # Render giao diện quản lý vector
         return self.templates.TemplateResponse(
             "vector_manager.html",
             {
                 "request": request,
-                "chunks_by_file": dict(chunks_by_file),
-                "total_chunks": total_chunks,
-                "total_files": total_files,
+                "files": files,
+                "page_size": limit_per_file,
+                "total_chunks": sum(f["chunks"] for f in files),
+                "total_files": len(files),
                 "stats": get_stats(),
                 "csrf_token": request.session["csrf_token"]
             }
         )
 
+    # API phân trang chunk của một file
+    # Chức năng:
+    # - Chỉ trả đúng trang được yêu cầu: id, metadata, preview tính sẵn
+    #   (kèm nội dung đầy đủ của các chunk trong trang cho nút copy, đọc theo id)
+    # - Đọc collection trên threadpool, không chặn event loop
+    async def list_chunks(
+        self,
+        source: str,
+        offset: int = 0,
+        limit: int = 50
+    ):
+        offset = max(0, offset)
+        limit = max(1, min(limit, 200))
+        await run_in_threadpool(corpus_state.ensure_loaded, self.vector)
+        page = await run_in_threadpool(source_registry.page, source, offset, limit, self.vector)
+        return JSONResponse(page)
+
     # Xoá một chunk riêng lẻ
     # Chức năng:
     # - Kiểm tra CSRF
@@ -184,6 +170,7 @@ class VectorController(BaseController):
 
         try:
             self.vector.get_collection().delete(ids=[chunk_id])
+            corpus_state.chunks_removed([chunk_id])
             return JSONResponse({"status": "ok"})
         except Exception as e:
             print(f"[VectorController] Delete chunk error: {e}")
@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -21,11 +24,28 @@ from middleware.loguploadfile import LoggingMiddleware
 # Config
 from config.config import settings
 from config.cskh_system import register_cskh_routes
+from services.resources import resources
+from services.warmup import warmup
+
+
+# Lifespan: gắn container tài nguyên dùng chung vào app, làm nóng model /
+# collection / index / cache ở nền (/api/v1/ready chuyển xanh khi xong);
+# khi tắt: huỷ làm nóng nếu còn chạy, chạy hook tắt máy của container
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.resources = resources
+    task = asyncio.create_task(warmup.run())
+    try:
+        yield
+    finally:
+        if not task.done():
+            task.cancel()
+        await asyncio.to_thread(resources.close)
 
 
-app = FastAPI(title="Trợ lý ảo Hidemium AI")
+app = FastAPI(title="Trợ lý ảo Hidemium AI", lifespan=lifespan)
 
 
 # Rate limit (SlowAPI)
@@ -75,11 +95,11 @@ templates = Jinja2Templates(directory="templates")
 # Register controllers (Web UI)
 
 
-ChatController(app, templates).register()
-UploadController(app, templates).register()
-VectorController(app, templates).register()
-ConfigController(app, templates).register()
-HistoryController(app, templates).register()
+ChatController(app, templates, resources).register()
+UploadController(app, templates, resources).register()
+VectorController(app, templates, resources).register()
+ConfigController(app, templates, resources).register()
+HistoryController(app, templates, resources).register()
 
 # CSKH routes
 register_cskh_routes(app, templates)
@@ -0,0 +1,164 @@
+# models/async_vector.py
+# Facade bất đồng bộ cho vector store
+# Chức năng:
+# - Chạy embedding / truy vấn Chroma trên executor riêng, giới hạn số thread
+#   → không chặn event loop (chat khác, health check, websocket CSKH)
+# - Giới hạn số truy vấn đồng thời, request vượt quá phải xếp hàng có timeout
+# - Ghi nhận latency từng lần gọi (thời gian chờ hàng + thời gian chạy)
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config.config import settings
+from models.retrieval import query_documents_batch, retrieve
+
+logger = logging.getLogger("async_vector")
+
+
+# Thống kê latency theo từng loại thao tác
+# Chức năng:
+# - Đếm số lần gọi, lỗi, timeout
+# - Giữ cửa sổ latency gần nhất để tính p50 / p95
+class LatencyMetrics:
+    def __init__(self, window: int = 512):
+        self._window = window
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Dict[str, Any]] = defaultdict(self._new_op)
+
+    def _new_op(self) -> Dict[str, Any]:
+        return {
+            "calls": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "queue_ms": 0.0,
+            "recent": deque(maxlen=self._window),
+        }
+
+    def record(self, op: str, run_ms: float, queue_ms: float, error: bool = False):
+        with self._lock:
+            s = self._ops[op]
+            s["calls"] += 1
+            s["total_ms"] += run_ms
+            s["queue_ms"] += queue_ms
+            s["max_ms"] = max(s["max_ms"], run_ms)
+            s["recent"].append(run_ms)
+            if error:
+                s["errors"] += 1
+
+    def record_timeout(self, op: str):
+        with self._lock:
+            self._ops[op]["timeouts"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {}
+            for op, s in self._ops.items():
+                recent = sorted(s["recent"])
+                calls = s["calls"] or 1
+                out[op] = {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "timeouts": s["timeouts"],
+                    "avg_ms": round(s["total_ms"] / calls, 2),
+                    "avg_queue_ms": round(s["queue_ms"] / calls, 2),
+                    "max_ms": round(s["max_ms"], 2),
+                    "p50_ms": round(_percentile(recent, 0.50), 2),
+                    "p95_ms": round(_percentile(recent, 0.95), 2),
+                }
+            return out
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[idx]
+
+
+# Executor + semaphore dùng chung cho mọi facade trong process
+_executor = ThreadPoolExecutor(
+    max_workers=settings.VECTOR_EXECUTOR_WORKERS,
+    thread_name_prefix="vector",
+)
+_semaphore: Optional[asyncio.Semaphore] = None
+metrics = LatencyMetrics()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.VECTOR_MAX_CONCURRENCY)
+    return _semaphore
+
+
+class AsyncVectorStore:
+    # Bọc một VectorStoreManager đồng bộ
+    # Chức năng:
+    # - Mọi thao tác nặng đều đi qua run()
+    def __init__(self, manager):
+        self.manager = manager
+
+    # Chạy một hàm đồng bộ trên executor vector
+    # Chức năng:
+    # - Chờ slot trong tối đa VECTOR_QUEUE_TIMEOUT giây, hết hạn → asyncio.TimeoutError
+    # - Slot chỉ được trả khi thread chạy xong (kể cả khi caller đã timeout)
+    #   để giới hạn đồng thời luôn đúng với số thread thực sự đang bận
+    async def run(self, op: str, fn: Callable, *args, **kwargs):
+        sem = _get_semaphore()
+        loop = asyncio.get_running_loop()
+
+        t_queue = time.perf_counter()
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=settings.VECTOR_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            metrics.record_timeout(op)
+            logger.warning(f"[ASYNC_VECTOR] {op} queue timeout")
+            raise
+        queue_ms = (time.perf_counter() - t_queue) * 1000
+
+        t_run = time.perf_counter()
+        try:
+            fut = loop.run_in_executor(_executor, lambda: fn(*args, **kwargs))
+        except Exception:
+            sem.release()
+            raise
+
+        def _done(f):
+            sem.release()
+            metrics.record(
+                op,
+                (time.perf_counter() - t_run) * 1000,
+                queue_ms,
+                error=not f.cancelled() and f.exception() is not None,
+            )
+
+        fut.add_done_callback(_done)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(fut), timeout=settings.VECTOR_CALL_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            metrics.record_timeout(op)
+            logger.warning(f"[ASYNC_VECTOR] {op} call timeout")
+            raise
+
+    async def query_documents_batch(self, queries, **kwargs):
+        return await self.run("query_documents_batch", query_documents_batch, self.manager, queries, **kwargs)
+
+    async def retrieve(self, queries, **kwargs):
+        return await self.run("retrieve", retrieve, self.manager, queries, **kwargs)
+
+    async def collection_get(self, **kwargs):
+        return await self.run("collection_get", lambda: self.manager.get_collection().get(**kwargs))
+
+    @staticmethod
+    def stats() -> Dict[str, Dict[str, Any]]:
+        return metrics.snapshot()
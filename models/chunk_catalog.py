@@ -0,0 +1,179 @@
+# models/chunk_catalog.py
+# Bảng phụ thông tin chunk tính sẵn lúc ingest
+# Chức năng:
+# - Trích "câu trả lời sạch" của mỗi chunk (bỏ **Q:**/**A:**, heading,
+#   dòng "MỤC:", bullet, in đậm) MỘT lần khi chunk được thêm vào collection
+# - Lưu cờ chất lượng (chunk có đủ nội dung để trả lời hay không)
+# - Gán hash nội dung ổn định (mmh3) cho mỗi chunk
+#   → gộp / khử trùng lặp / cache làm việc trên số nguyên
+# - Request chỉ cần chọn câu trả lời tính sẵn tốt nhất, không chạy regex nữa
+# - Được đồng bộ với collection qua models.corpus.corpus_state
+
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set
+
+import mmh3
+
+from models.corpus import corpus_state
+
+
+INVALID_CHUNKS = {"--", "-", "...", "---"}
+
+_ANSWER_RE = re.compile(r"\*\*?A:\*\*?\s*(.+)", re.DOTALL | re.IGNORECASE)
+_CLEANUP_STEPS = [
+    (re.compile(r"^#+\s*"), ""),
+    (re.compile(r"(?m)^\s*#+\s*"), ""),
+    (re.compile(r"###\s*MỤC:.*", re.IGNORECASE), ""),
+    (re.compile(r"MỤC:\s*[^\n]+", re.IGNORECASE), ""),
+    (re.compile(r"\*\*?Q:\*\*?\s*.*", re.IGNORECASE), ""),
+    (re.compile(r"\*\*(.*?)\*\*"), r"\1"),
+    (re.compile(r"(?m)^\s*-{3,}\s*$"), ""),
+    (re.compile(r"(?m)^\s*-\s*"), "• "),
+    (re.compile(r"\n{3,}"), "\n\n"),
+]
+
+
+# Hash nội dung chunk (mmh3 64-bit có dấu → lưu được vào metadata Chroma)
+def content_hash(text: str) -> int:
+    return mmh3.hash64((text or "").encode("utf-8"), signed=True)[0]
+
+
+# Chunk có đủ nội dung để dùng làm câu trả lời không
+def is_answerable(text: str) -> bool:
+    text = (text or "").strip()
+    return len(text) >= 15 and text not in INVALID_CHUNKS
+
+
+# Trích phần trả lời sạch từ một chunk markdown
+# Chức năng:
+# - Lấy phần sau **A:** nếu có, ngược lại lấy toàn bộ chunk
+# - Bỏ heading, "MỤC:", câu hỏi **Q:**, in đậm, đường kẻ; chuẩn hoá bullet
+def extract_answer_text(text: str) -> str:
+    text = (text or "").strip()
+    match = _ANSWER_RE.search(text)
+    extracted = match.group(1).strip() if match else text
+    for pattern, repl in _CLEANUP_STEPS:
+        extracted = pattern.sub(repl, extracted)
+    return extracted.strip()
+
+
+class ChunkInfo(NamedTuple):
+    answer: str
+    valid: bool
+    source: Optional[str]
+    content_hash: int
+
+
+class ChunkCatalog:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._chunks: Dict[str, ChunkInfo] = {}
+        self._by_source: Dict[str, Set[str]] = {}
+
+    # =========================
+    # ĐỒNG BỘ VỚI COLLECTION
+    # =========================
+
+    def add(
+        self,
+        ids: Sequence[str],
+        docs: Sequence[str],
+        metas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        metas = metas or [None] * len(ids)
+        parsed = [
+            (
+                extract_answer_text(doc),
+                is_answerable(doc),
+                (meta or {}).get("source"),
+                (meta or {}).get("content_hash") or content_hash(doc),
+            )
+            for doc, meta in zip(docs, metas)
+        ]
+        with self._lock:
+            for key, (answer, valid, source, chash) in zip(ids, parsed):
+                self._remove_key(key)
+                info = ChunkInfo(answer, valid, source, chash)
+                self._chunks[key] = info
+                if info.source:
+                    self._by_source.setdefault(info.source, set()).add(key)
+
+    def _remove_key(self, key: str):
+        info = self._chunks.pop(key, None)
+        keys = self._by_source.get(info.source) if info else None
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_source[info.source]
+
+    def remove_ids(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for key in ids:
+                self._remove_key(key)
+
+    def remove_source(self, source: str) -> None:
+        with self._lock:
+            for key in self._by_source.pop(source, set()):
+                self._chunks.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+            self._by_source.clear()
+
+    # =========================
+    # TRA CỨU
+    # =========================
+
+    def get(self, key: str) -> Optional[ChunkInfo]:
+        return self._chunks.get(key)
+
+    def get_many(self, ids: Sequence[str]) -> List[Optional[ChunkInfo]]:
+        chunks = self._chunks
+        return [chunks.get(k) for k in ids]
+
+    # Hash nội dung của chunk (chunk chưa biết → hash của id, vẫn ổn định)
+    def hash_of(self, key: str) -> int:
+        info = self._chunks.get(key)
+        return info.content_hash if info else content_hash(key)
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+
+# Chọn câu trả lời tính sẵn tốt nhất
+# Chức năng:
+# - Giữ thứ tự retrieval, bỏ chunk không hợp lệ
+# - Ưu tiên chunk khớp mềm với câu hỏi (≥ 1/3 số token), giống soft_match cũ
+# - Trả None nếu thiếu thông tin tính sẵn của chunk nào đó (caller tự fallback)
+def best_answer(
+    infos: Sequence[Optional[ChunkInfo]],
+    doc_tokens: Sequence[Optional[frozenset]],
+    query_tokens: Optional[Sequence[str]] = None,
+    max_chars: int = 800,
+) -> Optional[str]:
+    if any(info is None for info in infos):
+        return None
+
+    candidates = [
+        (info, toks) for info, toks in zip(infos, doc_tokens) if info.valid
+    ]
+    if not candidates:
+        return ""
+
+    best = candidates[0][0]
+    if query_tokens:
+        tokens = set(query_tokens)
+        need = max(1, len(tokens) // 3)
+        for info, toks in candidates:
+            if toks is not None and len(tokens & toks) >= need:
+                best = info
+                break
+
+    return best.answer[:max_chars].strip()
+
+
+# Instance dùng chung, được đồng bộ qua models.corpus.corpus_state
+chunk_catalog = ChunkCatalog()
+corpus_state.register(chunk_catalog)
@@ -0,0 +1,136 @@
+# models/corpus.py
+# Trạng thái kho tri thức và đồng bộ các chỉ mục phụ
+# Chức năng:
+# - Giữ số generation tăng dần mỗi khi corpus thay đổi
+#   (upload, xoá file, xoá chunk, reset, re-ingest)
+# - Các cache phía trên (answer cache, ...) dùng generation trong key
+#   để tự động vô hiệu hoá khi dữ liệu thay đổi
+# - Đồng bộ các chỉ mục in-memory (lexical index, ...) với collection Chroma:
+#   nạp toàn bộ một lần, sau đó chỉ cập nhật phần file / chunk bị thay đổi
+
+import logging
+import threading
+from typing import Any, Dict, List, Sequence
+
+logger = logging.getLogger("corpus")
+
+
+class CorpusState:
+    def __init__(self):
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._listeners: List[Any] = []
+        # Listener đăng ký sau khi corpus đã nạp → chờ ensure_loaded nạp bù
+        self._pending: List[Any] = []
+        self._loaded = False
+
+    # Generation hiện tại của corpus
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    # Tăng generation khi corpus thay đổi
+    # Chức năng:
+    # - Ghi log lý do để dễ trace cache miss sau khi ingest
+    def bump(self, reason: str = "") -> int:
+        with self._lock:
+            self._generation += 1
+            gen = self._generation
+        logger.info(f"[CORPUS] generation -> {gen} ({reason})")
+        return gen
+
+    # Đăng ký một chỉ mục phụ cần đồng bộ với collection
+    # Chức năng:
+    # - Listener cần có: add(ids, docs, metas), remove_ids(ids),
+    #   remove_source(source), clear()
+    # - Corpus đã nạp (module import muộn) → lần ensure_loaded sau nạp bù toàn bộ
+    #   collection cho riêng listener này
+    def register(self, listener) -> None:
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+                if self._loaded:
+                    self._pending.append(listener)
+
+    def _collection(self, manager=None):
+        if manager is None:
+            from models.vector_store import vector_store_manager
+            manager = vector_store_manager
+        return manager.get_collection()
+
+    def _notify_add(self, data: Dict[str, Any], listeners=None):
+        ids = data.get("ids") or []
+        docs = data.get("documents") or [""] * len(ids)
+        metas = data.get("metadatas") or [{}] * len(ids)
+        for listener in self._listeners if listeners is None else listeners:
+            listener.add(ids, docs, metas)
+
+    # Nạp toàn bộ collection vào các chỉ mục (chỉ chạy một lần)
+    # Chức năng:
+    # - Listener đăng ký muộn chỉ được nạp bù cho riêng nó
+    def ensure_loaded(self, manager=None) -> None:
+        if self._loaded and not self._pending:
+            return
+        with self._lock:
+            if self._loaded and not self._pending:
+                return
+            targets = self._pending if self._loaded else self._listeners
+            data = self._collection(manager).get(include=["documents", "metadatas"]) or {}
+            for listener in targets:
+                listener.clear()
+            self._notify_add(data, targets)
+            self._loaded = True
+            self._pending = []
+            logger.info(f"[CORPUS] loaded {len(data.get('ids') or [])} chunks into {len(targets)} index(es)")
+
+    # =========================
+    # HOOK THAY ĐỔI CORPUS
+    # =========================
+
+    # File vừa được ingest vào collection
+    # Chức năng:
+    # - Chỉ đọc lại các chunk của file đó (chi phí tỉ lệ với file)
+    def source_added(self, source: str, manager=None) -> None:
+        with self._lock:
+            if self._loaded:
+                data = self._collection(manager).get(
+                    where={"source": source},
+                    include=["documents", "metadatas"],
+                ) or {}
+                for listener in self._listeners:
+                    listener.remove_source(source)
+                self._notify_add(data)
+        self.bump(f"add {source}")
+
+    def source_removed(self, source: str) -> None:
+        with self._lock:
+            if self._loaded:
+                for listener in self._listeners:
+                    listener.remove_source(source)
+        self.bump(f"delete-file {source}")
+
+    def chunks_removed(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            if self._loaded:
+                for listener in self._listeners:
+                    listener.remove_ids(list(ids))
+        self.bump(f"delete-chunk {', '.join(ids)}")
+
+    # Collection bị reset
+    # Chức năng:
+    # - Xoá các chỉ mục, lần truy vấn sau sẽ nạp lại (kể cả BOT RULE được inject lại)
+    def reset(self, reason: str = "reset") -> None:
+        with self._lock:
+            for listener in self._listeners:
+                listener.clear()
+            self._loaded = False
+            self._pending = []
+        self.bump(reason)
+
+
+# Instance dùng chung cho toàn bộ hệ thống
+corpus_state = CorpusState()
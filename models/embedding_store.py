@@ -0,0 +1,207 @@
+# models/embedding_store.py
+# Kho embedding theo hash nội dung chunk (bền vững, độc lập với collection)
+# Chức năng:
+# - Key = (hash nội dung chunk, tên model embedding) → vector
+# - Mỗi model một thư mục trong settings.EMBEDDING_CACHE_DIR:
+#   + vectors.<dtype>: mảng (n, dim) float32 / float16 ghi nối tiếp (append-only),
+#     đọc qua np.memmap chỉ-đọc → nhiều process dùng chung một bản trong page cache
+#   + index.<dtype>.i64: hash int64 của từng hàng, cùng thứ tự (8 byte / vector)
+#   + meta.json: model, dim, dtype
+# - Index nạp thành mảng hash đã sắp xếp + searchsorted (gọn, tra theo lô bằng NumPy)
+# - Ghi: khoá file (fcntl) giữa các process, ghi vector trước rồi mới ghi hash
+#   → hàng chưa có hash / hash ghi dở (crash) bị bỏ qua / cắt ở lần ghi sau
+# - Không phụ thuộc collection: reset vector store, khởi động lại, upload lại
+#   nội dung đã từng thấy → không phải embed lại
+
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ khoá trong process
+    fcntl = None
+
+logger = logging.getLogger("embedding_store")
+
+# Số hash mới tối đa giữ trong dict trước khi gộp vào mảng đã sắp xếp
+_MERGE_THRESHOLD = 4096
+
+
+def _model_dir_name(model: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model)
+
+
+class EmbeddingStore:
+    def __init__(self, root=None, model: Optional[str] = None, dtype: Optional[str] = None):
+        self.model = model or settings.EMBEDDING_MODEL
+        self.dtype = np.dtype(dtype or settings.EMBEDDING_CACHE_DTYPE)
+        self.dir = Path(root or settings.EMBEDDING_CACHE_DIR) / _model_dir_name(self.model)
+        self._vec_path = self.dir / f"vectors.{self.dtype.name}"
+        self._idx_path = self.dir / f"index.{self.dtype.name}.i64"
+        self._meta_path = self.dir / "meta.json"
+        self._lock_path = self.dir / ".lock"
+
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self._rows = 0
+        self._keys = np.empty(0, dtype=np.int64)   # hash đã sắp xếp
+        self._pos = np.empty(0, dtype=np.int64)    # hàng tương ứng
+        self._recent: Dict[int, int] = {}
+        self._vectors: Optional[np.memmap] = None
+
+    # =========================
+    # ĐỌC INDEX / MAP VECTOR
+    # =========================
+
+    def _load_meta(self) -> None:
+        if self.dim is None and self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            self.dim = int(meta["dim"])
+
+    def _merge_recent(self) -> None:
+        if not self._recent:
+            return
+        keys = np.fromiter(self._recent.keys(), dtype=np.int64, count=len(self._recent))
+        pos = np.fromiter(self._recent.values(), dtype=np.int64, count=len(self._recent))
+        keys = np.concatenate([self._keys, keys])
+        pos = np.concatenate([self._pos, pos])
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._pos = keys[order], pos[order]
+        self._recent.clear()
+
+    # Đọc phần index mới (do process này hoặc process khác ghi) và map lại vector
+    def _refresh(self) -> None:
+        self._load_meta()
+        if self.dim is None or not self._idx_path.exists():
+            return
+        rows = self._idx_path.stat().st_size // 8
+        if rows <= self._rows:
+            return
+
+        fresh = np.fromfile(self._idx_path, dtype="<i8", count=rows - self._rows, offset=self._rows * 8)
+        for i, chash in enumerate(fresh.tolist(), start=self._rows):
+            self._recent.setdefault(chash, i)
+        if len(self._recent) >= _MERGE_THRESHOLD or not len(self._keys):
+            self._merge_recent()
+
+        self._rows = rows
+        self._vectors = np.memmap(self._vec_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+
+    def _lookup(self, hashes: np.ndarray) -> np.ndarray:
+        rows = np.full(len(hashes), -1, dtype=np.int64)
+        if len(self._keys):
+            idx = np.searchsorted(self._keys, hashes)
+            idx[idx == len(self._keys)] = 0
+            hit = self._keys[idx] == hashes
+            rows[hit] = self._pos[idx[hit]]
+        if self._recent:
+            for i in np.flatnonzero(rows < 0).tolist():
+                rows[i] = self._recent.get(int(hashes[i]), -1)
+        return rows
+
+    # Tra nhiều hash một lần → {hash: vector float32}
+    def get_many(self, hashes: Sequence[int]) -> Dict[int, np.ndarray]:
+        if not hashes:
+            return {}
+        with self._lock:
+            self._refresh()
+            if self._vectors is None:
+                return {}
+            keys = np.fromiter(dict.fromkeys(hashes), dtype=np.int64)
+            rows = self._lookup(keys)
+            hit = rows >= 0
+            if not hit.any():
+                return {}
+            vectors = np.asarray(self._vectors[rows[hit]], dtype=np.float32)
+        return dict(zip(keys[hit].tolist(), vectors))
+
+    # =========================
+    # GHI NỐI TIẾP
+    # =========================
+
+    @contextmanager
+    def _file_lock(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def put_many(self, items: Iterable[Tuple[int, Any]]) -> int:
+        pending: Dict[int, Any] = {}
+        for chash, vec in items:
+            pending.setdefault(int(chash), vec)
+        if not pending:
+            return 0
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            keys = np.fromiter(pending.keys(), dtype=np.int64, count=len(pending))
+            keys = keys[self._lookup(keys) < 0]
+            if not len(keys):
+                return 0
+            vectors = np.asarray([pending[k] for k in keys.tolist()], dtype=self.dtype)
+
+            dim = vectors.shape[1]
+            if self.dim is None:
+                self.dim = dim
+                self._meta_path.write_text(
+                    json.dumps({"model": self.model, "dim": dim, "dtype": self.dtype.name}),
+                    encoding="utf-8",
+                )
+            elif dim != self.dim:
+                logger.warning(f"[EMBED_STORE] dim {dim} != {self.dim} for {self.model}, skipped")
+                return 0
+
+            # Cắt phần vector ghi dở (không có hash) của lần ghi bị gián đoạn trước
+            row_bytes = self.dim * self.dtype.itemsize
+            with open(self._vec_path, "ab") as f:
+                if f.tell() != self._rows * row_bytes:
+                    f.truncate(self._rows * row_bytes)
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            # Cắt bản ghi hash ghi dở (< 8 byte) ở cuối index, nếu không mọi hàng
+            # ghi sau sẽ lệch vị trí
+            with open(self._idx_path, "ab") as f:
+                if f.tell() != self._rows * 8:
+                    f.truncate(self._rows * 8)
+                f.write(keys.astype("<i8").tobytes())
+
+            self._refresh()
+        return len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._rows
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            size = self._vec_path.stat().st_size if self._vec_path.exists() else 0
+            return {
+                "model": self.model,
+                "dtype": self.dtype.name,
+                "dim": self.dim,
+                "vectors": self._rows,
+                "disk_bytes": size + self._rows * 8,
+            }
+
+
+# Instance dùng chung cho pipeline ingest
+embedding_store = EmbeddingStore()
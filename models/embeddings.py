@@ -0,0 +1,271 @@
+# models/embeddings.py
+# Lớp embedding dùng chung cho các truy vấn vector
+# Chức năng:
+# - Dùng đúng embedding function của collection (all-MiniLM-L6-v2.onnx)
+#   để vector truy vấn luôn cùng không gian với vector đã lưu
+# - Embed nhiều câu trong MỘT lần gọi ONNX
+# - Gom (micro-batch) các câu truy vấn đến cùng lúc từ nhiều request
+# - Cache LRU vector câu truy vấn theo text đã chuẩn hoá
+# - Trả về ma trận float32 (n, dim) để xử lý bằng NumPy
+
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config import settings
+from models import lazy_deps
+from models.tokenizer import normalize_key
+
+logger = logging.getLogger("embeddings")
+
+
+_embedding_fn = None
+_embedding_lock = threading.Lock()
+
+
+# Lấy embedding function dùng chung
+# Chức năng:
+# - Ưu tiên embedding function gắn với collection hiện tại
+# - Fallback về DefaultEmbeddingFunction của Chroma (cùng model MiniLM ONNX)
+# - Chỉ khởi tạo ONNX session một lần cho toàn bộ process
+def get_embedding_function():
+    global _embedding_fn
+    if _embedding_fn is not None:
+        return _embedding_fn
+
+    with _embedding_lock:
+        if _embedding_fn is None:
+            from models.vector_store import vector_store_manager
+
+            coll = vector_store_manager.get_collection()
+            fn = getattr(coll, "_embedding_function", None)
+            if fn is None:
+                fn = lazy_deps.embedding_functions().DefaultEmbeddingFunction()
+            _embedding_fn = fn
+    return _embedding_fn
+
+
+# Embed một danh sách câu trong một batch ONNX duy nhất
+# Chức năng:
+# - Trả về ma trận float32 shape (len(texts), dim)
+# - Danh sách rỗng → ma trận rỗng, không gọi model
+def embed_texts(texts: Sequence[str]) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = get_embedding_function()(list(texts))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+# Micro-batcher cho embedding câu truy vấn
+# Chức năng:
+# - Gom các yêu cầu embed đến trong vài mili-giây (hoặc đến khi đủ max_batch_size)
+# - Chạy một batch ONNX cho cả nhóm, trả vector riêng cho từng caller
+# - Worker là một daemon thread, khởi động khi có yêu cầu đầu tiên
+# - Batch lỗi / trả thiếu vector → mọi caller của batch nhận exception;
+#   caller chờ tối đa timeout giây (không giữ thread executor mãi mãi)
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embed_fn: Callable[[Sequence[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        timeout: float = 30.0,
+    ):
+        self._embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.timeout = timeout
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embed-batcher", daemon=True
+                )
+                self._thread.start()
+
+    # Gửi một câu vào hàng đợi, trả về Future chứa vector
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    # Embed danh sách câu qua batcher (block đến khi có đủ kết quả)
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        futures = [self.submit(t) for t in texts]
+        deadline = time.perf_counter() + self.timeout
+        return np.vstack([f.result(timeout=max(0.0, deadline - time.perf_counter())) for f in futures])
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for t, _ in batch]
+            try:
+                vectors = np.asarray(self._embed_fn(texts), dtype=np.float32)
+                if len(vectors) != len(batch):
+                    raise RuntimeError(f"embedding returned {len(vectors)} vectors for {len(batch)} texts")
+            except Exception as e:
+                logger.error(f"[EMBED_BATCHER] batch of {len(batch)} failed: {e}")
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, fut), vec in zip(batch, vectors):
+                fut.set_result(vec)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+query_batcher = EmbeddingBatcher(
+    embed_texts,
+    max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+    max_wait_ms=settings.EMBED_BATCH_MAX_WAIT_MS,
+    timeout=settings.EMBED_BATCH_TIMEOUT,
+)
+
+
+# Chuẩn hoá text làm key cache embedding
+# Chức năng:
+# - MiniLM dùng tokenizer uncased → NFC + lower + gộp khoảng trắng không đổi vector
+def normalize_query(text: str) -> str:
+    return normalize_key(text)
+
+
+# Cache LRU vector câu truy vấn
+# Chức năng:
+# - Lưu vector dạng hàng float32 trong MỘT ma trận cấp phát sẵn (maxsize, dim)
+# - OrderedDict chỉ giữ key → số hàng, hàng bị evict được tái sử dụng
+# - Thread-safe (gọi từ nhiều thread của executor vector)
+# - Đếm hit / miss để báo hit ratio
+class QueryEmbeddingCache:
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = max(1, maxsize)
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                self.misses += 1
+                return None
+            self._slots.move_to_end(key)
+            self.hits += 1
+            return self._matrix[slot].copy()
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.maxsize, vector.shape[0]), dtype=np.float32)
+                self._free = list(range(self.maxsize - 1, -1, -1))
+
+            slot = self._slots.get(key)
+            if slot is None:
+                if not self._free:
+                    _, evicted = self._slots.popitem(last=False)
+                    self._free.append(evicted)
+                slot = self._free.pop()
+                self._slots[key] = slot
+            else:
+                self._slots.move_to_end(key)
+            self._matrix[slot] = vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots.clear()
+            self._free = list(range(self.maxsize - 1, -1, -1)) if self._matrix is not None else []
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._slots),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "bytes": int(self._matrix.nbytes) if self._matrix is not None else 0,
+        }
+
+
+query_cache = QueryEmbeddingCache(settings.QUERY_EMBED_CACHE_SIZE)
+
+
+# Embed câu truy vấn (đường nóng của chat)
+# Chức năng:
+# - Tra cache trước, chỉ embed các câu chưa có
+# - Câu chưa có đi qua micro-batcher nếu bật EMBED_BATCH_ENABLED,
+#   ngược lại embed trực tiếp
+def embed_queries(texts: Sequence[str]) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    keys = [normalize_query(t) for t in texts]
+    rows: List[Optional[np.ndarray]] = [query_cache.get(k) for k in keys]
+
+    missing = list(dict.fromkeys(k for k, r in zip(keys, rows) if r is None))
+    if missing:
+        if settings.EMBED_BATCH_ENABLED:
+            vectors = query_batcher.embed(missing)
+        else:
+            vectors = embed_texts(missing)
+        fresh = dict(zip(missing, vectors))
+        for k, v in fresh.items():
+            query_cache.put(k, v)
+        rows = [r if r is not None else fresh[k] for k, r in zip(keys, rows)]
+
+    return np.vstack(rows).astype(np.float32, copy=False)
+
+
+# Làm nóng cache embedding khi khởi động
+# Chức năng:
+# - Embed sẵn các câu truy vấn hay gặp (vd: câu mở rộng Hidemium)
+def warm_query_cache(texts: Sequence[str]) -> int:
+    texts = [t for t in texts if t and t.strip()]
+    if texts:
+        embed_queries(texts)
+    logger.info(f"[EMBED_CACHE] warmed {len(texts)} queries")
+    return len(texts)
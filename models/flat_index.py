@@ -0,0 +1,323 @@
+# models/flat_index.py
+# Chỉ mục vector phẳng (brute-force) bằng NumPy thay cho HNSW của Chroma
+# Chức năng:
+# - Corpus nhỏ / vừa (vài nghìn tới ~100k chunk): một phép nhân ma trận chính xác
+#   rẻ hơn một vòng Chroma (HNSW + overhead Python mỗi lần gọi)
+# - Toàn bộ embedding nằm trong MỘT ma trận liền bộ nhớ:
+#   + int8 lượng tử hoá đối xứng theo hàng (scale float32 mỗi hàng), hoặc
+#   + float16 / float32 (settings.FLAT_INDEX_DTYPE)
+# - Top-k chính xác: tích vô hướng theo block (giải lượng tử vào buffer float32)
+#   + argpartition
+# - Đồng bộ với collection qua models.corpus.corpus_state (thêm / xoá file,
+#   xoá chunk, reset); embedding lấy từ models.embedding_store theo hash nội dung,
+#   thiếu mới đọc từ collection
+# - Không giữ nội dung chunk: chỉ id + metadata, document của top-k đọc lại
+#   từ collection theo id (một lần get cho mọi câu truy vấn)
+# - Bật bằng settings.RETRIEVAL_BACKEND = "flat"
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from config.config import settings
+from models.corpus import corpus_state
+from models.embedding_store import embedding_store
+
+logger = logging.getLogger("flat_index")
+
+# Số hàng giải lượng tử mỗi lần khi nhân ma trận (giới hạn buffer float32)
+_BLOCK_ROWS = 8192
+# Số id mỗi lần đọc embedding từ collection
+_FETCH_BATCH = 512
+
+
+# Lượng tử hoá int8 đối xứng theo hàng: x ≈ q * scale
+def quantize_int8(vectors: np.ndarray):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(vectors / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+class FlatIndex:
+    def __init__(self, dtype: str = "int8", capacity: int = 1024):
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.RLock()
+        self._capacity = max(1, capacity)
+        self._reset_state()
+
+    def _reset_state(self):
+        self.dim: Optional[int] = None
+        self._n = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._scale = np.ones(self._capacity, dtype=np.float32)
+        # hàng → (id, metadata); id → hàng
+        self._ids: List[str] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        self._by_source: Dict[str, Set[str]] = {}
+
+    # =========================
+    # BỘ NHỚ MA TRẬN
+    # =========================
+
+    def _ensure_capacity(self, rows: int):
+        if self._matrix is not None and rows <= len(self._matrix):
+            return
+        cap = max(self._capacity, len(self._matrix) if self._matrix is not None else 0)
+        while cap < rows:
+            cap *= 2
+        matrix = np.zeros((cap, self.dim), dtype=self.dtype)
+        scale = np.ones(cap, dtype=np.float32)
+        if self._matrix is not None:
+            matrix[:self._n] = self._matrix[:self._n]
+            scale[:self._n] = self._scale[:self._n]
+        self._matrix, self._scale = matrix, scale
+
+    def _encode(self, vectors: np.ndarray):
+        if self.dtype == np.int8:
+            return quantize_int8(vectors)
+        return vectors.astype(self.dtype), np.ones(len(vectors), dtype=np.float32)
+
+    # =========================
+    # ĐỒNG BỘ VỚI COLLECTION
+    # =========================
+
+    @staticmethod
+    def _default_collection():
+        from models.vector_store import vector_store_manager
+
+        return vector_store_manager.get_collection()
+
+    # Embedding của các chunk: kho theo hash trước, thiếu thì đọc collection
+    def _embeddings_for(self, ids: Sequence[str], metas: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        hashes = {cid: (m or {}).get("content_hash") for cid, m in zip(ids, metas)}
+        stored = embedding_store.get_many([h for h in hashes.values() if h is not None])
+        found = {cid: stored[h] for cid, h in hashes.items() if h in stored}
+
+        missing = [cid for cid in ids if cid not in found]
+        if missing:
+            coll = self._default_collection()
+            for i in range(0, len(missing), _FETCH_BATCH):
+                data = coll.get(ids=missing[i:i + _FETCH_BATCH], include=["embeddings"]) or {}
+                embs = data.get("embeddings")
+                if embs is None:
+                    embs = []
+                for cid, emb in zip(data.get("ids") or [], embs):
+                    found[cid] = np.asarray(emb, dtype=np.float32)
+        return found
+
+    # Nội dung các chunk theo id (chỉ cho top-k đã chọn)
+    @staticmethod
+    def _documents_for(coll, ids: Sequence[str]) -> Dict[str, str]:
+        docs: Dict[str, str] = {}
+        for i in range(0, len(ids), _FETCH_BATCH):
+            data = coll.get(ids=list(ids[i:i + _FETCH_BATCH]), include=["documents"]) or {}
+            docs.update(zip(data.get("ids") or [], data.get("documents") or []))
+        return docs
+
+    # docs bỏ qua: nội dung chunk nằm trong collection
+    def add(
+        self,
+        ids: Sequence[str],
+        docs: Sequence[str],
+        metas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        if not ids:
+            return
+        metas = [m or {} for m in (metas or [None] * len(ids))]
+        vectors = self._embeddings_for(ids, metas)
+        keep = [i for i, cid in enumerate(ids) if cid in vectors]
+        if len(keep) < len(ids):
+            logger.warning(f"[FLAT_INDEX] {len(ids) - len(keep)} chunk(s) without embedding skipped")
+        if not keep:
+            return
+
+        self.add_vectors(
+            [ids[i] for i in keep],
+            [metas[i] for i in keep],
+            np.stack([vectors[ids[i]] for i in keep]),
+        )
+
+    # Thêm chunk kèm embedding có sẵn (id đã có → thay thế)
+    def add_vectors(
+        self,
+        ids: Sequence[str],
+        metas: Sequence[Dict[str, Any]],
+        vectors: np.ndarray,
+    ) -> None:
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        encoded, scale = self._encode(vectors)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            for cid in ids:
+                self._remove_key(cid)
+            self._ensure_capacity(self._n + len(ids))
+            start = self._n
+            self._matrix[start:start + len(ids)] = encoded
+            self._scale[start:start + len(ids)] = scale
+            for row, (cid, meta) in enumerate(zip(ids, metas), start=start):
+                self._ids.append(cid)
+                self._metas.append(meta)
+                self._row_of[cid] = row
+                source = meta.get("source")
+                if source:
+                    self._by_source.setdefault(source, set()).add(cid)
+            self._n += len(ids)
+
+    # Xoá một hàng: chuyển hàng cuối vào chỗ trống → ma trận luôn liền
+    def _remove_key(self, key: str):
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return
+        source = self._metas[row].get("source")
+        keys = self._by_source.get(source)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_source[source]
+        last = self._n - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._scale[row] = self._scale[last]
+            self._ids[row] = self._ids[last]
+            self._metas[row] = self._metas[last]
+            self._row_of[self._ids[row]] = row
+        self._ids.pop()
+        self._metas.pop()
+        self._n = last
+
+    def remove_ids(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for key in ids:
+                self._remove_key(key)
+
+    def remove_source(self, source: str) -> None:
+        with self._lock:
+            for key in list(self._by_source.pop(source, set())):
+                self._remove_key(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset_state()
+
+    # =========================
+    # TRUY VẤN
+    # =========================
+
+    # Lọc where dạng {"field": value} (so khớp bằng) → mask hàng; None nếu không hỗ trợ
+    def _where_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not where:
+            return np.ones(self._n, dtype=bool)
+        if any(k.startswith("$") or isinstance(v, dict) for k, v in where.items()):
+            return None
+        return np.fromiter(
+            (all(m.get(k) == v for k, v in where.items()) for m in self._metas),
+            dtype=bool,
+            count=self._n,
+        )
+
+    # Điểm tương đồng (tích vô hướng) của mọi hàng với các câu truy vấn: (n, m)
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        qt = np.ascontiguousarray(queries.T, dtype=np.float32)
+        out = np.empty((self._n, qt.shape[1]), dtype=np.float32)
+        if self.dtype == np.float32:
+            np.dot(self._matrix[:self._n], qt, out=out)
+            return out
+        buf = np.empty((min(_BLOCK_ROWS, self._n), self.dim), dtype=np.float32)
+        for s in range(0, self._n, _BLOCK_ROWS):
+            e = min(s + _BLOCK_ROWS, self._n)
+            block = buf[:e - s]
+            np.copyto(block, self._matrix[s:e], casting="unsafe")
+            np.dot(block, qt, out=out[s:e])
+        if self.dtype == np.int8:
+            out *= self._scale[:self._n, None]
+        return out
+
+    # Top-k chính xác cho nhiều câu truy vấn
+    # Chức năng:
+    # - Trả dict cùng dạng collection.query (ids / documents / metadatas / distances)
+    # - Khoảng cách đổi theo không gian của collection ("l2", "cosine", "ip")
+    #   để phần chấm điểm phía sau dùng chung
+    # - where không hỗ trợ (toán tử $...) → None, caller dùng Chroma
+    # - documents đọc từ collection (None → collection mặc định) sau khi nhả lock
+    def query(
+        self,
+        query_embeddings: np.ndarray,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        space: str = "l2",
+        collection=None,
+    ) -> Optional[Dict[str, List[List[Any]]]]:
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        result: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            if self._n == 0:
+                for _ in range(len(queries)):
+                    for key in result:
+                        result[key].append([])
+                return result
+            mask = self._where_mask(where)
+            if mask is None:
+                return None
+
+            scores = self._scores(queries)
+            rows = np.flatnonzero(mask)
+            if len(rows) < self._n:
+                scores = scores[rows]
+            k = min(n_results, len(rows))
+
+            for col in range(scores.shape[1]):
+                column = scores[:, col]
+                if k <= 0:
+                    top = np.empty(0, dtype=np.int64)
+                elif k < len(column):
+                    top = np.argpartition(-column, k - 1)[:k]
+                    top = top[np.argsort(-column[top], kind="stable")]
+                else:
+                    top = np.argsort(-column, kind="stable")
+                sim = column[top]
+                picked = rows[top]
+                result["ids"].append([self._ids[r] for r in picked])
+                result["metadatas"].append([self._metas[r] for r in picked])
+                if space == "cosine":
+                    dist = 1.0 - sim
+                elif space == "ip":
+                    dist = -sim
+                else:
+                    dist = 2.0 - 2.0 * sim
+                result["distances"].append(dist.tolist())
+
+        wanted = list(dict.fromkeys(cid for ids in result["ids"] for cid in ids))
+        docs = self._documents_for(collection or self._default_collection(), wanted) if wanted else {}
+        result["documents"] = [[docs.get(cid, "") for cid in ids] for ids in result["ids"]]
+        return result
+
+    def __len__(self) -> int:
+        return self._n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row_bytes = (self.dim or 0) * self.dtype.itemsize
+            if self.dtype == np.int8:
+                row_bytes += self._scale.itemsize
+            return {
+                "chunks": self._n,
+                "capacity": len(self._matrix) if self._matrix is not None else 0,
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "matrix_bytes": self._n * row_bytes,
+            }
+
+
+# Instance dùng chung; chỉ đồng bộ với corpus khi backend "flat" được chọn
+flat_index = FlatIndex(dtype=settings.FLAT_INDEX_DTYPE)
+if settings.RETRIEVAL_BACKEND == "flat":
+    corpus_state.register(flat_index)
@@ -0,0 +1,323 @@
+# models/ingest.py
+# Ghi tài liệu vào collection theo hash nội dung chunk
+# Chức năng:
+# - Chia văn bản thành chunk theo heading / Q&A và theo token (services.chunker),
+#   mỗi chunk có hash nội dung ổn định (mmh3)
+# - Id chunk suy ra từ (source, hash) → upload lại cùng nội dung cho cùng id
+# - Chunk không đổi được giữ nguyên trong collection; chunk mới dùng lại embedding
+#   đã lưu (kho embedding theo hash / collection), chỉ embed chunk chưa từng thấy
+# - Chỉ áp phần chênh lệch: chunk cũ không còn trong file bị xoá, chunk mới được upsert
+# - Metadata tính sẵn: title, heading level, loại chunk, số token, level, preview
+# - Chạy dạng luồng: đọc file theo block, decode + chia chunk bằng generator,
+#   embed + ghi theo batch giới hạn → bộ nhớ không phụ thuộc kích thước file
+# - Báo tiến độ sau mỗi batch qua callback
+# - Tuỳ chọn embed song song trên pool process (settings.INGEST_EMBED_WORKERS)
+# - Trả thống kê (tổng / embed mới / dùng lại / không đổi / xoá) để ghi log
+
+import codecs
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import mmh3
+import numpy as np
+
+from config.config import settings
+from models.chunk_catalog import content_hash
+from models.embeddings import embed_texts
+from models.parallel_embed import get_parallel_embedder
+from models.embedding_store import embedding_store
+from models.source_registry import make_preview, source_registry
+from services.chunker import Chunk, iter_markdown_chunks
+from services.utils import assign_level
+
+logger = logging.getLogger("ingest")
+
+_HEADING_RE = re.compile(r"#{1,6}\s+(.+?)(?=\s#|\s\*\*|$)")
+_QA_MARK_RE = re.compile(r"\*\*?Q:\*\*?", re.IGNORECASE)
+
+
+# =========================
+# HASH FILE
+# =========================
+
+# Bộ hash tăng dần cho nội dung file (cập nhật theo từng block)
+def new_file_hasher():
+    return mmh3.mmh3_x64_128(seed=0)
+
+
+# Giá trị hash file: 64 bit đầu, có dấu → lưu được vào metadata Chroma
+def file_digest(hasher) -> int:
+    return int.from_bytes(hasher.digest()[:8], "little", signed=True)
+
+
+def hash_file(path: Path, block_size: Optional[int] = None) -> int:
+    block_size = block_size or settings.UPLOAD_READ_BLOCK_SIZE
+    hasher = new_file_hasher()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return file_digest(hasher)
+
+
+# =========================
+# DECODE DẠNG LUỒNG
+# =========================
+
+# Đọc file theo block và decode UTF-8 tăng dần (ký tự nhiều byte bị cắt
+# giữa hai block vẫn được ghép đúng)
+def iter_text(path: Path, block_size: Optional[int] = None) -> Iterator[str]:
+    block_size = block_size or settings.UPLOAD_READ_BLOCK_SIZE
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            text = decoder.decode(block)
+            if text:
+                yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+# =========================
+# GHI VÀO COLLECTION
+# =========================
+
+# Id chunk: 16 ký tự hex của hash (không dấu) gắn với tên file
+def chunk_id(source: str, chash: int) -> str:
+    return f"{source}::{chash & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+# Chunk truyền vào dạng chuỗi (không qua services.chunker) → suy metadata từ nội dung
+def _as_chunk(text: str) -> Chunk:
+    heading = _HEADING_RE.search(text)
+    return Chunk(
+        text=text,
+        title=heading.group(1).strip() if heading else "",
+        heading_level=0,
+        token_count=len(text.split()),
+        chunk_type="qa" if _QA_MARK_RE.search(text) else "text",
+    )
+
+
+def _chunk_meta(
+    source: str, chunk: Chunk, chash: int, file_hash: Optional[int] = None
+) -> Dict[str, Any]:
+    words = len(chunk.text.split())
+    meta = {
+        "source": source,
+        "title": chunk.title[:120],
+        "chunk_type": chunk.chunk_type,
+        "token_count": chunk.token_count,
+        "heading_level": chunk.heading_level,
+        "level": assign_level(words),
+        "word_count": words,
+        "preview": make_preview(chunk.text),
+        "content_hash": chash,
+    }
+    if file_hash is not None:
+        meta["file_hash"] = file_hash
+    return meta
+
+
+# Embedding đã có của các chunk theo hash nội dung
+# Chức năng:
+# - Tra kho embedding bền vững trước (còn giữ cả chunk đã bị xoá khỏi collection)
+# - Hash còn thiếu → tra collection (chunk trùng nội dung ở file khác)
+# - Trả thêm các hash lấy từ collection để ghi bổ sung vào kho
+def _stored_embeddings(coll, hashes: List[int]) -> tuple:
+    if not hashes:
+        return {}, []
+    reuse: Dict[int, Any] = dict(embedding_store.get_many(hashes))
+    missing = [h for h in hashes if h not in reuse]
+    backfill: List[int] = []
+    if missing:
+        found = coll.get(
+            where={"content_hash": {"$in": missing}},
+            include=["metadatas", "embeddings"],
+        ) or {}
+        embs = found.get("embeddings")
+        if embs is None:
+            embs = []
+        for meta, emb in zip(found.get("metadatas") or [], embs):
+            chash = (meta or {}).get("content_hash")
+            if chash is not None and chash not in reuse:
+                reuse[chash] = emb
+                backfill.append(chash)
+    return reuse, backfill
+
+
+# Chuẩn bị một batch
+# Chức năng:
+# - Chunk đã có trong collection với cùng id (cùng file, cùng nội dung) → không ghi lại
+# - Chunk mới: tra embedding đã có, trả danh sách vị trí cần embed
+def _prepare_batch(coll, batch: List[tuple], source: str, existing: set) -> tuple:
+    unchanged = [(h, c) for h, c in batch if chunk_id(source, h) in existing]
+    new = [(h, c) for h, c in batch if chunk_id(source, h) not in existing]
+    reuse, backfill = _stored_embeddings(coll, [h for h, _ in new])
+    todo = [i for i, (h, _) in enumerate(new) if h not in reuse]
+    return new, reuse, backfill, todo, unchanged
+
+
+# Ghi một batch: upsert chunk mới (embedding dùng lại + vừa embed),
+# chunk không đổi chỉ cập nhật metadata khi file đổi (không embed, không ghi vector)
+def _commit_batch(
+    coll,
+    source: str,
+    prepared: tuple,
+    fresh: np.ndarray,
+    file_hash: Optional[int],
+    refresh_meta: bool,
+) -> int:
+    new, reuse, backfill, todo, unchanged = prepared
+
+    if new:
+        embeddings: List[Any] = [reuse.get(h) for h, _ in new]
+        for row, i in enumerate(todo):
+            embeddings[i] = fresh[row]
+        coll.upsert(
+            ids=[chunk_id(source, h) for h, _ in new],
+            documents=[c.text for _, c in new],
+            metadatas=[_chunk_meta(source, c, h, file_hash) for h, c in new],
+            embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+        )
+        embedding_store.put_many(
+            [(new[i][0], fresh[row]) for row, i in enumerate(todo)]
+            + [(h, reuse[h]) for h in backfill]
+        )
+
+    if unchanged and refresh_meta:
+        coll.update(
+            ids=[chunk_id(source, h) for h, _ in unchanged],
+            metadatas=[_chunk_meta(source, c, h, file_hash) for h, c in unchanged],
+        )
+    return len(todo)
+
+
+# Ingest (hoặc cập nhật) một file từ một luồng chunk
+# Chức năng:
+# - Embed + ghi theo batch batch_size chunk
+# - embedder (models.parallel_embed.ParallelEmbedder): embed nhiều batch song song
+#   trên pool process, batch vẫn được ghi theo đúng thứ tự
+# - Chunk trùng nội dung trong cùng file chỉ giữ một
+# - file_hash: hash toàn file, lưu vào metadata để lần upload sau bỏ qua file không đổi
+# - on_progress(stats) được gọi sau mỗi batch
+# - Xoá chunk cũ của file không còn xuất hiện sau khi ghi xong
+def ingest_stream(
+    manager,
+    source: str,
+    chunks: Iterable[Union[Chunk, str]],
+    file_hash: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    embedder=None,
+) -> Dict[str, Any]:
+    batch_size = max(1, batch_size or settings.INGEST_BATCH_SIZE)
+    coll = manager.get_collection()
+    old_ids = (coll.get(where={"source": source}, include=[]) or {}).get("ids") or []
+    existing = set(old_ids)
+    # File đổi nội dung → chunk không đổi vẫn cần file_hash mới trong metadata
+    refresh_meta = file_hash is not None and source_registry.file_hash(source) != file_hash
+
+    t0 = time.perf_counter()
+    stats = {
+        "chunks": 0, "embedded": 0, "reused": 0, "unchanged": 0, "removed": 0,
+        "chunks_per_sec": 0.0,
+    }
+    keep = set()
+
+    # Luồng batch (hash, Chunk) đã khử trùng lặp
+    def batches() -> Iterator[List[tuple]]:
+        batch: List[tuple] = []
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = _as_chunk(chunk.strip())
+            if not chunk.text.strip():
+                continue
+            chash = content_hash(chunk.text)
+            cid = chunk_id(source, chash)
+            if cid in keep:
+                continue
+            keep.add(cid)
+            batch.append((chash, chunk))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def commit(prepared: tuple, fresh: np.ndarray):
+        embedded = _commit_batch(coll, source, prepared, fresh, file_hash, refresh_meta)
+        new, unchanged = prepared[0], prepared[4]
+        stats["chunks"] += len(new) + len(unchanged)
+        stats["embedded"] += embedded
+        stats["reused"] += len(new) - embedded
+        stats["unchanged"] += len(unchanged)
+        elapsed = time.perf_counter() - t0
+        stats["chunks_per_sec"] = round(stats["chunks"] / elapsed, 2) if elapsed else 0.0
+        if on_progress:
+            on_progress(dict(stats))
+
+    if embedder is None:
+        for batch in batches():
+            prepared = _prepare_batch(coll, batch, source, existing)
+            new, todo = prepared[0], prepared[3]
+            commit(prepared, embed_texts([new[i][1].text for i in todo]))
+    else:
+        def jobs():
+            for batch in batches():
+                prepared = _prepare_batch(coll, batch, source, existing)
+                new, todo = prepared[0], prepared[3]
+                yield prepared, [new[i][1].text for i in todo]
+
+        for prepared, fresh in embedder.map_ordered(jobs()):
+            commit(prepared, fresh)
+
+    stale = [cid for cid in old_ids if cid not in keep]
+    if stale:
+        coll.delete(ids=stale)
+    stats["removed"] = len(stale)
+
+    logger.info(f"[INGEST] {source}: {stats}")
+    return stats
+
+
+# Ingest một văn bản đã nằm sẵn trong bộ nhớ
+# Chức năng:
+# - chunks: danh sách chunk đã chia sẵn (mặc định services.chunker theo markdown)
+def ingest_document(
+    manager,
+    text: str,
+    source: str,
+    chunks: Optional[List[Union[Chunk, str]]] = None,
+    file_hash: Optional[int] = None,
+) -> Dict[str, Any]:
+    return ingest_stream(
+        manager,
+        source,
+        chunks if chunks is not None else iter_markdown_chunks([text]),
+        file_hash=file_hash,
+        embedder=get_parallel_embedder(),
+    )
+
+
+# Ingest một file trên đĩa dạng luồng (block → decode → chunk → batch)
+def ingest_file(
+    manager,
+    path: Path,
+    source: str,
+    file_hash: Optional[int] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+) -> Dict[str, Any]:
+    return ingest_stream(
+        manager,
+        source,
+        iter_markdown_chunks(iter_text(path), chunk_size, chunk_overlap),
+        file_hash=file_hash,
+        on_progress=on_progress,
+        embedder=get_parallel_embedder(),
+    )
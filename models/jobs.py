@@ -0,0 +1,134 @@
+# models/jobs.py
+# Lưu trữ job ingest trong SQLite
+# Chức năng:
+# - Mỗi job: loại (upload / reingest), trạng thái, payload, tiến độ, kết quả, thời gian
+# - Ghi xuống cùng file SQLite với cấu hình (settings.DB_PATH), bảng ingest_jobs
+# - Job chưa xong (queued / running) được đọc lại khi khởi động để chạy tiếp
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from config.config import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    state TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+
+class JobStore:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or settings.DB_PATH
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(sql, params)
+            conn.commit()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for key in ("payload", "progress", "result"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        started, finished = job["started_at"], job["finished_at"]
+        job["duration_s"] = (
+            round((finished or time.time()) - started, 3) if started else None
+        )
+        return job
+
+    # Tạo job mới ở trạng thái queued (id luôn do server sinh, không nhận id từ client)
+    def create(self, kind: str, payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO ingest_jobs (id, kind, state, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, json.dumps(payload, ensure_ascii=False), time.time()),
+        )
+        return job_id
+
+    def mark_running(self, job_id: str) -> None:
+        self._execute(
+            "UPDATE ingest_jobs SET state = ?, started_at = COALESCE(started_at, ?) WHERE id = ?",
+            (RUNNING, time.time(), job_id),
+        )
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        self._execute(
+            "UPDATE ingest_jobs SET progress = ? WHERE id = ?",
+            (json.dumps(progress, ensure_ascii=False), job_id),
+        )
+
+    def finish(
+        self,
+        job_id: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        self._execute(
+            "UPDATE ingest_jobs SET state = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (
+                FAILED if error else DONE,
+                json.dumps(result, ensure_ascii=False) if result is not None else None,
+                error,
+                time.time(),
+                job_id,
+            ),
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT * FROM ingest_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    # Job chưa hoàn tất (để chạy tiếp sau khi khởi động lại), theo thứ tự tạo
+    def unfinished(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT * FROM ingest_jobs WHERE state IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING),
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT * FROM ingest_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+
+# Instance dùng chung
+job_store = JobStore()
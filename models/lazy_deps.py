@@ -0,0 +1,55 @@
+# models/lazy_deps.py
+# Accessor cho các thư viện nặng (import ở lần dùng đầu, không import lúc khởi động)
+# Chức năng:
+# - chromadb / onnxruntime (qua embedding function), tokenizers, markdown-it
+#   chỉ được import khi thực sự cần
+# - Ghi thời gian import từng thư viện → benchmarks.startup_profile in ra
+# - Import an toàn giữa nhiều thread (lock), lần sau trả module đã nạp
+
+import importlib
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Dict
+
+_lock = threading.Lock()
+_timings: Dict[str, float] = {}
+
+
+def lazy_import(name: str) -> ModuleType:
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        module = sys.modules.get(name)
+        if module is None:
+            t0 = time.perf_counter()
+            module = importlib.import_module(name)
+            _timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+        return module
+
+
+def chromadb() -> ModuleType:
+    return lazy_import("chromadb")
+
+
+def embedding_functions() -> ModuleType:
+    return lazy_import("chromadb.utils.embedding_functions")
+
+
+def onnx_minilm() -> type:
+    return lazy_import("chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2").ONNXMiniLM_L6_V2
+
+
+def tokenizers() -> ModuleType:
+    return lazy_import("tokenizers")
+
+
+def markdown_it() -> ModuleType:
+    return lazy_import("markdown_it")
+
+
+# Thời gian (ms) của các import đã chạy qua accessor trong process này
+def import_timings() -> Dict[str, float]:
+    return dict(_timings)
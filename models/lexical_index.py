@@ -0,0 +1,288 @@
+# models/lexical_index.py
+# Chỉ mục lexical (BM25) cập nhật tăng dần
+# Chức năng:
+# - Thay cho việc dựng lại BM25Okapi trên toàn bộ corpus mỗi khi dữ liệu đổi
+# - Postings list lưu trong array (doc id int32 + term frequency float32)
+# - Document frequency và độ dài tài liệu cập nhật khi thêm / xoá
+# - Chấm điểm vector hoá bằng NumPy, chỉ trên các postings của từ trong câu hỏi
+# - Thêm / xoá một file tốn thời gian tỉ lệ với file đó (xoá là đánh dấu,
+#   postings được dọn gọn khi tỉ lệ tài liệu đã xoá vượt ngưỡng)
+
+import logging
+import math
+import threading
+from array import array
+from collections import Counter
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from config.config import settings
+from models.corpus import corpus_state
+from models.tokenizer import tokenize
+
+logger = logging.getLogger("lexical_index")
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        compact_ratio: float = 0.3,
+        fold: bool = False,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self.fold = fold
+        self._lock = threading.RLock()
+        self._reset_state()
+
+    def _reset_state(self):
+        # Từ điển term → term id
+        self._terms: Dict[str, int] = {}
+        self._vocab: List[str] = []
+        # term id → postings (doc id, tf)
+        self._post_docs: List[array] = []
+        self._post_tf: List[array] = []
+        # term id → số tài liệu còn sống chứa term
+        self._df = array("i")
+
+        # doc id (int nội bộ) → thông tin tài liệu
+        self._doc_keys: List[Optional[str]] = []
+        self._doc_source: List[Optional[str]] = []
+        self._doc_terms: List[Optional[array]] = []
+        self._doc_len = array("f")
+        self._alive = bytearray()
+        self._key_to_doc: Dict[str, int] = {}
+        self._by_source: Dict[str, Set[str]] = {}
+
+        self._n_alive = 0
+        self._n_dead = 0
+        self._total_len = 0.0
+
+    # Tách từ theo đúng cấu hình của chỉ mục (NFC, stopword, fold dấu)
+    # Chức năng:
+    # - Câu hỏi phải được tách giống hệt chunk lúc ingest thì mới so khớp được
+    def analyze(self, text: str) -> List[str]:
+        return tokenize(text, fold=self.fold)
+
+    # Tập token của một chunk đã tách lúc ingest
+    # Chức năng:
+    # - Cho soft_match dùng lại, không tách từ lại mỗi request
+    def tokens_for(self, key: str) -> Optional[FrozenSet[str]]:
+        with self._lock:
+            doc_id = self._key_to_doc.get(key)
+            if doc_id is None:
+                return None
+            return frozenset(self._vocab[tid] for tid in self._doc_terms[doc_id])
+
+    # =========================
+    # CẬP NHẬT CHỈ MỤC
+    # =========================
+
+    # Thêm (hoặc thay thế) các chunk vào chỉ mục
+    def add(
+        self,
+        ids: Sequence[str],
+        docs: Sequence[str],
+        metas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        metas = metas or [None] * len(ids)
+        with self._lock:
+            for key, doc, meta in zip(ids, docs, metas):
+                if key in self._key_to_doc:
+                    self._remove_key(key)
+                self._add_one(key, doc or "", (meta or {}).get("source"))
+
+    def _add_one(self, key: str, doc: str, source: Optional[str]):
+        counts = Counter(self.analyze(doc))
+        doc_id = len(self._doc_keys)
+
+        term_ids = array("i")
+        for term, tf in counts.items():
+            tid = self._terms.get(term)
+            if tid is None:
+                tid = len(self._post_docs)
+                self._terms[term] = tid
+                self._vocab.append(term)
+                self._post_docs.append(array("i"))
+                self._post_tf.append(array("f"))
+                self._df.append(0)
+            self._post_docs[tid].append(doc_id)
+            self._post_tf[tid].append(float(tf))
+            self._df[tid] += 1
+            term_ids.append(tid)
+
+        length = float(sum(counts.values()))
+        self._doc_keys.append(key)
+        self._doc_source.append(source)
+        self._doc_terms.append(term_ids)
+        self._doc_len.append(length)
+        self._alive.append(1)
+        self._key_to_doc[key] = doc_id
+        if source:
+            self._by_source.setdefault(source, set()).add(key)
+
+        self._n_alive += 1
+        self._total_len += length
+
+    def remove_ids(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for key in ids:
+                self._remove_key(key)
+            self._maybe_compact()
+
+    def remove_source(self, source: str) -> None:
+        with self._lock:
+            for key in list(self._by_source.get(source, ())):
+                self._remove_key(key)
+            self._by_source.pop(source, None)
+            self._maybe_compact()
+
+    def _remove_key(self, key: str):
+        doc_id = self._key_to_doc.pop(key, None)
+        if doc_id is None:
+            return
+
+        for tid in self._doc_terms[doc_id]:
+            self._df[tid] -= 1
+
+        source = self._doc_source[doc_id]
+        keys = self._by_source.get(source) if source else None
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_source[source]
+
+        self._alive[doc_id] = 0
+        self._total_len -= self._doc_len[doc_id]
+        self._doc_terms[doc_id] = None
+        self._doc_keys[doc_id] = None
+        self._n_alive -= 1
+        self._n_dead += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset_state()
+
+    # Dọn postings của tài liệu đã xoá
+    # Chức năng:
+    # - Chỉ chạy khi số tài liệu đã xoá vượt compact_ratio → chi phí được chia đều
+    def _maybe_compact(self):
+        total = self._n_alive + self._n_dead
+        if not total or self._n_dead / total < self.compact_ratio:
+            return
+
+        remap = array("i", [-1]) * total
+        new_id = 0
+        for old_id in range(total):
+            if self._alive[old_id]:
+                remap[old_id] = new_id
+                new_id += 1
+
+        remap_np = np.frombuffer(remap, dtype=np.int32)
+        for tid in range(len(self._post_docs)):
+            docs = np.frombuffer(self._post_docs[tid], dtype=np.int32)
+            tfs = np.frombuffer(self._post_tf[tid], dtype=np.float32)
+            keep = remap_np[docs] >= 0
+            new_docs = array("i", remap_np[docs[keep]].tobytes())
+            new_tfs = array("f", tfs[keep].tobytes())
+            del docs, tfs
+            self._post_docs[tid] = new_docs
+            self._post_tf[tid] = new_tfs
+        del remap_np
+
+        alive_ids = [i for i in range(total) if self._alive[i]]
+        self._doc_keys = [self._doc_keys[i] for i in alive_ids]
+        self._doc_source = [self._doc_source[i] for i in alive_ids]
+        self._doc_terms = [self._doc_terms[i] for i in alive_ids]
+        self._doc_len = array("f", (self._doc_len[i] for i in alive_ids))
+        self._alive = bytearray(b"\x01") * len(alive_ids)
+        self._key_to_doc = {k: i for i, k in enumerate(self._doc_keys)}
+        self._n_dead = 0
+
+        logger.info(f"[LEXICAL_INDEX] compacted → {len(alive_ids)} docs")
+
+    # =========================
+    # CHẤM ĐIỂM
+    # =========================
+
+    # BM25 cho một câu truy vấn
+    # Chức năng:
+    # - tokens: token đã tách sẵn của câu hỏi (tách một lần / message)
+    # - Chỉ duyệt postings của các term có trong câu hỏi
+    # - Cộng dồn điểm theo tài liệu bằng np.unique + np.bincount
+    # - Trả về top_k (chunk id, điểm) giảm dần
+    def search(
+        self,
+        query: str,
+        top_k: int = 20,
+        tokens: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        q_terms = set(tokens if tokens is not None else self.analyze(query))
+        with self._lock:
+            if not q_terms or self._n_alive == 0:
+                return []
+
+            n_docs = self._n_alive
+            avgdl = self._total_len / n_docs if n_docs else 1.0
+            alive = np.frombuffer(self._alive, dtype=np.uint8)
+            lens = np.frombuffer(self._doc_len, dtype=np.float32)
+
+            cand_docs = []
+            cand_scores = []
+            for term in q_terms:
+                tid = self._terms.get(term)
+                if tid is None:
+                    continue
+                df = self._df[tid]
+                if df <= 0:
+                    continue
+
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                docs = np.frombuffer(self._post_docs[tid], dtype=np.int32)
+                tfs = np.frombuffer(self._post_tf[tid], dtype=np.float32)
+                mask = alive[docs].astype(bool)
+                d = docs[mask]
+                tf = tfs[mask]
+                del docs, tfs
+
+                norm = self.k1 * (1.0 - self.b + self.b * lens[d] / avgdl)
+                cand_docs.append(d)
+                cand_scores.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+
+            del alive, lens
+
+            if not cand_docs:
+                return []
+
+            all_docs = np.concatenate(cand_docs)
+            all_scores = np.concatenate(cand_scores)
+            uniq, inv = np.unique(all_docs, return_inverse=True)
+            totals = np.bincount(inv, weights=all_scores)
+
+            k = min(top_k, len(uniq))
+            if k < len(uniq):
+                top = np.argpartition(-totals, k - 1)[:k]
+            else:
+                top = np.arange(len(uniq))
+            top = top[np.argsort(-totals[top], kind="stable")]
+
+            return [(self._doc_keys[uniq[i]], float(totals[i])) for i in top]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "docs": self._n_alive,
+                "deleted_pending": self._n_dead,
+                "terms": len(self._terms),
+                "postings": int(sum(len(p) for p in self._post_docs)),
+                "sources": len(self._by_source),
+            }
+
+
+# Instance dùng chung, được đồng bộ qua models.corpus.corpus_state
+lexical_index = LexicalIndex(fold=settings.LEXICAL_FOLD_DIACRITICS)
+corpus_state.register(lexical_index)
@@ -0,0 +1,230 @@
+# models/parallel_embed.py
+# Embed song song các batch chunk lúc ingest trên pool nhiều process
+# Chức năng:
+# - Mỗi process worker nạp model ONNX (MiniLM, cùng model với collection) MỘT lần
+# - Lúc khởi động pool: embed vài câu mẫu ở worker và ở process chính (embedding
+#   function của collection), lệch nhau → tắt pool, embed tại chỗ
+#   (không bao giờ ghi vector của model khác vào collection)
+# - Vector trả về qua shared memory (numpy float32), không pickle list float
+# - Nhiều batch chạy đồng thời, kết quả trả theo đúng thứ tự gửi
+#   → ghi vào collection vẫn giữ thứ tự
+# - Số worker cấu hình qua settings.INGEST_EMBED_WORKERS; mặc định 0 = embed tại chỗ
+#   bằng ONNX session dùng chung (một session / process, hợp giới hạn RAM container);
+#   bật pool (≥ 1) khi máy đủ RAM / CPU để tách embed khỏi GIL của request chat
+
+import importlib
+import logging
+import multiprocessing as mp
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config import settings
+from models import lazy_deps
+
+logger = logging.getLogger("parallel_embed")
+
+
+# =========================
+# PHÍA WORKER PROCESS
+# =========================
+
+_worker_fn = None
+
+# Câu mẫu so vector worker ↔ process chính
+PROBE_TEXTS = ["Hidemium là gì?", "cách tạo profile với proxy", "probe"]
+# Sai lệch tối đa cho phép (cùng model ONNX → chỉ khác do làm tròn float)
+PROBE_ATOL = 1e-4
+
+
+class EmbeddingMismatch(RuntimeError):
+    pass
+
+
+# Chạy một lần khi process worker khởi động: nạp model ONNX
+# factory: "module:tên" trả embedding function (None = DefaultEmbeddingFunction của Chroma)
+def _init_worker(factory: Optional[str] = None):
+    global _worker_fn
+    if factory:
+        module, _, name = factory.partition(":")
+        _worker_fn = getattr(importlib.import_module(module), name)()
+    else:
+        _worker_fn = lazy_deps.embedding_functions().DefaultEmbeddingFunction()
+
+
+def _embed_probe() -> np.ndarray:
+    return np.asarray(_worker_fn(PROBE_TEXTS), dtype=np.float32)
+
+
+# Embed một batch, ghi thẳng vào block shared memory của batch đó
+def _embed_into(texts: List[str], shm_name: str, dim: int) -> int:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((len(texts), dim), dtype=np.float32, buffer=shm.buf)
+        out[:] = np.asarray(_worker_fn(texts), dtype=np.float32)
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+
+# =========================
+# PHÍA PROCESS CHÍNH
+# =========================
+
+class ParallelEmbedder:
+    # reference: embed tại chỗ bằng đúng function của collection, dùng để kiểm tra
+    # worker cho ra cùng vector (None = không kiểm tra)
+    def __init__(
+        self,
+        workers: int,
+        max_inflight: Optional[int] = None,
+        factory: Optional[str] = None,
+        reference: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+    ):
+        self.workers = max(1, workers)
+        self.max_inflight = max_inflight or self.workers * 2
+        self.factory = factory
+        self.reference = reference
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dim: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.factory,),
+                )
+                try:
+                    probe = pool.submit(_embed_probe).result()
+                    self._verify(probe)
+                except BaseException:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                self._pool, self._dim = pool, probe.shape[1]
+                logger.info(f"[PARALLEL_EMBED] pool ready: {self.workers} workers, dim={self._dim}")
+            return self._pool
+
+    # Vector của worker phải trùng vector của embedding function collection
+    def _verify(self, probe: np.ndarray) -> None:
+        if self.reference is None:
+            return
+        local = np.asarray(self.reference(PROBE_TEXTS), dtype=np.float32)
+        if local.shape != probe.shape:
+            raise EmbeddingMismatch(f"worker dim {probe.shape} != collection dim {local.shape}")
+        diff = float(np.abs(local - probe).max())
+        if diff > PROBE_ATOL:
+            raise EmbeddingMismatch(f"worker vectors differ from collection (max abs diff {diff:.2e})")
+
+    # Khởi động pool ngay (nạp model ở worker + kiểm tra vector)
+    def start(self) -> "ParallelEmbedder":
+        self._ensure_pool()
+        return self
+
+    def _submit(self, texts: List[str]) -> Tuple[Future, shared_memory.SharedMemory]:
+        pool = self._ensure_pool()
+        nbytes = max(1, len(texts) * self._dim * 4)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return pool.submit(_embed_into, texts, shm.name, self._dim), shm
+
+    def _collect(self, future: Future, shm: shared_memory.SharedMemory, n: int) -> np.ndarray:
+        try:
+            future.result()
+            view = np.ndarray((n, self._dim), dtype=np.float32, buffer=shm.buf)
+            result = view.copy()
+            del view
+            return result
+        finally:
+            shm.close()
+            shm.unlink()
+
+    # Embed nhiều batch song song, trả kết quả theo đúng thứ tự batch
+    # Chức năng:
+    # - Tối đa max_inflight batch đang chạy cùng lúc → bộ nhớ có giới hạn
+    # - items: iterable (payload, texts); payload đi kèm kết quả để caller ghi
+    def map_ordered(self, items: Iterable[Tuple[object, List[str]]]) -> Iterator[Tuple[object, np.ndarray]]:
+        pending: deque = deque()
+        try:
+            for payload, texts in items:
+                if texts:
+                    future, shm = self._submit(list(texts))
+                    pending.append((payload, future, shm, len(texts)))
+                else:
+                    pending.append((payload, None, None, 0))
+                while len(pending) >= self.max_inflight:
+                    yield self._pop(pending)
+            while pending:
+                yield self._pop(pending)
+        finally:
+            for _, future, shm, _ in pending:
+                if future is not None:
+                    future.cancel()
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+                    shm.close()
+                    shm.unlink()
+
+    def _pop(self, pending: deque) -> Tuple[object, np.ndarray]:
+        payload, future, shm, n = pending.popleft()
+        if future is None:
+            return payload, np.zeros((0, self._dim or 0), dtype=np.float32)
+        return payload, self._collect(future, shm, n)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        for _, vectors in self.map_ordered([(None, list(texts))]):
+            return vectors
+        return np.zeros((0, 0), dtype=np.float32)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+_embedder: Optional[ParallelEmbedder] = None
+_embedder_lock = threading.Lock()
+
+
+_embedder_disabled = False
+
+
+# Pool dùng chung cho ingest (None nếu cấu hình chạy tại chỗ)
+# Chức năng:
+# - Khởi động + kiểm tra vector worker ↔ collection ở lần gọi đầu
+# - Lệch model hoặc không khởi động được → tắt pool cho cả process, ingest
+#   dùng embed tại chỗ (đúng embedding function của collection)
+def get_parallel_embedder() -> Optional[ParallelEmbedder]:
+    global _embedder, _embedder_disabled
+    if settings.INGEST_EMBED_WORKERS <= 0 or _embedder_disabled:
+        return None
+    with _embedder_lock:
+        if _embedder is None and not _embedder_disabled:
+            from models.embeddings import embed_texts
+
+            try:
+                _embedder = ParallelEmbedder(
+                    settings.INGEST_EMBED_WORKERS, reference=embed_texts
+                ).start()
+            except Exception as e:
+                _embedder_disabled = True
+                logger.error(f"[PARALLEL_EMBED] pool disabled, embedding in-process: {e}")
+        return _embedder
+
+
+def shutdown_parallel_embedder() -> None:
+    global _embedder
+    with _embedder_lock:
+        if _embedder is not None:
+            _embedder.shutdown()
+            _embedder = None
@@ -0,0 +1,190 @@
+# models/qa_index.py
+# Chỉ mục tra cứu trực tiếp cặp hỏi–đáp (FAQ) trong tài liệu markdown
+# Chức năng:
+# - Lúc ingest: tách các cặp **Q:** ... **A:** ... trong chunk thành bảng câu hỏi
+# - Tra cứu khớp chính xác (câu hỏi đã chuẩn hoá, bỏ dấu) trong O(1)
+# - Tra cứu mờ theo tập token (Jaccard), chỉ xét câu hỏi có chung token
+# - Câu hỏi đủ giống (≥ ngưỡng) → trả lời ngay, không embed, không Chroma, không LLM
+# - Được đồng bộ với collection qua models.corpus.corpus_state
+
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set
+
+from config.config import settings
+from models.chunk_catalog import extract_answer_text, is_answerable
+from models.corpus import corpus_state
+from models.tokenizer import normalize_text, tokenize
+
+
+_QA_RE = re.compile(
+    r"\*\*?Q:\*\*?\s*(?P<q>.+?)\s*\*\*?A:\*\*?\s*(?P<a>.+?)(?=\*\*?Q:\*\*?|#{2,}|\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+class QAEntry(NamedTuple):
+    question: str
+    answer: str
+    source: Optional[str]
+    chunk_id: str
+
+
+class QAMatch(NamedTuple):
+    entry: QAEntry
+    score: float
+    exact: bool
+
+
+# Key khớp chính xác: bỏ dấu câu, bỏ dấu tiếng Việt, lower
+def _exact_key(text: str) -> str:
+    return normalize_text(text, fold=True).lower()
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(tokenize(text, fold=True))
+
+
+# Tách các cặp hỏi–đáp trong một chunk
+def parse_qa_pairs(text: str) -> List[tuple]:
+    pairs = []
+    for m in _QA_RE.finditer(text or ""):
+        question = m.group("q").strip()
+        answer = extract_answer_text(m.group("a"))
+        if question and is_answerable(answer):
+            pairs.append((question, answer))
+    return pairs
+
+
+class QAIndex:
+    def __init__(self, threshold: float = 0.75):
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._entries: Dict[int, QAEntry] = {}
+        self._entry_tokens: Dict[int, Set[str]] = {}
+        # Một câu hỏi có thể lặp ở nhiều chunk → giữ mọi entry, tra cứu lấy entry cũ nhất
+        self._exact: Dict[str, Set[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._by_chunk: Dict[str, List[int]] = {}
+        self._by_source: Dict[str, Set[str]] = {}
+        self._next_id = 0
+
+    # =========================
+    # ĐỒNG BỘ VỚI COLLECTION
+    # =========================
+
+    def add(
+        self,
+        ids: Sequence[str],
+        docs: Sequence[str],
+        metas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        metas = metas or [None] * len(ids)
+        parsed = [(key, parse_qa_pairs(doc), (meta or {}).get("source"))
+                  for key, doc, meta in zip(ids, docs, metas)]
+        with self._lock:
+            for key, pairs, source in parsed:
+                self._remove_chunk(key)
+                if not pairs:
+                    continue
+                for question, answer in pairs:
+                    self._add_entry(QAEntry(question, answer, source, key))
+                if source:
+                    self._by_source.setdefault(source, set()).add(key)
+
+    def _add_entry(self, entry: QAEntry):
+        eid = self._next_id
+        self._next_id += 1
+        tokens = _tokens(entry.question)
+
+        self._entries[eid] = entry
+        self._entry_tokens[eid] = tokens
+        self._exact.setdefault(_exact_key(entry.question), set()).add(eid)
+        for t in tokens:
+            self._postings.setdefault(t, set()).add(eid)
+        self._by_chunk.setdefault(entry.chunk_id, []).append(eid)
+
+    def _remove_chunk(self, key: str):
+        for eid in self._by_chunk.pop(key, []):
+            entry = self._entries.pop(eid)
+            for t in self._entry_tokens.pop(eid, ()):
+                posting = self._postings.get(t)
+                if posting is not None:
+                    posting.discard(eid)
+                    if not posting:
+                        del self._postings[t]
+            exact = _exact_key(entry.question)
+            same = self._exact.get(exact)
+            if same is not None:
+                same.discard(eid)
+                if not same:
+                    del self._exact[exact]
+            keys = self._by_source.get(entry.source)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_source[entry.source]
+
+    def remove_ids(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for key in ids:
+                self._remove_chunk(key)
+
+    def remove_source(self, source: str) -> None:
+        with self._lock:
+            for key in list(self._by_source.pop(source, ())):
+                self._remove_chunk(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset_state()
+
+    # =========================
+    # TRA CỨU
+    # =========================
+
+    # Tìm câu hỏi đã được tài liệu trả lời
+    # Chức năng:
+    # - Khớp chính xác → score 1.0
+    # - Ngược lại: Jaccard trên tập token, chỉ với câu hỏi có chung ít nhất 1 token
+    # - Dưới ngưỡng → None (caller chạy RAG đầy đủ)
+    def lookup(self, question: str, threshold: Optional[float] = None) -> Optional[QAMatch]:
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            if not self._entries:
+                return None
+
+            same = self._exact.get(_exact_key(question))
+            if same:
+                return QAMatch(self._entries[min(same)], 1.0, True)
+
+            q_tokens = _tokens(question)
+            if not q_tokens:
+                return None
+
+            overlap: Dict[int, int] = {}
+            for t in q_tokens:
+                for eid in self._postings.get(t, ()):
+                    overlap[eid] = overlap.get(eid, 0) + 1
+
+            best_eid, best_score = None, 0.0
+            for eid, inter in overlap.items():
+                union = len(q_tokens) + len(self._entry_tokens[eid]) - inter
+                score = inter / union if union else 0.0
+                if score > best_score:
+                    best_eid, best_score = eid, score
+
+            if best_eid is None or best_score < threshold:
+                return None
+            return QAMatch(self._entries[best_eid], best_score, False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Instance dùng chung, được đồng bộ qua models.corpus.corpus_state
+qa_index = QAIndex(threshold=settings.QA_MATCH_THRESHOLD)
+corpus_state.register(qa_index)
@@ -0,0 +1,305 @@
+# models/retrieval.py
+# Truy vấn vector theo lô (multi-query) trên vector store
+# Chức năng:
+# - Embed toàn bộ câu truy vấn mở rộng trong MỘT lần gọi ONNX
+# - Gửi MỘT request multi-query tới Chroma
+# - Chấm điểm hybrid (vector + BM25 từ lexical index tăng dần) bằng NumPy:
+#   min-max hoặc reciprocal rank fusion (settings.RETRIEVAL_FUSION)
+# - Gộp / khử trùng lặp theo hash nội dung, rồi MMR trên MỘT ma trận tương đồng
+#   để bỏ chunk gần trùng và đa dạng hoá kết quả
+# - Trả độ tương đồng vector cao nhất của câu gốc → caller bỏ qua truy vấn mở rộng
+#   khi câu gốc đã đủ chắc chắn
+# - settings.RETRIEVAL_BACKEND = "flat": phần vector chạy trên models.flat_index
+#   (brute-force NumPy trong process) thay vì HNSW của Chroma
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config import settings
+from models.chunk_catalog import chunk_catalog
+from models.corpus import corpus_state
+from models.embedding_store import embedding_store
+from models.embeddings import embed_queries
+from models.flat_index import flat_index
+from models.lexical_index import lexical_index
+
+
+# Đổi khoảng cách Chroma sang độ tương đồng trong [0, 1]
+# Chức năng:
+# - Hỗ trợ cả "cosine" và "l2" (mặc định của Chroma, vector MiniLM đã chuẩn hoá)
+def _distance_to_similarity(distances: np.ndarray, space: str) -> np.ndarray:
+    if space == "cosine":
+        sim = 1.0 - distances
+    elif space == "ip":
+        sim = -distances
+    else:
+        sim = 1.0 - distances / 2.0
+    return np.clip(sim, 0.0, 1.0)
+
+
+class RetrievalResult(NamedTuple):
+    ids: List[str]
+    docs: List[str]
+    metas: List[Dict[str, Any]]
+    scores: np.ndarray
+    # Độ tương đồng vector (cosine) cao nhất của câu truy vấn đầu tiên
+    top_similarity: float
+
+
+_EMPTY = RetrievalResult([], [], [], np.zeros(0, dtype=np.float32), 0.0)
+
+
+def _minmax(x: np.ndarray) -> np.ndarray:
+    lo, hi = float(x.min()), float(x.max())
+    if hi - lo < 1e-9:
+        return (x > 0).astype(np.float32)
+    return (x - lo) / (hi - lo)
+
+
+# Điểm RRF của một danh sách: 1 / (k + hạng), phần tử điểm 0 (không có trong danh sách) → 0
+def _rrf(x: np.ndarray, k: int) -> np.ndarray:
+    ranks = np.empty(len(x), dtype=np.float32)
+    ranks[np.argsort(-x, kind="stable")] = np.arange(1, len(x) + 1, dtype=np.float32)
+    return np.where(x > 0, 1.0 / (k + ranks), 0.0).astype(np.float32)
+
+
+# Gộp điểm vector và lexical của một tập ứng viên
+# Chức năng:
+# - "minmax": chuẩn hoá từng loại điểm về [0, 1] rồi cộng trọng số alpha
+# - "rrf": reciprocal rank fusion có trọng số, co về [0, 1] theo giá trị lớn nhất
+def fuse_scores(
+    dense: np.ndarray,
+    lexical: np.ndarray,
+    alpha: float,
+    method: Optional[str] = None,
+    rrf_k: Optional[int] = None,
+) -> np.ndarray:
+    method = method or settings.RETRIEVAL_FUSION
+    if method == "rrf":
+        k = rrf_k or settings.RETRIEVAL_RRF_K
+        fused = alpha * _rrf(dense, k) + (1.0 - alpha) * _rrf(lexical, k)
+        top = float(fused.max()) if len(fused) else 0.0
+        return fused / top if top > 0 else fused
+    return alpha * _minmax(dense) + (1.0 - alpha) * _minmax(lexical)
+
+
+# Chọn thứ tự MMR (maximal marginal relevance)
+# Chức năng:
+# - Một ma trận tương đồng ứng viên × ứng viên (vector đã chuẩn hoá)
+# - Mỗi bước chọn ứng viên có lam * relevance - (1 - lam) * tương đồng lớn nhất
+#   với các ứng viên đã chọn
+# - Ứng viên có tương đồng ≥ dup_threshold với ứng viên đã chọn bị loại (gần trùng)
+# - Hàng vector 0 (chunk chưa có embedding trong kho) không bị coi là trùng
+def mmr_order(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    lam: float,
+    dup_threshold: float,
+    limit: Optional[int] = None,
+) -> np.ndarray:
+    n = len(relevance)
+    limit = n if limit is None else min(limit, n)
+    top = float(relevance.max()) if n else 0.0
+    rel = relevance / top if top > 0 else relevance
+    sim = vectors @ vectors.T
+
+    selected: List[int] = []
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    while len(selected) < limit and available.any():
+        score = np.where(available, lam * rel - (1.0 - lam) * max_sim, -np.inf)
+        i = int(np.argmax(score))
+        selected.append(i)
+        available[i] = False
+        np.maximum(max_sim, sim[i], out=max_sim)
+        available &= max_sim < dup_threshold
+    return np.asarray(selected, dtype=np.int64)
+
+
+# Vector đã chuẩn hoá của các ứng viên lấy từ kho embedding (thiếu → hàng 0)
+def _candidate_vectors(hashes: Sequence[int]) -> Optional[np.ndarray]:
+    stored = embedding_store.get_many(list(hashes))
+    if not stored:
+        return None
+    dim = len(next(iter(stored.values())))
+    vectors = np.zeros((len(hashes), dim), dtype=np.float32)
+    for row, h in enumerate(hashes):
+        vec = stored.get(h)
+        if vec is not None:
+            vectors[row] = vec
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+# Truy vấn nhiều câu cùng lúc, trả ứng viên đã chấm điểm
+# Chức năng:
+# - Loại câu truy vấn trùng nhau trước khi embed
+# - Một lần embed + một lần collection.query (hoặc flat index) cho tất cả câu
+# - Mỗi câu: gộp điểm vector + lexical (fuse_scores), gom vào một tập ứng viên
+#   theo thứ tự câu truy vấn (câu gốc đứng đầu), khử trùng lặp theo hash nội dung
+# - MMR (settings.RETRIEVAL_MMR_LAMBDA / RETRIEVAL_DUP_THRESHOLD) sắp lại tập ứng viên
+#   và bỏ chunk gần trùng; lambda >= 1 và ngưỡng >= 1 → giữ thứ tự gộp
+# - query_tokens: token đã tách sẵn theo từng câu (None → tự tách)
+# - base: kết quả đã có của câu gốc → ứng viên của base đứng đầu tập ứng viên,
+#   chỉ truy vấn các câu mới (câu gốc không bị embed / query lại), MMR chạy lại
+#   trên tập gộp; top_similarity giữ của base
+def retrieve(
+    manager,
+    queries: Sequence[str],
+    n_results: int = 15,
+    alpha: float = 0.7,
+    limit: Optional[int] = None,
+    where: Optional[Dict[str, Any]] = None,
+    query_tokens: Optional[Dict[str, Sequence[str]]] = None,
+    fusion: Optional[str] = None,
+    mmr_lambda: Optional[float] = None,
+    base: Optional[RetrievalResult] = None,
+) -> RetrievalResult:
+    empty = base or _EMPTY
+    unique_queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+    if not unique_queries:
+        return empty
+
+    coll = manager.get_collection()
+    space = (getattr(coll, "metadata", None) or {}).get("hnsw:space", "l2")
+    use_flat = settings.RETRIEVAL_BACKEND == "flat"
+
+    if use_flat:
+        corpus_state.ensure_loaded(manager)
+        if len(flat_index) == 0:
+            return empty
+    elif coll.count() == 0:
+        return empty
+
+    embeddings = embed_queries(unique_queries)
+
+    result = flat_index.query(embeddings, n_results, where, space, coll) if use_flat else None
+    if result is None:
+        result = coll.query(
+            query_embeddings=embeddings.tolist(),
+            n_results=min(n_results, coll.count()),
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+
+    # BM25 tăng dần trên toàn corpus (chỉ chạm tài liệu chứa từ khoá)
+    corpus_state.ensure_loaded(manager)
+    query_tokens = query_tokens or {}
+    lexical_hits = [
+        dict(lexical_index.search(q, top_k=n_results, tokens=query_tokens.get(q)))
+        if alpha < 1.0 else {}
+        for q in unique_queries
+    ]
+
+    # Chunk chỉ có trong kết quả lexical → lấy nội dung trong MỘT lần get
+    dense_ids = {cid for ids in (result.get("ids") or []) for cid in ids}
+    extra_ids = [
+        cid for hits in lexical_hits for cid in hits if cid not in dense_ids
+    ]
+    extra: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    if extra_ids and where is None:
+        fetched = coll.get(
+            ids=list(dict.fromkeys(extra_ids)),
+            include=["documents", "metadatas"],
+        ) or {}
+        for cid, d, m in zip(
+            fetched.get("ids") or [],
+            fetched.get("documents") or [],
+            fetched.get("metadatas") or [],
+        ):
+            extra[cid] = (d, m or {})
+
+    out_ids: List[str] = list(base.ids) if base else []
+    docs: List[str] = list(base.docs) if base else []
+    metas: List[Dict[str, Any]] = list(base.metas) if base else []
+    hashes: List[int] = [chunk_catalog.hash_of(cid) for cid in out_ids]
+    scores: List[np.ndarray] = [np.asarray(base.scores, dtype=np.float32)] if base else []
+    seen = set(hashes)
+    top_similarity = base.top_similarity if base else 0.0
+
+    for q_idx, (ids, q_docs, q_metas, q_dist) in enumerate(zip(
+        result.get("ids") or [],
+        result.get("documents") or [],
+        result.get("metadatas") or [],
+        result.get("distances") or [],
+    )):
+        hits = lexical_hits[q_idx]
+
+        cand_ids = list(ids) + [cid for cid in hits if cid not in ids and cid in extra]
+        cand_docs = list(q_docs) + [extra[cid][0] for cid in cand_ids[len(ids):]]
+        cand_metas = list(q_metas) + [extra[cid][1] for cid in cand_ids[len(ids):]]
+        if not cand_ids:
+            continue
+
+        dense = np.zeros(len(cand_ids), dtype=np.float32)
+        dense[:len(ids)] = _distance_to_similarity(np.asarray(q_dist, dtype=np.float32), space)
+        if q_idx == 0 and len(ids) and base is None:
+            top_similarity = float(dense[:len(ids)].max())
+
+        lexical = np.asarray([hits.get(cid, 0.0) for cid in cand_ids], dtype=np.float32)
+        fused = fuse_scores(dense, lexical, alpha, fusion)
+
+        order = np.argsort(-fused, kind="stable")
+        cand_hashes = [chunk_catalog.hash_of(cand_ids[i]) for i in order]
+        keep = []
+        for i, chash in zip(order.tolist(), cand_hashes):
+            if chash in seen:
+                continue
+            seen.add(chash)
+            keep.append(i)
+            out_ids.append(cand_ids[i])
+            docs.append(cand_docs[i])
+            metas.append(cand_metas[i] or {})
+            hashes.append(chash)
+        scores.append(fused[keep])
+
+    if not out_ids:
+        return _EMPTY
+    fused_all = np.concatenate(scores)
+
+    lam = settings.RETRIEVAL_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    dup = settings.RETRIEVAL_DUP_THRESHOLD
+    vectors = _candidate_vectors(hashes) if (lam < 1.0 or dup < 1.0) else None
+    if vectors is not None:
+        order = mmr_order(fused_all, vectors, lam, dup, limit)
+    else:
+        order = np.arange(len(out_ids) if limit is None else min(limit, len(out_ids)))
+
+    picked = order.tolist()
+    return RetrievalResult(
+        [out_ids[i] for i in picked],
+        [docs[i] for i in picked],
+        [metas[i] for i in picked],
+        fused_all[order],
+        top_similarity,
+    )
+
+
+# Truy vấn nhiều câu cùng lúc và gộp kết quả (dạng tuple)
+# Chức năng:
+# - Trả về (docs, metas, scores), hoặc (ids, docs, metas, scores) nếu with_ids=True
+# - scores: mảng NumPy float32 điểm đã gộp
+def query_documents_batch(
+    manager,
+    queries: Sequence[str],
+    n_results: int = 15,
+    alpha: float = 0.7,
+    limit: Optional[int] = None,
+    where: Optional[Dict[str, Any]] = None,
+    query_tokens: Optional[Dict[str, Sequence[str]]] = None,
+    with_ids: bool = False,
+):
+    res = retrieve(
+        manager,
+        queries,
+        n_results=n_results,
+        alpha=alpha,
+        limit=limit,
+        where=where,
+        query_tokens=query_tokens,
+    )
+    if with_ids:
+        return res.ids, res.docs, res.metas, res.scores
+    return res.docs, res.metas, res.scores
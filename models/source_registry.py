@@ -0,0 +1,311 @@
+# models/source_registry.py
+# Danh mục file nguồn trong kho tri thức
+# Chức năng:
+# - Giữ danh sách source → các chunk (id, metadata, preview) theo thứ tự ingest;
+#   KHÔNG giữ nội dung chunk (đã có trong collection) → nội dung đầy đủ đọc theo id
+#   từ collection khi cần (chunk của file được hỏi đích danh, trang quản trị)
+# - Cập nhật khi ingest / xoá file / xoá chunk / reset qua models.corpus.corpus_state
+#   → không cần coll.get(include=["metadatas"]) toàn collection mỗi message
+# - Bộ so khớp nhiều mẫu (Aho-Corasick) trên tên file đã chuẩn hoá
+#   → tìm file được hỏi đích danh trong O(độ dài message)
+# - Tổng hợp theo file (số chunk, tổng token, loại chunk, hash file) cập nhật tăng dần
+#   và preview tính sẵn lúc ingest → trang quản trị phân trang không cần
+#   đọc toàn bộ collection
+
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from models.corpus import corpus_state
+from models.tokenizer import nfc
+
+
+PREVIEW_WORDS = 30
+# Số id mỗi lần đọc nội dung chunk từ collection
+_FETCH_BATCH = 512
+
+
+# Preview ngắn của chunk (30 từ đầu)
+def make_preview(text: str, words: int = PREVIEW_WORDS) -> str:
+    parts = (text or "").split(None, words)
+    preview = " ".join(parts[:words])
+    return preview + " ..." if len(parts) > words else preview
+
+
+class SourceChunk(NamedTuple):
+    meta: Dict[str, Any]
+    preview: str
+    word_count: int
+    chunk_type: str
+
+
+# Tên file dùng để so khớp: NFC + lower, bỏ đuôi .md
+def normalize_source_name(source: str) -> str:
+    return nfc(source).lower().replace(".md", "").strip()
+
+
+class AhoCorasick:
+    # Dựng automaton từ các mẫu
+    # Chức năng:
+    # - patterns: mẫu (chuỗi đã chuẩn hoá) → giá trị trả về khi khớp
+    # - goto dạng list[dict], fail link dựng bằng BFS, output gộp theo fail link
+    def __init__(self, patterns: Dict[str, Any]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+
+        for pattern, value in patterns.items():
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), value))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                fail = self._goto[f].get(ch, 0)
+                self._fail[nxt] = fail if fail != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    # Duyệt text một lần, trả các (vị trí bắt đầu, độ dài, giá trị) khớp
+    def iter_matches(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i - length + 1, length, value
+
+
+class SourceRegistry:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._chunks: Dict[str, Dict[str, SourceChunk]] = {}
+        # source → id theo thứ tự ingest (page() cắt trực tiếp, không duyệt từ đầu)
+        self._order: Dict[str, List[str]] = {}
+        self._id_source: Dict[str, str] = {}
+        # source → {"tokens": tổng token, "types": Counter loại chunk, "file_hash"}
+        self._summary: Dict[str, Dict[str, Any]] = {}
+        self._matcher: Optional[AhoCorasick] = None
+
+    # =========================
+    # ĐỒNG BỘ VỚI COLLECTION
+    # =========================
+
+    def add(
+        self,
+        ids: Sequence[str],
+        docs: Sequence[str],
+        metas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        metas = metas or [None] * len(ids)
+        with self._lock:
+            for key, doc, meta in zip(ids, docs, metas):
+                meta = meta or {}
+                doc = doc or ""
+                source = meta.get("source", "")
+                self._remove_key(key)
+                if source not in self._chunks:
+                    self._matcher = None
+                    self._summary[source] = {
+                        "tokens": 0, "types": Counter(), "file_hash": None,
+                    }
+
+                word_count = meta.get("word_count")
+                if word_count is None:
+                    word_count = len(doc.split())
+                entry = SourceChunk(
+                    meta=meta,
+                    preview=meta.get("preview") or make_preview(doc),
+                    word_count=word_count,
+                    chunk_type=meta.get("chunk_type", "text"),
+                )
+                self._chunks.setdefault(source, {})[key] = entry
+                self._order.setdefault(source, []).append(key)
+                self._id_source[key] = source
+
+                summary = self._summary[source]
+                summary["tokens"] += meta.get("token_count") or word_count
+                summary["types"][entry.chunk_type] += 1
+                summary["file_hash"] = meta.get("file_hash")
+
+    def _remove_key(self, key: str):
+        source = self._id_source.pop(key, None)
+        if source is None:
+            return
+        chunks = self._chunks.get(source)
+        if chunks is None:
+            return
+        entry = chunks.pop(key, None)
+        if entry is not None:
+            self._order[source].remove(key)
+            summary = self._summary[source]
+            summary["tokens"] -= entry.meta.get("token_count") or entry.word_count
+            summary["types"][entry.chunk_type] -= 1
+            if summary["types"][entry.chunk_type] <= 0:
+                del summary["types"][entry.chunk_type]
+        if not chunks:
+            del self._chunks[source]
+            self._order.pop(source, None)
+            self._summary.pop(source, None)
+            self._matcher = None
+
+    def remove_ids(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for key in ids:
+                self._remove_key(key)
+
+    def remove_source(self, source: str) -> None:
+        with self._lock:
+            for key in self._chunks.pop(source, {}):
+                self._id_source.pop(key, None)
+            self._order.pop(source, None)
+            self._summary.pop(source, None)
+            self._matcher = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+            self._order.clear()
+            self._id_source.clear()
+            self._summary.clear()
+            self._matcher = None
+
+    # =========================
+    # TRA CỨU
+    # =========================
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return list(self._chunks)
+
+    def __contains__(self, source: str) -> bool:
+        return source in self._chunks
+
+    def chunk_count(self, source: str) -> int:
+        return len(self._chunks.get(source, ()))
+
+    # Hash toàn file lúc ingest (None nếu file được ghi trước khi có hash)
+    def file_hash(self, source: str) -> Optional[int]:
+        summary = self._summary.get(source)
+        return summary["file_hash"] if summary else None
+
+    # Nội dung chunk theo id, đọc từ collection (theo lô) → {id: nội dung}
+    @staticmethod
+    def _fetch_docs(manager, ids: Sequence[str]) -> Dict[str, str]:
+        coll = manager.get_collection()
+        docs: Dict[str, str] = {}
+        for i in range(0, len(ids), _FETCH_BATCH):
+            data = coll.get(ids=list(ids[i:i + _FETCH_BATCH]), include=["documents"]) or {}
+            docs.update(zip(data.get("ids") or [], data.get("documents") or []))
+        return docs
+
+    # Các chunk của một file (theo thứ tự ingest): list (nội dung, metadata)
+    # Chức năng:
+    # - Metadata lấy từ registry, nội dung đọc từ collection (chạy trên thread
+    #   vector, không gọi trực tiếp trong event loop)
+    def chunks_for(self, source: str, manager) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            items = list(self._chunks.get(source, {}).items())
+        docs = self._fetch_docs(manager, [key for key, _ in items])
+        return [(docs[key], c.meta) for key, c in items if key in docs]
+
+    # Tổng hợp theo file: số chunk, tổng token, số chunk theo loại
+    def summaries(self, exclude: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "source": source,
+                    "chunks": len(chunks),
+                    "tokens": self._summary[source]["tokens"],
+                    "chunk_types": dict(self._summary[source]["types"]),
+                }
+                for source, chunks in self._chunks.items()
+                if source not in exclude
+            ]
+
+    def total_chunks(self, exclude: Sequence[str] = ()) -> int:
+        with self._lock:
+            return sum(
+                len(chunks) for source, chunks in self._chunks.items()
+                if source not in exclude
+            )
+
+    # Một trang chunk của file (id, metadata, preview)
+    # Chức năng:
+    # - Truyền manager → kèm nội dung đầy đủ của các chunk trong trang
+    #   (một lần coll.get theo id, chỉ cho đúng trang này)
+    def page(
+        self,
+        source: str,
+        offset: int = 0,
+        limit: int = 50,
+        manager=None,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            chunks = self._chunks.get(source, {})
+            total = len(chunks)
+            items = []
+            for key in self._order.get(source, [])[offset:offset + limit]:
+                c = chunks[key]
+                item = {
+                    "id": key,
+                    "preview": c.preview,
+                    "title": c.meta.get("title") or "Không có tiêu đề",
+                    "word_count": c.word_count,
+                    "level": c.meta.get("level", 1),
+                    "chunk_type": c.chunk_type,
+                    "token_count": c.meta.get("token_count", 0),
+                }
+                items.append(item)
+        if manager is not None and items:
+            docs = self._fetch_docs(manager, [item["id"] for item in items])
+            for item in items:
+                item["content"] = docs.get(item["id"], "")
+        return {
+            "source": source,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "chunks": items,
+        }
+
+    # Tìm file được hỏi đích danh trong message
+    # Chức năng:
+    # - Automaton dựng lại lười khi danh sách file thay đổi
+    # - Nhiều file khớp → chọn tên dài nhất (cụ thể nhất), hoà thì khớp sớm nhất
+    def match(self, message: str) -> Optional[str]:
+        with self._lock:
+            if self._matcher is None:
+                patterns: Dict[str, str] = {}
+                for source in self._chunks:
+                    patterns.setdefault(normalize_source_name(source), source)
+                self._matcher = AhoCorasick(patterns)
+            matcher = self._matcher
+
+        best = None
+        for start, length, source in matcher.iter_matches(nfc(message).lower()):
+            if best is None or length > best[1] or (length == best[1] and start < best[0]):
+                best = (start, length, source)
+        return best[2] if best else None
+
+
+# Instance dùng chung, được đồng bộ qua models.corpus.corpus_state
+source_registry = SourceRegistry()
+corpus_state.register(source_registry)
@@ -0,0 +1,109 @@
+# models/tokenizer.py
+# Bộ chuẩn hoá + tách từ dùng chung (hỗ trợ tiếng Việt)
+# Chức năng:
+# - Chuẩn hoá Unicode NFC → client gửi tiếng Việt dạng NFD (tổ hợp dấu rời)
+#   vẫn khớp cache và khớp lexical như dạng dựng sẵn
+# - Tuỳ chọn bỏ dấu tiếng Việt (fold) bằng bảng str.translate dựng sẵn
+# - Stopword theo ngôn ngữ
+# - Regex biên dịch sẵn một lần
+# - Dùng chung cho: lexical index (lúc ingest), chuẩn hoá câu hỏi,
+#   soft_match trong build_answer_from_chunks và key của các cache
+
+import re
+import unicodedata
+from typing import Dict, FrozenSet, List, Optional, Set
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+STOPWORDS: Dict[str, FrozenSet[str]] = {
+    "vi": frozenset({
+        "là", "gì", "của", "và", "có", "cho", "với", "các", "những", "được",
+        "thì", "mà", "này", "đó", "để", "trong", "một", "bạn", "mình", "tôi",
+        "em", "anh", "chị", "ạ", "nhé", "ơi", "nhỉ", "vậy", "thế", "nào",
+        "về", "đi", "hả", "à", "ở", "khi", "nếu", "hay", "hoặc", "cũng",
+    }),
+    "en": frozenset({
+        "the", "a", "an", "is", "are", "was", "were", "what", "how", "to",
+        "of", "in", "on", "for", "and", "or", "do", "does", "i", "you", "it",
+        "this", "that", "with", "can", "be", "me", "my", "your", "about",
+    }),
+}
+ALL_STOPWORDS: FrozenSet[str] = frozenset().union(*STOPWORDS.values())
+
+
+# Bảng bỏ dấu tiếng Việt, dựng một lần khi import
+# Chức năng:
+# - Mỗi ký tự Latin có dấu (U+00C0 → U+1EF9) → ký tự gốc không dấu
+# - đ / Đ → d / D
+def _build_fold_table() -> Dict[int, str]:
+    table = {ord("đ"): "d", ord("Đ"): "D"}
+    for cp in range(0x00C0, 0x1EFA):
+        ch = chr(cp)
+        base = "".join(
+            c for c in unicodedata.normalize("NFD", ch)
+            if unicodedata.category(c) != "Mn"
+        )
+        if base and base != ch and base.isascii():
+            table[cp] = base
+    return table
+
+
+_FOLD_TABLE = _build_fold_table()
+_FOLDED_STOPWORDS: Dict[Optional[str], FrozenSet[str]] = {
+    lang: frozenset(w.translate(_FOLD_TABLE) for w in words)
+    for lang, words in list(STOPWORDS.items()) + [(None, ALL_STOPWORDS)]
+}
+
+
+def nfc(text: str) -> str:
+    return unicodedata.normalize("NFC", text or "")
+
+
+def fold_diacritics(text: str) -> str:
+    return nfc(text).translate(_FOLD_TABLE)
+
+
+# Chuẩn hoá dùng làm key cache
+# Chức năng:
+# - NFC + lower + gộp khoảng trắng (giữ nguyên dấu câu)
+def normalize_key(text: str) -> str:
+    return _SPACE_RE.sub(" ", nfc(text).lower()).strip()
+
+
+# Chuẩn hoá câu hỏi trước khi truy vấn
+# Chức năng:
+# - NFC, thay dấu câu bằng khoảng trắng, gộp khoảng trắng (giữ hoa / thường)
+def normalize_text(text: str, fold: bool = False) -> str:
+    text = nfc(text)
+    if fold:
+        text = text.translate(_FOLD_TABLE)
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+# Tách từ
+# Chức năng:
+# - normalize_text + lower, tách theo khoảng trắng
+# - Bỏ token ngắn hơn min_len
+# - Bỏ stopword của lang (lang=None → mọi ngôn ngữ) nếu drop_stopwords
+def tokenize(
+    text: str,
+    lang: Optional[str] = None,
+    fold: bool = False,
+    drop_stopwords: bool = True,
+    min_len: int = 2,
+) -> List[str]:
+    tokens = normalize_text(text, fold=fold).lower().split()
+    if drop_stopwords:
+        if fold:
+            stop = _FOLDED_STOPWORDS.get(lang, _FOLDED_STOPWORDS[None])
+        else:
+            stop = STOPWORDS.get(lang, ALL_STOPWORDS)
+        return [t for t in tokens if len(t) >= min_len and t not in stop]
+    return [t for t in tokens if len(t) >= min_len]
+
+
+def token_set(text: str, lang: Optional[str] = None, fold: bool = False) -> Set[str]:
+    return set(tokenize(text, lang=lang, fold=fold))
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, Request, Form, File, UploadFile, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List, Dict
+import asyncio
 import jwt
 from datetime import datetime, timedelta
 from config.config import settings
 from middleware.limiter import limiter
 from services.chat_service import process_chat_message
-from models.db import load_latest_summary
-from models.vector_store import SESSION_MEMORY
+from services.resources import resources
+from services.warmup import warmup
 
 
 # Khởi tạo router cho API v1
@@ -144,6 +146,8 @@ async def api_chat_summary(
     # Vì ChatService đang dùng:
     # user_id = session_id
     # save_conversation_summary(user_id, session_id, summary)
+    from models.db import load_latest_summary
+
     summary = load_latest_summary(session_id, session_id)
 
     return SummaryResponse(
@@ -161,6 +165,8 @@ async def api_chat_session_state(
     session_id: str,
     token=Depends(verify_token),
 ):
+    from models.vector_store import SESSION_MEMORY
+
     session = SESSION_MEMORY.get(session_id, {})
 
     return SessionStateResponse(
@@ -208,6 +214,23 @@ async def health():
     }
 
 
+# Readiness: 200 khi các bước làm nóng bắt buộc đã xong (bước phụ lỗi → "degraded")
+@router.get("/ready")
+async def ready():
+    snapshot = warmup.snapshot()
+    snapshot["timestamp"] = datetime.now().isoformat()
+    return JSONResponse(snapshot, status_code=200 if warmup.ready else 503)
+
+
+# Báo cáo bộ nhớ theo tài nguyên dùng chung (RSS lúc mở + số liệu từng thành phần)
+@router.get("/resources")
+@limiter.limit(settings.API_RATE_ADMIN)
+async def resource_report(request: Request, token=Depends(verify_token)):
+    report = await asyncio.to_thread(resources.memory_report)
+    report["timestamp"] = datetime.now().isoformat()
+    return report
+
+
 # =========================
 # ROUTER REGISTRATION
 # =========================
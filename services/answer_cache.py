@@ -0,0 +1,68 @@
+# services/answer_cache.py
+# Cache câu trả lời cuối cùng của knowledge flow
+# Chức năng:
+# - Key = (câu hỏi đã chuẩn hoá, ngôn ngữ, generation của corpus)
+# - LRU + TTL (cachetools.TTLCache), giới hạn theo số phần tử
+# - Đếm hit / miss để theo dõi hiệu quả cache
+# - Corpus đổi generation → key cũ không còn được dùng, tự bị đẩy ra
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from cachetools import TTLCache
+
+from config.config import settings
+from models.corpus import corpus_state
+from models.tokenizer import normalize_key
+
+
+class AnswerCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Tạo key cache
+    # Chức năng:
+    # - Chuẩn hoá câu hỏi (NFC + lower + gộp khoảng trắng)
+    # - Gắn ngôn ngữ và generation hiện tại của corpus
+    def make_key(self, query: str, lang: str) -> Tuple[str, str, int]:
+        return normalize_key(query), lang, corpus_state.generation
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: Tuple[str, str, int], value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    # Thống kê hiệu quả cache
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "ttl": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "generation": corpus_state.generation,
+        }
+
+
+# Instance dùng chung cho ChatService
+answer_cache = AnswerCache(
+    maxsize=settings.ANSWER_CACHE_SIZE,
+    ttl=settings.ANSWER_CACHE_TTL,
+)
@@ -1,15 +1,15 @@
 # services/base_service.py
 # Base service cho toàn bộ các service trong hệ thống
 # Chức năng:
-# - Gom các dependency dùng chung (vector store, database)
+# - Gom các dependency dùng chung (vector store, database) từ container
+#   services.resources (không tự tạo client riêng)
 # - Chuẩn hoá cách logging cho các service
 # - Giảm lặp code khi tạo service mới
 
 import logging
 from abc import ABC
 
-from models.vector_store import VectorStoreManager
-from models.db import DatabaseManager
+from services.resources import resources as shared_resources
 
 
 class BaseService(ABC):
@@ -21,16 +21,12 @@ class BaseService(ABC):
     - Làm nền tảng để các service khác kế thừa
     """
 
-    def __init__(self):
-        # Khởi tạo vector store manager
+    def __init__(self, resources=None):
+        # Container tài nguyên dùng chung
         # Chức năng:
-        # - Dùng để query, ingest dữ liệu dạng vector
-        self.vector = VectorStoreManager()
-
-        # Khởi tạo database manager
-        # Chức năng:
-        # - Lưu log hội thoại, cấu hình, metadata
-        self.db = DatabaseManager()
+        # - Cung cấp vector store / database (một bản cho cả ứng dụng)
+        # - Truyền vào khi test hoặc khi cần container khác
+        self.resources = resources or shared_resources
 
         # Khởi tạo logger riêng cho từng service
         # Chức năng:
@@ -51,6 +47,20 @@ class BaseService(ABC):
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
 
+    # Vector store manager dùng chung
+    # Chức năng:
+    # - Dùng để query, ingest dữ liệu dạng vector
+    @property
+    def vector(self):
+        return self.resources.vector
+
+    # Database manager dùng chung
+    # Chức năng:
+    # - Lưu log hội thoại, cấu hình, metadata
+    @property
+    def db(self):
+        return self.resources.db
+
     # Ghi log mức INFO
     # Chức năng:
     # - Dùng cho các sự kiện xử lý bình thường
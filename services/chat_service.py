@@ -28,16 +28,21 @@ import os
 import re
 
 from services.intent_registry import intent_registry
-from config.quick_reply import QuickReplyHandler
-from models.vector_store import VectorStoreManager, SESSION_MEMORY
-from models.db import (
-    save_message,
-    save_conversation_summary,
-    load_latest_summary,
-    load_messages
+from config.config import settings
+from config import quick_reply
+from models.lexical_index import lexical_index
+from models.corpus import corpus_state
+from models.qa_index import qa_index
+from models.chunk_catalog import (
+    chunk_catalog,
+    best_answer,
+    extract_answer_text,
+    is_answerable,
 )
+from models.tokenizer import nfc, normalize_text, token_set
+from services.answer_cache import answer_cache
 from middleware.badword_filter import contains_swear, get_swear_response
-from models.gemini_analyzer import analyze_question, translate_text
+from services.resources import resources as shared_resources
 
 
 LOG_DIR = "log"
@@ -70,6 +75,8 @@ SUMMARY_MIN_TURNS = 10
 
 
 async def summarize_session(session_id: str) -> str:
+    from models.db import load_messages
+
     messages = load_messages(session_id, limit=50)
     if not messages:
         return ""
@@ -186,6 +193,15 @@ PRODUCT_KEYWORDS = {
     "ru": ["hidemium", "hidemium api"],
 }
 
+# Các câu mở rộng cố định cho câu hỏi về Hidemium
+HIDEMIUM_EXPANSION_QUERIES = [
+    "Hidemium API là gì",
+    "Hidemium là gì",
+    "dịch vụ Hidemium API",
+    "tính năng Hidemium API",
+    "cách sử dụng Hidemium",
+]
+
 
 def detect_language(text: str) -> str:
     if re.search(r'[\u4e00-\u9fff]', text):
@@ -235,55 +251,43 @@ def is_valid_chunk(text: str) -> bool:
 def build_answer_from_chunks(
     docs: List[str],
     query: Optional[str] = None,
-    max_chars: int = 800
+    max_chars: int = 800,
+    query_tokens: Optional[List[str]] = None,
+    doc_tokens: Optional[List[Optional[frozenset]]] = None,
 ) -> str:
+    # doc_tokens: token set của từng chunk đã tách lúc ingest (song song với docs)
+    doc_tokens = doc_tokens or [None] * len(docs)
+
     valid_docs = []
-    for d in docs:
-        if not d:
+    valid_tokens = []
+    for d, toks in zip(docs, doc_tokens):
+        if not d or not is_answerable(d):
             continue
-        d = d.strip()
-        if len(d) < 15:
-            continue
-        if d in {"--", "-", "...", "---"}:
-            continue
-        valid_docs.append(d)
+        valid_docs.append(d.strip())
+        valid_tokens.append(toks)
 
     if not valid_docs:
         return ""
 
     best_docs = valid_docs
 
-    if query:
-        q = query.lower()
-        q = re.sub(r"[^\w\sÀ-ỹ]", " ", q)
-        q = re.sub(r"\s+", " ", q).strip()
-
-        tokens = [t for t in q.split() if len(t) > 2]
+    if query or query_tokens:
+        tokens = set(query_tokens if query_tokens is not None else lexical_index.analyze(query))
 
-        def soft_match(doc: str) -> bool:
-            dl = doc.lower()
-            hit = sum(1 for t in tokens if t in dl)
+        def soft_match(doc: str, toks: Optional[frozenset]) -> bool:
+            if toks is None:
+                toks = token_set(doc, fold=lexical_index.fold)
+            hit = len(tokens & toks)
             return hit >= max(1, len(tokens) // 3)
 
-        matched = [d for d in valid_docs if soft_match(d)]
+        matched = [
+            d for d, toks in zip(valid_docs, valid_tokens)
+            if soft_match(d, toks)
+        ]
         if matched:
             best_docs = matched
 
-    text = best_docs[0]
-
-    match = re.search(r"\*\*?A:\*\*?\s*(.+)", text, re.DOTALL | re.IGNORECASE)
-    extracted = match.group(1).strip() if match else text.strip()
-
-    extracted = re.sub(r"^#+\s*", "", extracted)
-    extracted = re.sub(r"(?m)^\s*#+\s*", "", extracted)
-    extracted = re.sub(r"###\s*MỤC:.*", "", extracted, flags=re.IGNORECASE)
-    extracted = re.sub(r"MỤC:\s*[^\n]+", "", extracted, flags=re.IGNORECASE)
-    extracted = re.sub(r"\*\*?Q:\*\*?\s*.*", "", extracted, flags=re.IGNORECASE)
-    extracted = re.sub(r"\*\*(.*?)\*\*", r"\1", extracted)
-    extracted = re.sub(r"(?m)^\s*-{3,}\s*$", "", extracted)
-    extracted = re.sub(r"(?m)^\s*-\s*", "• ", extracted)
-    extracted = re.sub(r"\n{3,}", "\n\n", extracted)
-    extracted = extracted.strip()
+    extracted = extract_answer_text(best_docs[0])
 
     return extracted[:max_chars].strip()
 
@@ -302,7 +306,14 @@ def wrap_cskh_answer(answer: str, lang: str) -> str:
     return f"{answer} {suffixes.get(lang, suffixes['en'])}"
 
 
-def build_alternative_answer(docs: List[str], lang: str) -> str:
+def build_alternative_answer(
+    docs: List[str],
+    lang: str,
+    answers: Optional[List[Optional[str]]] = None
+) -> str:
+    # answers: câu trả lời đã trích sẵn lúc ingest (song song với docs)
+    answers = answers or [None] * len(docs)
+
     prefixes = {
         "vi": "Có thể mình đã hiểu chưa đúng trường hợp của bạn.\nTrong tài liệu hiện có, mình thấy các thông tin sau:\n",
         "en": "Maybe I didn't understand your case correctly.\nIn the current documentation, I found the following:\n",
@@ -312,8 +323,8 @@ def build_alternative_answer(docs: List[str], lang: str) -> str:
 
     text = prefixes.get(lang, prefixes["en"])
 
-    for i, d in enumerate(docs[:3]):
-        summary_vi = build_answer_from_chunks([d])
+    for i, (d, pre) in enumerate(zip(docs[:3], answers[:3])):
+        summary_vi = pre[:800].strip() if pre is not None else build_answer_from_chunks([d])
         summary = translate_from_vi(summary_vi, lang)
         label = chr(65 + i)
         text += f"• Trường hợp {label}: {summary}\n" if lang == "vi" else f"• Case {label}: {summary}\n"
@@ -335,20 +346,41 @@ def build_alternative_answer(docs: List[str], lang: str) -> str:
 
 class ChatService:
 
-    def __init__(self):
-        self.vector = VectorStoreManager()
-        self.quick_reply = QuickReplyHandler()
+    # Vector store / facade async lấy từ container dùng chung (services.resources),
+    # không tự tạo client riêng
+    def __init__(self, resources=None):
+        self.resources = resources or shared_resources
+
+    @property
+    def vector(self):
+        return self.resources.vector
+
+    @property
+    def async_vector(self):
+        return self.resources.async_vector
+
+    @property
+    def quick_reply(self):
+        return quick_reply._handler()
 
     async def process_chat_message(
         self,
         message: str,
         session_id: str = "default"
     ) -> Dict[str, Any]:
+        from models.db import (
+            save_message,
+            save_conversation_summary,
+            load_latest_summary,
+            load_messages
+        )
+        from models.gemini_analyzer import analyze_question
+        from models.vector_store import SESSION_MEMORY
 
         pipeline_logger.info("=" * 80)
         pipeline_logger.info(f"[INPUT] {message}")
 
-        message = message.strip()
+        message = nfc(message.strip())
         if not message:
             return {"response": "Please say something 😅"}
 
@@ -491,6 +523,9 @@ class ChatService:
         session_id: str
     ) -> Dict[str, Any]:
 
+        from models.db import save_message
+        from models.gemini_analyzer import translate_text
+
         support_state["phase"] = "answering"
 
         user_lang = support_state["language"]
@@ -542,8 +577,9 @@ class ChatService:
         # =========================
         # NORMALIZE QUERY
         # =========================
-        query_vi = re.sub(r"[^\w\sÀ-ỹ]", " ", query_vi)
-        query_vi = re.sub(r"\s+", " ", query_vi).strip()
+        query_vi = normalize_text(query_vi)
+        # Tách từ MỘT lần / message, dùng lại cho retrieval và soft_match
+        query_tokens = lexical_index.analyze(query_vi)
         log_flow("query_normalized", {
             "query_vi": query_vi
         })
@@ -585,64 +621,39 @@ class ChatService:
                 })
 
 
-        docs = []
-        metas = []
-
-        if "hidemium" in query_vi.lower():
-            expanded_queries = [
-                query_vi,
-                "Hidemium API là gì",
-                "Hidemium là gì",
-                "dịch vụ Hidemium API",
-                "tính năng Hidemium API",
-                "cách sử dụng Hidemium",
-            ]
-
-            all_docs = []
-            all_metas = []
-
-            for q in expanded_queries:
-                d, m, _ = self.vector.query_documents(
-                    query=q, user_id=session_id, n_results=15
-                )
-                all_docs.extend(d)
-                all_metas.extend(m)
-
-            seen = set()
-            docs = []
-            metas = []
-
-            for d, m in zip(all_docs, all_metas):
-                key = d[:120]
-                if key in seen:
-                    continue
-                seen.add(key)
-                docs.append(d)
-                metas.append(m)
-
-            docs = docs[:40]
-            metas = metas[:40]
+        # =========================
+        # ANSWER CACHE
+        # =========================
+        cache_key = answer_cache.make_key(query_vi, user_lang)
+        cached = answer_cache.get(cache_key)
+        if cached:
+            answer_vi, answer = cached
+            support_state["last_answer"] = answer_vi
+            log_flow("answer_cache_hit", {
+                "query": query_vi,
+                "generation": cache_key[2]
+            })
+            save_message("bot", answer, session_id)
+            return {"response": answer, "mode": "knowledge"}
 
-            log_flow("query_expansion", {
-                "original": query_vi,
-                "expanded_count": len(expanded_queries)
+        # =========================
+        # FAQ LOOKUP (không embed, không Chroma)
+        # =========================
+        qa_match = await self._qa_lookup(query_vi)
+        if qa_match:
+            answer_vi = qa_match.entry.answer
+            retrieval_ok = True
+            log_flow("qa_index_hit", {
+                "question": qa_match.entry.question,
+                "score": round(qa_match.score, 3),
+                "exact": qa_match.exact,
+                "source": qa_match.entry.source
             })
         else:
-            docs, metas, _ = self.vector.query_documents(
-                query=query_vi, user_id=session_id, n_results=20
+            answer_vi, retrieval_ok = await self._answer_from_corpus(
+                query_vi, query_tokens, session_id
             )
 
-        log_flow("rag_docs_debug", {
-            "query": query_vi,
-            "doc_count": len(docs),
-            "sources": list({
-                m.get("source") for m in metas if m and m.get("source")
-            }),
-            "doc_previews": [d[:120] for d in docs[:5]]
-        })
-
-        answer_vi = build_answer_from_chunks(docs, query_vi)
-
         if not answer_vi or len(answer_vi.strip()) < 30:
             if "hidemium" in query_vi.lower():
                 answer_vi = (
@@ -671,12 +682,103 @@ class ChatService:
             )
 
         answer = wrap_cskh_answer(answer, user_lang)
+        if retrieval_ok:
+            answer_cache.set(cache_key, (answer_vi, answer))
 
         log_flow("rag_response", {"answer_preview": answer[:150]})
         save_message("bot", answer, session_id)
 
         return {"response": answer, "mode": "knowledge"}
 
+    # Tra FAQ bằng câu đã dịch + chuẩn hoá (query_vi), không chặn event loop
+    async def _qa_lookup(self, query_vi: str):
+        # Lần đầu cần nạp corpus vào chỉ mục → chạy trên executor vector
+        if corpus_state.loaded:
+            return await asyncio.to_thread(qa_index.lookup, query_vi)
+
+        def lookup():
+            corpus_state.ensure_loaded(self.vector)
+            return qa_index.lookup(query_vi)
+
+        try:
+            return await self.async_vector.run("qa_lookup", lookup)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _answer_from_corpus(
+        self,
+        query_vi: str,
+        query_tokens: List[str],
+        session_id: str
+    ):
+        ids = []
+        docs = []
+        metas = []
+        retrieval_ok = True
+
+        try:
+            ids, docs, metas = await self._retrieve(
+                query_vi, query_tokens, session_id
+            )
+        except asyncio.TimeoutError:
+            retrieval_ok = False
+            log_flow("rag_retrieval_timeout", {"query": query_vi})
+
+        log_flow("rag_docs_debug", {
+            "query": query_vi,
+            "doc_count": len(docs),
+            "sources": list({
+                m.get("source") for m in metas if m and m.get("source")
+            }),
+            "doc_previews": [d[:120] for d in docs[:5]]
+        })
+
+        # Token set + câu trả lời của chunk đã tính sẵn lúc ingest
+        doc_tokens = [lexical_index.tokens_for(cid) for cid in ids]
+        answer_vi = best_answer(
+            chunk_catalog.get_many(ids), doc_tokens, query_tokens
+        )
+        if answer_vi is None:
+            answer_vi = build_answer_from_chunks(
+                docs, query_vi, query_tokens=query_tokens, doc_tokens=doc_tokens
+            )
+
+        return answer_vi, retrieval_ok
+
+    async def _retrieve(self, query_vi: str, query_tokens: List[str], session_id: str):
+        tokens = {query_vi: query_tokens}
+
+        if "hidemium" in query_vi.lower():
+            # Câu gốc trước: vector khớp đủ chắc chắn → bỏ qua các câu mở rộng
+            primary = await self.async_vector.retrieve(
+                [query_vi], n_results=15, limit=40, query_tokens=tokens
+            )
+            if primary.top_similarity >= settings.RETRIEVAL_EARLY_EXIT_SCORE:
+                log_flow("query_expansion_skipped", {
+                    "original": query_vi,
+                    "top_similarity": round(primary.top_similarity, 4)
+                })
+                return primary.ids, primary.docs, primary.metas
+
+            # Một lần embed + một request Chroma cho các câu mở rộng; kết quả câu
+            # gốc đã có (primary) được gộp vào, không query lại câu gốc
+            result = await self.async_vector.retrieve(
+                HIDEMIUM_EXPANSION_QUERIES, n_results=15, limit=40, base=primary
+            )
+
+            log_flow("query_expansion", {
+                "original": query_vi,
+                "expanded_count": len(HIDEMIUM_EXPANSION_QUERIES),
+                "top_similarity": round(primary.top_similarity, 4)
+            })
+        else:
+            # Đi qua micro-batcher: embed chung batch với các chat đồng thời
+            result = await self.async_vector.retrieve(
+                [query_vi], n_results=20, query_tokens=tokens
+            )
+
+        return result.ids, result.docs, result.metas
+
     async def handle_deny(self, support_state: Dict[str, Any]) -> str:
 
         support_state["phase"] = "handling_deny"
@@ -717,10 +819,12 @@ class ChatService:
 
         if support_state["deny_count"] == 2 and last_query_vi:
             rephrased = last_query_vi + " các trường hợp"
-            docs, _, _ = self.vector.query_documents(
-                query=rephrased, user_id="deny", n_results=50
-                
-            )
+            try:
+                ids, docs, _, _ = await self.async_vector.query_documents_batch(
+                    [rephrased], n_results=50, with_ids=True
+                )
+            except asyncio.TimeoutError:
+                ids, docs = [], []
             
             
             
@@ -776,7 +880,13 @@ class ChatService:
 
                 return text + question
 
-            return build_alternative_answer(docs, lang)
+            # Chunk không đủ nội dung → "" (giống build_answer_from_chunks),
+            # chưa có trong catalog → None (tự trích lại)
+            answers = [
+                (info.answer if info.valid else "") if info else None
+                for info in chunk_catalog.get_many(ids)
+            ]
+            return build_alternative_answer(docs, lang, answers)
 
         if not last_query_vi:
             return {
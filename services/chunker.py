@@ -0,0 +1,347 @@
+# services/chunker.py
+# Chia tài liệu markdown thành chunk theo cấu trúc và theo token (thay split_text)
+# Chức năng:
+# - Đọc dạng luồng: block text → dòng → đoạn (segment) giới hạn kích thước,
+#   mỗi đoạn cắt tại dòng trống ngoài code fence rồi parse bằng markdown-it
+# - Không cắt ngang heading / paragraph / list / code / table; cặp Q/A giữ trọn
+# - Heading kết thúc chunk đang gom; mọi chunk của một mục mang dòng heading ở đầu
+# - Kích thước đo bằng token của tokenizer model embedding (HF tokenizers, fast);
+#   không có tokenizer → ước lượng bằng regex
+# - Mỗi chunk kèm title, heading_level, token_count, chunk_type
+
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import config
+from models import lazy_deps
+
+logger = logging.getLogger("chunker")
+
+# Token đặc biệt model thêm vào mỗi câu ([CLS] / [SEP]); count_many không tính chúng
+_SPECIAL_TOKENS = 2
+
+# Kích thước tối thiểu một đoạn trước khi parse (ký tự)
+SEGMENT_CHARS = 64 * 1024
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_QA_START_RE = re.compile(r"^\s*\*{0,2}Q\s*:", re.IGNORECASE)
+_REGEX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Token block cấp 0 của markdown-it → loại khối
+_BLOCK_TYPES = {
+    "heading_open": "heading",
+    "paragraph_open": "paragraph",
+    "bullet_list_open": "list",
+    "ordered_list_open": "list",
+    "blockquote_open": "quote",
+    "table_open": "table",
+    "fence": "code",
+    "code_block": "code",
+    "html_block": "html",
+}
+
+
+class Chunk(NamedTuple):
+    text: str
+    title: str
+    heading_level: int
+    token_count: int
+    chunk_type: str
+
+
+# =========================
+# TOKENIZER
+# =========================
+
+class _HFTokenizer:
+    def __init__(self, tok):
+        tok.no_truncation()
+        tok.no_padding()
+        self._tok = tok
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        return [len(e.ids) for e in self._tok.encode_batch(texts, add_special_tokens=False)]
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        return self._tok.encode(text, add_special_tokens=False).offsets
+
+
+class _RegexTokenizer:
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [len(_REGEX_TOKEN_RE.findall(t)) for t in texts]
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        return [m.span() for m in _REGEX_TOKEN_RE.finditer(text)]
+
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+def _tokenizer_path() -> Optional[Path]:
+    if config.settings.CHUNK_TOKENIZER:
+        return Path(config.settings.CHUNK_TOKENIZER)
+    try:
+        ONNXMiniLM_L6_V2 = lazy_deps.onnx_minilm()
+    except ImportError:
+        return None
+    return Path(ONNXMiniLM_L6_V2.DOWNLOAD_PATH) / ONNXMiniLM_L6_V2.EXTRACTED_FOLDER_NAME / "tokenizer.json"
+
+
+# Tokenizer dùng chung (cùng vocab với model embedding của collection)
+def get_tokenizer():
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            path = _tokenizer_path()
+            try:
+                Tokenizer = lazy_deps.tokenizers().Tokenizer
+                _tokenizer = _HFTokenizer(Tokenizer.from_file(str(path)))
+                logger.info(f"[CHUNKER] tokenizer: {path}")
+            except Exception as e:
+                _tokenizer = _RegexTokenizer()
+                logger.warning(f"[CHUNKER] tokenizer unavailable ({path}): {e}; using regex estimate")
+        return _tokenizer
+
+
+# =========================
+# LUỒNG TEXT → ĐOẠN MARKDOWN
+# =========================
+
+def _iter_lines(blocks: Iterable[str]) -> Iterator[str]:
+    carry = ""
+    for block in blocks:
+        lines = (carry + block).splitlines(keepends=True)
+        carry = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        yield from lines
+    if carry:
+        yield carry
+
+
+# Gom dòng thành đoạn ≥ SEGMENT_CHARS, chỉ cắt tại dòng trống ngoài code fence
+def _iter_segments(blocks: Iterable[str]) -> Iterator[List[str]]:
+    lines: List[str] = []
+    size = 0
+    fence = None
+    for line in _iter_lines(blocks):
+        m = _FENCE_RE.match(line)
+        if m:
+            mark = m.group(1)
+            if fence is None:
+                fence = mark
+            elif mark[0] == fence[0] and len(mark) >= len(fence):
+                fence = None
+        lines.append(line)
+        size += len(line)
+        if size >= SEGMENT_CHARS and fence is None and not line.strip():
+            yield lines
+            lines, size = [], 0
+    if lines:
+        yield lines
+
+
+# Khối cấp 0 của một đoạn: (loại, text, heading level)
+def _iter_blocks(md, lines: List[str]) -> Iterator[Tuple[str, str, int]]:
+    tokens = md.parse("".join(lines))
+    for i, tok in enumerate(tokens):
+        kind = _BLOCK_TYPES.get(tok.type)
+        if kind is None or tok.level != 0 or tok.map is None:
+            continue
+        start, end = tok.map
+        if kind == "heading":
+            yield kind, tokens[i + 1].content.strip(), int(tok.tag[1])
+        else:
+            text = "".join(lines[start:end]).strip()
+            if text:
+                yield kind, text, 0
+
+
+# =========================
+# GOM KHỐI → CHUNK
+# =========================
+
+class _Packer:
+    def __init__(self, tokenizer, max_tokens: int, overlap_tokens: int):
+        self.tok = tokenizer
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens - 1))
+        self.title = ""
+        self.heading_level = 0
+        self.prefix = ""
+        self.prefix_tokens = 0
+        self.units: List[Tuple[str, int, bool]] = []  # (text, tokens, is_qa)
+        self.used = 0
+        # Có khối mới từ lần emit trước (không chỉ còn phần overlap)
+        self.fresh = False
+
+    @property
+    def budget(self) -> int:
+        return max(1, self.max_tokens - self.prefix_tokens)
+
+    def heading(self, title: str, level: int) -> Iterator[Chunk]:
+        yield from self.flush()
+        self.title = title
+        self.heading_level = level
+        self.prefix = f"{'#' * level} {title}"
+        self.prefix_tokens = self.tok.count_many([self.prefix])[0]
+
+    def _chunk(self, body: str, tokens: int, is_qa: bool) -> Chunk:
+        text = f"{self.prefix}\n\n{body}" if self.prefix else body
+        return Chunk(
+            text=text,
+            title=self.title,
+            heading_level=self.heading_level,
+            token_count=tokens + self.prefix_tokens,
+            chunk_type="qa" if is_qa else "text",
+        )
+
+    def _emit(self) -> Chunk:
+        chunk = self._chunk(
+            "\n\n".join(u[0] for u in self.units),
+            self.used,
+            any(u[2] for u in self.units),
+        )
+        # Overlap: giữ các khối văn bản trọn vẹn ở cuối (không mang Q/A sang chunk sau)
+        tail: List[Tuple[str, int, bool]] = []
+        used = 0
+        for unit in reversed(self.units):
+            if unit[2] or used + unit[1] > self.overlap_tokens:
+                break
+            tail.insert(0, unit)
+            used += unit[1]
+        self.units, self.used = tail, used
+        self.fresh = False
+        return chunk
+
+    def flush(self) -> Iterator[Chunk]:
+        if self.fresh:
+            yield self._chunk(
+                "\n\n".join(u[0] for u in self.units),
+                self.used,
+                any(u[2] for u in self.units),
+            )
+        self.units, self.used = [], 0
+        self.fresh = False
+
+    def add(self, text: str, tokens: int, is_qa: bool = False) -> Iterator[Chunk]:
+        if tokens > self.budget:
+            yield from self.flush()
+            yield from self._split(text, is_qa)
+            return
+        if self.used + tokens > self.budget and self.units:
+            yield self._emit()
+            # Overlap cộng khối mới vượt budget → bỏ overlap
+            if self.used + tokens > self.budget:
+                self.units, self.used = [], 0
+        self.units.append((text, tokens, is_qa))
+        self.used += tokens
+        self.fresh = True
+
+    # Khối lớn hơn budget: cắt theo cửa sổ token (vị trí ký tự từ tokenizer),
+    # mép cửa sổ lùi / tiến về ranh giới từ để không cắt giữa một từ
+    def _split(self, text: str, is_qa: bool) -> Iterator[Chunk]:
+        spans = self.tok.spans(text)
+        n = len(spans)
+        size = self.budget
+
+        def word_start(k: int) -> bool:
+            return k >= n or spans[k][0] == 0 or text[spans[k][0] - 1].isspace()
+
+        i = 0
+        while i < n:
+            end = min(i + size, n)
+            cut = end
+            while cut > i + 1 and not word_start(cut):
+                cut -= 1
+            if cut == i + 1 and not word_start(cut):
+                cut = end
+            yield self._chunk(text[spans[i][0]:spans[cut - 1][1]], cut - i, is_qa)
+            if cut >= n:
+                break
+            nxt = max(cut - self.overlap_tokens, i + 1)
+            while nxt < cut and not word_start(nxt):
+                nxt += 1
+            i = nxt
+
+
+# Kích thước chunk không vượt giới hạn input của model embedding
+# (MiniLM cắt ở 256 token kể cả [CLS]/[SEP] → phần vượt quá không bao giờ được embed)
+def embed_token_limit(max_tokens: int) -> int:
+    model_limit = config.settings.EMBEDDING_MAX_TOKENS
+    if max_tokens > model_limit:
+        logger.warning(
+            f"[CHUNKER] chunk size {max_tokens} > embedding model limit {model_limit} tokens, clamped"
+        )
+    return min(max_tokens, model_limit - _SPECIAL_TOKENS)
+
+
+# Chia chunk markdown từ một luồng text
+# Chức năng:
+# - blocks: các mảnh text liên tiếp (vd. models.ingest.iter_text)
+# - max_tokens / overlap_tokens: mặc định settings.CHUNK_SIZE / CHUNK_OVERLAP (token),
+#   luôn bị giới hạn bởi embed_token_limit
+# - Cặp Q/A: paragraph mở đầu bằng "Q:" cùng các khối sau nó tới Q / heading kế tiếp
+def iter_markdown_chunks(
+    blocks: Iterable[str],
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+    tokenizer=None,
+) -> Iterator[Chunk]:
+    tok = tokenizer or get_tokenizer()
+    packer = _Packer(
+        tok,
+        embed_token_limit(max_tokens or config.settings.CHUNK_SIZE),
+        config.settings.CHUNK_OVERLAP if overlap_tokens is None else overlap_tokens,
+    )
+    # Chỉ cần cấu trúc khối → bỏ bước parse inline (nội dung heading vẫn có sẵn)
+    md = lazy_deps.markdown_it().MarkdownIt("commonmark").enable("table").disable(["inline", "text_join"])
+    qa: List[str] = []
+    qa_tokens = 0
+
+    def close_qa() -> Iterator[Chunk]:
+        nonlocal qa_tokens
+        if qa:
+            text = "\n\n".join(qa)
+            tokens = qa_tokens
+            qa.clear()
+            qa_tokens = 0
+            yield from packer.add(text, tokens, is_qa=True)
+
+    for lines in _iter_segments(blocks):
+        parsed = list(_iter_blocks(md, lines))
+        counts = iter(tok.count_many([text for kind, text, _ in parsed if kind != "heading"]))
+        for kind, text, level in parsed:
+            if kind == "heading":
+                yield from close_qa()
+                yield from packer.heading(text, level)
+                continue
+            tokens = next(counts)
+            if kind == "paragraph" and _QA_START_RE.match(text):
+                yield from close_qa()
+                qa.append(text)
+                qa_tokens += tokens
+            elif qa:
+                # Câu trả lời quá dài → đóng nhóm tại ranh giới khối, phần sau thành nhóm tiếp
+                if qa_tokens + tokens > packer.budget:
+                    yield from close_qa()
+                qa.append(text)
+                qa_tokens += tokens
+            else:
+                yield from packer.add(text, tokens)
+
+    yield from close_qa()
+    yield from packer.flush()
+
+
+# Chia một văn bản đã nằm trong bộ nhớ
+def split_markdown(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+) -> List[Chunk]:
+    return list(iter_markdown_chunks([text], max_tokens, overlap_tokens))
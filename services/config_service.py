@@ -4,13 +4,16 @@
 # - Cập nhật các tham số xử lý văn bản (chunk size, overlap)
 # - Lưu system prompt (bot rules)
 # - Quyết định có cần re-ingest dữ liệu hay không
-# - Thực hiện re-ingest toàn bộ tài liệu khi cần
+# - Thực hiện re-ingest toàn bộ tài liệu khi cần (job nền)
 
 from fastapi.responses import JSONResponse
 
 from config import config
 from services.base_service import BaseService
-from services.utils import split_text
+from models.corpus import corpus_state
+from models.ingest import hash_file, ingest_file
+from services.prompt_cache import prompt_cache
+from services.ingest_jobs import ingest_worker
 
 
 class ConfigService(BaseService):
@@ -40,6 +43,7 @@ class ConfigService(BaseService):
 
         # Cập nhật system prompt cho chatbot
         self.db.set_system_prompt(bot_rules)
+        prompt_cache.invalidate("config update")
 
         # Xác định có cần re-ingest hay không
         need_reingest = (
@@ -49,41 +53,72 @@ class ConfigService(BaseService):
 
         msg = "Lưu cấu hình thành công!"
 
-        # Thực hiện re-ingest nếu cần và có dữ liệu upload
+        job_id = None
+
+        # Re-ingest nếu cần và có dữ liệu upload → chạy nền qua job ingest
         if need_reingest and list(config.settings.UPLOAD_DIR.glob("*.md")):
-            self.log_info("Bắt đầu re-ingest do thay đổi chunk size/overlap")
-
-            # Reset toàn bộ vector store trước khi ingest lại
-            self.vector.reset_vectorstore()
-
-            total_files = 0
-            total_chunks = 0
-
-            # Duyệt lại toàn bộ file đã upload
-            for fp in config.settings.UPLOAD_DIR.glob("*.md"):
-                text = fp.read_text(encoding="utf-8")
-
-                # Chia nhỏ nội dung theo chunk size và overlap mới
-                chunks = split_text(text, chunk_size, chunk_overlap)
-
-                if chunks:
-                    # Đưa các chunk mới vào vector store
-                    self.vector.query_documents(
-                        "\n\n".join(chunks),
-                        fp.name
-                    )
-                    total_files += 1
-                    total_chunks += len(chunks)
-
-            msg = f"RE-INGEST HOÀN TẤT! {total_files} file → {total_chunks} chunks"
-            self.log_info(
-                "Re-ingest hoàn tất",
-                files=total_files,
-                chunks=total_chunks
-            )
+            job_id = ingest_worker.submit("reingest", {
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+            })
+            msg = f"Lưu cấu hình thành công! Đang re-ingest nền (job {job_id})"
+            self.log_info("Đã xếp job re-ingest", job_id=job_id)
 
         # Trả kết quả cập nhật cấu hình cho client
         return JSONResponse({
             "msg": msg,
-            "reingested": need_reingest
+            "reingested": need_reingest,
+            "job_id": job_id
         })
+
+    # Re-ingest toàn bộ tài liệu đã upload (chạy trong worker nền)
+    # Chức năng:
+    # - Chia lại từng file với chunk size / overlap mới, KHÔNG reset vector store
+    # - Chunk trùng nội dung với chunk đã có giữ nguyên id + embedding,
+    #   chunk mới lấy embedding từ kho theo hash nội dung, chỉ embed phần chưa từng thấy
+    # - Chỉ áp phần chênh lệch (upsert chunk mới, xoá chunk không còn) cho từng file
+    def reingest_all(self, chunk_size: int, chunk_overlap: int, report=None):
+        self.log_info("Bắt đầu re-ingest do thay đổi chunk size/overlap")
+
+        # Registry cần đủ dữ liệu để so file_hash
+        corpus_state.ensure_loaded(self.vector)
+
+        totals = {"files": 0, "chunks": 0, "embedded": 0, "reused": 0, "unchanged": 0, "removed": 0}
+
+        # Duyệt lại toàn bộ file đã upload
+        for fp in config.settings.UPLOAD_DIR.glob("*.md"):
+            name = fp.name
+            if report:
+                report(name, state="ingesting")
+
+            stats = ingest_file(
+                self.vector,
+                fp,
+                name,
+                file_hash=hash_file(fp),
+                on_progress=(lambda s, name=name: report(name, **s)) if report else None,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            )
+
+            # Chỉ báo corpus thay đổi khi file thực sự có chênh lệch
+            if stats["chunks"] - stats["unchanged"] or stats["removed"]:
+                corpus_state.source_added(name, self.vector)
+
+            totals["files"] += 1
+            for key in ("chunks", "embedded", "reused", "unchanged", "removed"):
+                totals[key] += stats[key]
+            if report:
+                report(name, state="done", **stats)
+
+        self.log_info("Re-ingest hoàn tất", **totals)
+        return totals
+
+
+# Handler job "reingest" cho services.ingest_jobs
+def run_reingest_job(job, report):
+    payload = job["payload"]
+    return ConfigService().reingest_all(
+        payload["chunk_size"], payload["chunk_overlap"], report
+    )
+
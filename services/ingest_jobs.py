@@ -0,0 +1,128 @@
+# services/ingest_jobs.py
+# Hàng đợi job ingest chạy nền
+# Chức năng:
+# - Request upload / re-ingest chỉ tạo job (lưu SQLite qua models.jobs) và trả job id ngay
+# - Một worker thread riêng chạy pipeline chunk / ghi, ngoài event loop phục vụ chat;
+#   phần nặng nhất (embed ONNX) có thể chuyển sang pool process riêng
+#   (models.parallel_embed, settings.INGEST_EMBED_WORKERS ≥ 1, mặc định tắt)
+#   → không tranh GIL với request chat
+# - Job id luôn do server sinh; tiến độ gửi theo payload["upload_id"] nếu có
+# - Khởi động lại → job queued / running được chạy tiếp (pipeline ingest idempotent
+#   theo hash nội dung nên chạy lại phần dở không sinh dữ liệu trùng)
+# - Tiến độ ghi vào job (SQLite) và services.ingest_progress (SSE / polling)
+
+import importlib
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from models.jobs import JobStore, job_store
+from services.ingest_progress import ingest_progress
+
+logger = logging.getLogger("ingest_jobs")
+
+# Loại job → handler "module:hàm", import lười để không vướng import vòng
+# handler(job, report) -> dict kết quả; report(name, **fields) báo tiến độ
+HANDLERS: Dict[str, str] = {
+    "upload": "services.upload_service:run_upload_job",
+    "reingest": "services.config_service:run_reingest_job",
+}
+
+
+def _resolve(kind: str) -> Callable:
+    module, _, func = HANDLERS[kind].partition(":")
+    return getattr(importlib.import_module(module), func)
+
+
+class IngestWorker:
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.current: Optional[str] = None
+
+    # Tạo job (id do store sinh) và đưa vào hàng đợi
+    def submit(self, kind: str, payload: Dict[str, Any]) -> str:
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = self.store.create(kind, payload)
+        self._queue.put(job_id)
+        self.start()
+        logger.info(f"[INGEST_JOB] queued {kind} {job_id}")
+        return job_id
+
+    # Khởi động worker (một lần) và nạp lại các job chưa xong
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            pending = self.store.unfinished()
+            queued = set(self._queue.queue)
+            for job in pending:
+                if job["id"] not in queued:
+                    self._queue.put(job["id"])
+            if pending:
+                logger.info(f"[INGEST_JOB] resuming {len(pending)} unfinished job(s)")
+            self._thread = threading.Thread(
+                target=self._run, name="ingest-worker", daemon=True
+            )
+            self._thread.start()
+
+    # Dừng worker sau job hiện tại
+    def stop(self, timeout: Optional[float] = None) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            self.current = job_id
+            try:
+                self._run_job(job_id)
+            finally:
+                self.current = None
+
+    def _run_job(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job["state"] not in ("queued", "running"):
+            return
+
+        progress: Dict[str, Any] = dict(job["progress"] or {})
+        progress_key = (job["payload"] or {}).get("upload_id") or job_id
+
+        def report(name: str, **fields):
+            entry = progress.setdefault(name, {})
+            entry.update(fields)
+            self.store.update_progress(job_id, progress)
+            ingest_progress.update(progress_key, name, **fields)
+
+        self.store.mark_running(job_id)
+        job["progress"] = progress
+        try:
+            result = _resolve(job["kind"])(job, report)
+            self.store.finish(job_id, result=result)
+            logger.info(f"[INGEST_JOB] done {job_id}: {result}")
+        except Exception as e:
+            self.store.finish(job_id, error=str(e))
+            logger.exception(f"[INGEST_JOB] failed {job_id}")
+        finally:
+            ingest_progress.finish(progress_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.current,
+            "queued": self._queue.qsize(),
+            "alive": bool(self._thread and self._thread.is_alive()),
+        }
+
+
+# Instance dùng chung
+ingest_worker = IngestWorker(job_store)
@@ -0,0 +1,68 @@
+# services/ingest_progress.py
+# Theo dõi tiến độ ingest theo từng lượt upload
+# Chức năng:
+# - Mỗi lượt upload có upload_id (client tự sinh), mỗi file có trạng thái riêng
+# - Cập nhật sau mỗi batch: số chunk đã ghi, embed mới / dùng lại, tốc độ
+# - Giao diện đọc qua endpoint polling hoặc server-sent events
+# - Lưu trong TTLCache → lượt upload cũ tự bị dọn
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+
+class IngestProgress:
+    def __init__(self, maxsize: int = 256, ttl: float = 3600):
+        self._uploads: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def _file(self, upload_id: str, filename: str) -> Dict[str, Any]:
+        upload = self._uploads.setdefault(
+            upload_id, {"files": {}, "done": False, "updated_at": time.time()}
+        )
+        return upload["files"].setdefault(filename, {
+            "state": "pending",
+            "bytes": 0,
+            "chunks": 0,
+            "embedded": 0,
+            "reused": 0,
+            "chunks_per_sec": 0.0,
+            "error": None,
+        })
+
+    def _touch(self, upload_id: str):
+        self._uploads[upload_id]["updated_at"] = time.time()
+
+    def update(self, upload_id: Optional[str], filename: str, **fields) -> None:
+        if not upload_id:
+            return
+        with self._lock:
+            self._file(upload_id, filename).update(fields)
+            self._touch(upload_id)
+
+    def finish(self, upload_id: Optional[str]) -> None:
+        if not upload_id:
+            return
+        with self._lock:
+            self._uploads.setdefault(upload_id, {"files": {}, "done": False})
+            self._uploads[upload_id]["done"] = True
+            self._touch(upload_id)
+
+    # Bản sao trạng thái hiện tại (None nếu không có lượt upload này)
+    def snapshot(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+            if upload is None:
+                return None
+            return {
+                "upload_id": upload_id,
+                "done": upload["done"],
+                "updated_at": upload["updated_at"],
+                "files": {name: dict(f) for name, f in upload["files"].items()},
+            }
+
+
+# Instance dùng chung cho UploadService / UploadController
+ingest_progress = IngestProgress()
@@ -0,0 +1,159 @@
+# services/prompt_cache.py
+# Cache system prompt / BOT RULE đã lắp sẵn
+# Chức năng:
+# - Đọc system prompt từ DB MỘT lần, giữ trong bộ nhớ
+# - Inject BOT RULE vào vector store một lần cho mỗi phiên bản prompt
+#   (không gọi inject_bot_rule(force_full=True) trước mỗi lần gọi LLM nữa)
+# - Chỉ bị vô hiệu hoá khi ConfigService.update / save_system_prompt,
+#   hoặc khi collection bị reset (BOT RULE mất theo collection)
+# - Đo thời gian tiết kiệm được: tổng thời gian inject / đọc DB thực đo
+#   (trung bình) × số lần bỏ qua, trừ thời gian thực đo của các lần bỏ qua
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from models.corpus import corpus_state
+
+logger = logging.getLogger("prompt_cache")
+
+BOT_RULE_SOURCE = "BOT_RULE"
+
+
+class PromptCache:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = 0
+        self._prompt: Optional[str] = None
+        self._rule_version = -1
+        # Id các chunk BOT RULE đang có trong collection
+        self._rule_ids: Set[str] = set()
+
+        # Thời gian thực đo: lần dựng thật (đọc DB / inject) và lần dùng cache
+        self.builds = 0
+        self.prompt_hits = 0
+        self.rule_hits = 0
+        self._prompt_reads = 0
+        self._prompt_read_ms = 0.0
+        self._prompt_hit_ms = 0.0
+        self._rule_injects = 0
+        self._rule_inject_ms = 0.0
+        self._rule_hit_ms = 0.0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # Vô hiệu hoá prompt đã lắp (prompt hoặc bot rules vừa được lưu)
+    def invalidate(self, reason: str = "") -> None:
+        with self._lock:
+            self._version += 1
+            self._prompt = None
+        logger.info(
+            f"[PROMPT_CACHE] invalidated -> v{self._version} ({reason}) | {self.stats()}"
+        )
+
+    # =========================
+    # SYSTEM PROMPT
+    # =========================
+
+    def _db(self):
+        from models.db import _db
+        return _db
+
+    # System prompt hiện tại (đọc DB khi cache trống)
+    def system_prompt(self) -> str:
+        t0 = time.perf_counter()
+        prompt = self._prompt
+        if prompt is not None:
+            self.prompt_hits += 1
+            self._prompt_hit_ms += (time.perf_counter() - t0) * 1000
+            return prompt
+        with self._lock:
+            if self._prompt is None:
+                self._prompt = self._db().get_system_prompt() or ""
+                self._prompt_reads += 1
+                self._prompt_read_ms += (time.perf_counter() - t0) * 1000
+                self.builds += 1
+            return self._prompt
+
+    # =========================
+    # BOT RULE TRONG VECTOR STORE
+    # =========================
+
+    # Đảm bảo BOT RULE đầy đủ đã có trong collection
+    # Chức năng:
+    # - Chỉ inject khi phiên bản prompt đổi hoặc collection bị reset
+    def ensure_bot_rule(self, manager) -> bool:
+        t0 = time.perf_counter()
+        if self._rule_version == self._version:
+            self.rule_hits += 1
+            self._rule_hit_ms += (time.perf_counter() - t0) * 1000
+            return False
+        with self._lock:
+            if self._rule_version == self._version:
+                return False
+            manager.inject_bot_rule(force_full=True)
+            cost = (time.perf_counter() - t0) * 1000
+            self._rule_injects += 1
+            self._rule_inject_ms += cost
+            self._rule_version = self._version
+            self.builds += 1
+        logger.info(f"[PROMPT_CACHE] BOT RULE injected ({cost:.1f} ms)")
+        return True
+
+    # =========================
+    # ĐỒNG BỘ VỚI COLLECTION (listener của corpus_state)
+    # =========================
+
+    def add(self, ids, docs, metas=None) -> None:
+        with self._lock:
+            for cid, meta in zip(ids, metas or [None] * len(ids)):
+                if (meta or {}).get("source") == BOT_RULE_SOURCE:
+                    self._rule_ids.add(cid)
+
+    # Xoá lẻ một chunk BOT RULE → inject lại đầy đủ ở lần gọi sau
+    def remove_ids(self, ids) -> None:
+        with self._lock:
+            removed = self._rule_ids.intersection(ids)
+            if removed:
+                self._rule_ids -= removed
+                self._rule_version = -1
+
+    def remove_source(self, source: str) -> None:
+        if source == BOT_RULE_SOURCE:
+            with self._lock:
+                self._rule_ids.clear()
+                self._rule_version = -1
+
+    # Collection reset → BOT RULE cần được inject lại
+    def clear(self) -> None:
+        with self._lock:
+            self._rule_ids.clear()
+            self._rule_version = -1
+
+    # Thời gian tiết kiệm = số lần dùng cache × chi phí trung bình thực đo của
+    # lần dựng thật − thời gian thực đo của chính các lần dùng cache
+    def stats(self) -> Dict[str, Any]:
+        prompt_read_ms = self._prompt_read_ms / self._prompt_reads if self._prompt_reads else 0.0
+        rule_inject_ms = self._rule_inject_ms / self._rule_injects if self._rule_injects else 0.0
+        saved_prompt = prompt_read_ms * self.prompt_hits - self._prompt_hit_ms
+        saved_rule = rule_inject_ms * self.rule_hits - self._rule_hit_ms
+        hits = self.prompt_hits + self.rule_hits
+        return {
+            "version": self._version,
+            "builds": self.builds,
+            "prompt_hits": self.prompt_hits,
+            "bot_rule_hits": self.rule_hits,
+            "prompt_read_ms_avg": round(prompt_read_ms, 3),
+            "bot_rule_inject_ms_avg": round(rule_inject_ms, 3),
+            "cache_hit_ms_total": round(self._prompt_hit_ms + self._rule_hit_ms, 3),
+            "saved_ms_total": round(saved_prompt + saved_rule, 1),
+            "saved_ms_per_hit": round((saved_prompt + saved_rule) / hits, 3) if hits else 0.0,
+        }
+
+
+# Instance dùng chung
+prompt_cache = PromptCache()
+corpus_state.register(prompt_cache)
@@ -0,0 +1,221 @@
+# services/resources.py
+# Container tài nguyên dùng chung cho toàn ứng dụng
+# Chức năng:
+# - Sở hữu đúng MỘT bản của mỗi tài nguyên nặng:
+#   + vector: VectorStoreManager (client Chroma, collection)
+#   + db: DatabaseManager (kết nối SQLite)
+#   + embedding: embedding function / ONNX session
+#   + async_vector / chat_service: facade async và ChatService dùng chung
+# - Không giữ client Gemini: models.gemini_client / gemini_analyzer đã có client
+#   module-level riêng, thêm một bản ở đây chỉ tạo client thứ hai không ai dùng
+# - Dùng lại instance module-level đã có (vector_store_manager, _db, ...) để
+#   code gọi trực tiếp các module đó và controller luôn thấy cùng một bản
+# - Tạo ở lần dùng đầu (không tạo lúc import); main.py mở trong lifespan
+#   và tiêm vào controller / service
+# - Hook tắt máy (chạy ngược thứ tự đăng ký) + báo cáo bộ nhớ theo từng tài nguyên
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.config import settings
+
+logger = logging.getLogger("resources")
+
+
+# RSS hiện tại của process (byte); None nếu hệ điều hành không hỗ trợ
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _open_vector():
+    from models.vector_store import vector_store_manager
+
+    return vector_store_manager
+
+
+def _open_db():
+    from models.db import _db
+
+    return _db
+
+
+def _open_embedding():
+    from models.embeddings import get_embedding_function
+
+    return get_embedding_function()
+
+
+def _open_async_vector():
+    from models.async_vector import AsyncVectorStore
+
+    return AsyncVectorStore(resources.vector)
+
+
+def _open_chat_service():
+    from services.chat_service import _chat_service
+
+    return _chat_service
+
+
+# Thứ tự mở khi khởi động
+_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "vector": _open_vector,
+    "db": _open_db,
+    "embedding": _open_embedding,
+    "async_vector": _open_async_vector,
+    "chat_service": _open_chat_service,
+}
+_OPEN_ON_STARTUP = ("vector", "db", "embedding", "async_vector", "chat_service")
+
+
+def _stop_ingest_worker():
+    from services.ingest_jobs import ingest_worker
+
+    ingest_worker.stop(timeout=10)
+
+
+def _stop_parallel_embedder():
+    from models.parallel_embed import shutdown_parallel_embedder
+
+    shutdown_parallel_embedder()
+
+
+class Resources:
+    def __init__(self, factories: Dict[str, Callable[[], Any]]):
+        self._factories = factories
+        self._lock = threading.RLock()
+        self._items: Dict[str, Any] = {}
+        # Tài nguyên → (thời gian mở ms, RSS tăng thêm lúc mở)
+        self._opened: Dict[str, Dict[str, Any]] = {}
+        self._hooks: List[Tuple[str, Callable[[], Any]]] = []
+        self.closed = False
+
+    # Lấy tài nguyên, mở ở lần đầu (một lần cho cả process, an toàn giữa các thread)
+    def get(self, name: str) -> Any:
+        item = self._items.get(name)
+        if item is not None:
+            return item
+        with self._lock:
+            if name not in self._items:
+                rss0 = _rss_bytes()
+                t0 = time.perf_counter()
+                self._items[name] = self._factories[name]()
+                rss1 = _rss_bytes()
+                self._opened[name] = {
+                    "open_ms": round((time.perf_counter() - t0) * 1000, 1),
+                    "rss_delta_bytes": rss1 - rss0 if rss0 is not None and rss1 is not None else None,
+                }
+                logger.info(f"[RESOURCES] {name} opened in {self._opened[name]['open_ms']} ms")
+            return self._items[name]
+
+    @property
+    def vector(self):
+        return self.get("vector")
+
+    @property
+    def db(self):
+        return self.get("db")
+
+    @property
+    def embedding(self):
+        return self.get("embedding")
+
+    @property
+    def async_vector(self):
+        return self.get("async_vector")
+
+    @property
+    def chat_service(self):
+        return self.get("chat_service")
+
+    # =========================
+    # VÒNG ĐỜI
+    # =========================
+
+    # Mở các tài nguyên cần cho request đầu tiên (gọi trong lifespan)
+    def open(self, names=_OPEN_ON_STARTUP) -> Dict[str, Any]:
+        self.closed = False
+        for name in names:
+            self.get(name)
+        return {name: self._opened[name] for name in names}
+
+    def add_shutdown_hook(self, name: str, fn: Callable[[], Any]) -> None:
+        self._hooks.append((name, fn))
+
+    # Chạy hook tắt máy theo thứ tự ngược; hook lỗi được ghi log, hook sau vẫn chạy
+    def close(self) -> None:
+        with self._lock:
+            if self.closed:
+                return
+            for name, fn in reversed(self._hooks):
+                try:
+                    fn()
+                    logger.info(f"[RESOURCES] shutdown hook {name} done")
+                except Exception:
+                    logger.exception(f"[RESOURCES] shutdown hook {name} failed")
+            self.closed = True
+
+    # =========================
+    # BÁO CÁO BỘ NHỚ
+    # =========================
+
+    def _component_stats(self) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        from models.async_vector import AsyncVectorStore
+        from models.embedding_store import embedding_store
+        from models.embeddings import query_batcher, query_cache
+        from models.flat_index import flat_index
+        from models.lexical_index import lexical_index
+        from services.answer_cache import answer_cache
+        from services.ingest_jobs import ingest_worker
+        from services.prompt_cache import prompt_cache
+
+        return {
+            "vector": lambda: {"chunks": self.vector.get_collection().count()},
+            "db": lambda: {
+                "disk_bytes": settings.DB_PATH.stat().st_size if settings.DB_PATH.exists() else 0,
+            },
+            "embedding": lambda: {
+                "model": settings.EMBEDDING_MODEL,
+                "query_cache": query_cache.stats(),
+                "query_batcher": query_batcher.stats(),
+            },
+            "async_vector": AsyncVectorStore.stats,
+            "embedding_store": embedding_store.stats,
+            "flat_index": flat_index.stats,
+            "lexical_index": lexical_index.stats,
+            "answer_cache": answer_cache.stats,
+            "prompt_cache": prompt_cache.stats,
+            "ingest_worker": ingest_worker.stats,
+        }
+
+    # Báo cáo theo từng tài nguyên
+    # Chức năng:
+    # - open_ms / rss_delta_bytes: đo lúc mở (ONNX session, client Chroma... không
+    #   tự báo được dung lượng nên dùng mức tăng RSS của process)
+    # - stats: số liệu của chính thành phần (số chunk, byte ma trận / đĩa, cache...)
+    # - Tài nguyên chưa mở không bị mở chỉ để báo cáo
+    def memory_report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {"process_rss_bytes": _rss_bytes(), "resources": {}}
+        for name, stats in self._component_stats().items():
+            entry: Dict[str, Any] = {"loaded": name in self._items or name not in self._factories}
+            entry.update(self._opened.get(name, {}))
+            if entry["loaded"]:
+                try:
+                    entry["stats"] = stats()
+                except Exception as e:
+                    entry["error"] = str(e)
+            report["resources"][name] = entry
+        return report
+
+
+# Instance dùng chung (main.py mở / đóng trong lifespan, tiêm vào controller)
+resources = Resources(_FACTORIES)
+resources.add_shutdown_hook("parallel_embedder", _stop_parallel_embedder)
+resources.add_shutdown_hook("ingest_worker", _stop_ingest_worker)
@@ -2,34 +2,60 @@
 # Service xử lý upload file tài liệu
 # Chức năng:
 # - Nhận và validate file upload
-# - Ghi nội dung vào vector store để tìm kiếm
+# - Đọc file theo block, ghi tạm xuống đĩa (không giữ cả file trong bộ nhớ)
+# - Ghi nội dung vào vector store để tìm kiếm (chỉ embed chunk mới / đổi),
+#   chia chunk dạng luồng và embed theo batch giới hạn
+# - Báo tiến độ từng file qua services.ingest_progress (upload_id)
 # - Lưu file vật lý và metadata
 # - Tính tốc độ upload thực tế (nếu client gửi lên)
 # - Trả kết quả tổng hợp cho client
 
+import asyncio
 import time
+import uuid
+from pathlib import Path
 from fastapi.responses import JSONResponse
-from models.vector_store import vector_store_manager
+from models.corpus import corpus_state
+from models.ingest import file_digest, ingest_file, new_file_hasher
+from models.source_registry import source_registry
 from config.config import settings
 from services.base_service import BaseService
+from services.ingest_progress import ingest_progress
+from services.ingest_jobs import ingest_worker
 from config import config
 
 
+# Ghi một block vào file tạm và cập nhật hash (chạy trên thread)
+def _spool_block(spool, hasher, block: bytes) -> None:
+    spool.write(block)
+    hasher.update(block)
+
+
 class UploadService(BaseService):
     # Hàm xử lý upload chính
     # Chức năng:
     # - Duyệt danh sách file upload
-    # - Phân loại file thêm mới / cập nhật / lỗi
-    # - Thực hiện lưu vector, lưu file, ghi DB
-    # - Tổng hợp kết quả và trả response
-    async def process(self, files, client_start_time=None, client_total_size=None):
+    # - Phân loại file thêm mới / cập nhật / không đổi / lỗi
+    # - Nhận file xuống đĩa, tạo job ingest nền (lưu vector, lưu file, ghi DB)
+    # - Tổng hợp kết quả và trả response kèm job id
+    async def process(
+        self,
+        files,
+        client_start_time=None,
+        client_total_size=None,
+        upload_id=None,
+    ):
         t0 = time.time()
+        upload_id = upload_id or uuid.uuid4().hex
 
         # Tổng dung lượng thực tế của các file đọc được
         total_size = 0
 
         # Danh sách kết quả theo từng trạng thái
-        success, updated, failed = [], [], []
+        success, updated, skipped, failed = [], [], [], []
+
+        # File đã nhận đủ, chờ ingest nền
+        accepted = []
 
         # Tốc độ upload thực tế (MB/s), chỉ tính nếu client cung cấp đủ thông tin
         real_speed = None
@@ -40,15 +66,10 @@ class UploadService(BaseService):
             if duration > 0:
                 real_speed = client_total_size / duration / 1024 / 1024
 
-        # Lấy collection hiện tại từ vector store
-        coll = vector_store_manager.get_collection()
-
-        # Lấy danh sách file đã tồn tại trong vector store (theo metadata source)
-        existing = {
-            m.get("source")
-            for m in coll.get(include=["metadatas"])["metadatas"]
-            if m
-        }
+        # Danh mục file đã ingest (nạp một lần, sau đó cập nhật theo ingest / xoá)
+        # → kiểm tra file đã tồn tại trong O(1), không quét metadata toàn collection
+        # Lần nạp đầu đọc toàn collection → chạy trên thread, không chặn event loop
+        await asyncio.to_thread(corpus_state.ensure_loaded, self.vector)
 
         # Xử lý từng file upload
         for file in files:
@@ -57,58 +78,183 @@ class UploadService(BaseService):
                 failed.append(f"{file.filename} → chỉ hỗ trợ .md/.txt")
                 continue
 
-            try:
-                # Đọc nội dung file
-                content = await file.read()
-                total_size += len(content)
-
-                # Decode nội dung sang text để đưa vào vector store
-                text = content.decode("utf-8", errors="ignore")
+            filename = file.filename
+            upload_dir = config.settings.UPLOAD_DIR
+            # Mỗi file của mỗi lượt upload một file tạm riêng → hai upload cùng tên
+            # chạy đồng thời không ghi đè lên nhau
+            part_path = upload_dir / f".{filename}.{uuid.uuid4().hex}.part"
 
-                filename = file.filename
+            try:
+                # Đọc file theo block cố định, ghi tạm xuống đĩa và hash dần
+                # → không giữ toàn bộ file trong bộ nhớ; ghi + hash chạy trên thread
+                ingest_progress.update(upload_id, filename, state="receiving")
+                part_path.parent.mkdir(parents=True, exist_ok=True)
+                hasher = new_file_hasher()
+                size = 0
+                spool = await asyncio.to_thread(open, part_path, "wb")
+                try:
+                    while True:
+                        block = await file.read(config.settings.UPLOAD_READ_BLOCK_SIZE)
+                        if not block:
+                            break
+                        await asyncio.to_thread(_spool_block, spool, hasher, block)
+                        size += len(block)
+                finally:
+                    await asyncio.to_thread(spool.close)
+                total_size += size
+                file_hash = file_digest(hasher)
 
-                # Nếu file đã tồn tại → xóa vector cũ và đánh dấu là cập nhật
-                if filename in existing:
-                    coll.delete(where={"source": filename})
+                # File đã tồn tại với cùng nội dung → bỏ qua, không ingest lại
+                if filename in source_registry:
+                    if source_registry.file_hash(filename) == file_hash:
+                        part_path.unlink(missing_ok=True)
+                        skipped.append(filename)
+                        ingest_progress.update(
+                            upload_id, filename, state="skipped", bytes=size,
+                            chunks=source_registry.chunk_count(filename),
+                        )
+                        self.log_info(
+                            "Bỏ qua file không đổi",
+                            file_name=filename,
+                            chunks=source_registry.chunk_count(filename),
+                        )
+                        continue
+                    # File đã tồn tại → đánh dấu là cập nhật
                     updated.append(filename)
                 else:
                     success.append(filename)
 
-                # Thêm nội dung file vào vector store
-                vector_store_manager.add_documents(text, filename)
-
-                # Lưu file vật lý xuống thư mục upload
-                path = config.settings.UPLOAD_DIR / filename
-                path.parent.mkdir(parents=True, exist_ok=True)
-                path.write_bytes(content)
-
-                # Ghi thông tin file vào database
-                self.db.add_uploaded_file(filename)
-
-                # Ghi log upload thành công
-                self.log_info("Upload thành công", file_name=filename, size=len(content))
+                # Đưa vào job ingest nền (file tạm nằm trên đĩa đến khi job xong)
+                accepted.append({
+                    "filename": filename,
+                    "part_path": str(part_path),
+                    "file_hash": file_hash,
+                    "size": size,
+                })
+                ingest_progress.update(upload_id, filename, state="queued", bytes=size)
 
             except Exception as e:
                 # Bắt lỗi trong quá trình xử lý từng file
+                part_path.unlink(missing_ok=True)
                 error_msg = f"{file.filename} → lỗi: {str(e)}"
                 failed.append(error_msg)
+                ingest_progress.update(upload_id, filename, state="failed", error=str(e))
                 self.log_error(
                     "Upload thất bại",
                     filename=file.filename,
                     error=str(e)
                 )
 
+        # Chunk / embed / ghi chạy trên worker nền, request trả về ngay với job id
+        # Job id do server sinh; upload_id (client gửi) chỉ là key tiến độ trong payload
+        job_id = None
+        if accepted:
+            try:
+                job_id = ingest_worker.submit(
+                    "upload", {"files": accepted, "upload_id": upload_id}
+                )
+            except Exception:
+                for item in accepted:
+                    Path(item["part_path"]).unlink(missing_ok=True)
+                ingest_progress.finish(upload_id)
+                raise
+        else:
+            ingest_progress.finish(upload_id)
+
         # Trả kết quả tổng hợp cho client
         return JSONResponse({
-            "status": "done",
+            "status": "queued" if job_id else "done",
+            "job_id": job_id,
             "added": len(success),
             "updated": len(updated),
+            "skipped": len(skipped),
             "failed": len(failed),
-            "msg": f"HOÀN TẤT! Thêm: {len(success)} • Cập nhật: {len(updated)} • Lỗi: {len(failed)}",
+            "msg": (
+                f"{'ĐÃ NHẬN, ĐANG INGEST NỀN' if job_id else 'HOÀN TẤT'}! "
+                f"Thêm: {len(success)} • Cập nhật: {len(updated)} "
+                f"• Không đổi: {len(skipped)} • Lỗi: {len(failed)}"
+            ),
             "real_speed": f"{real_speed:.2f}" if real_speed else None,
             "detail": {
                 "added": success,
                 "updated": updated,
+                "skipped": skipped,
                 "failed": failed
             }
         })
+
+    # Ingest một file đã nhận (chạy trong worker nền)
+    # Chức năng:
+    # - Decode + chia chunk dạng luồng, embed + ghi theo batch
+    #   (chunk không đổi dùng lại embedding cũ, chunk bị bỏ được xoá)
+    # - Đưa file tạm vào UPLOAD_DIR, ghi DB, cập nhật chỉ mục phụ
+    def ingest_received(self, item, report):
+        filename = item["filename"]
+        part_path = Path(item["part_path"])
+
+        report(filename, state="ingesting", bytes=item["size"])
+        ingest = ingest_file(
+            self.vector,
+            part_path,
+            filename,
+            item["file_hash"],
+            lambda stats: report(filename, **stats),
+        )
+
+        # Lưu file vật lý xuống thư mục upload
+        part_path.replace(config.settings.UPLOAD_DIR / filename)
+
+        # Ghi thông tin file vào database
+        self.db.add_uploaded_file(filename)
+
+        # Corpus đã thay đổi → cập nhật chỉ mục phụ + vô hiệu hoá cache
+        corpus_state.source_added(filename, self.vector)
+
+        report(filename, state="done", **ingest)
+        self.log_info(
+            "Upload thành công",
+            file_name=filename,
+            size=item["size"],
+            chunks=ingest["chunks"],
+            embedded=ingest["embedded"],
+            reused=ingest["reused"],
+        )
+        return ingest
+
+
+# Handler job "upload" cho services.ingest_jobs
+# Chức năng:
+# - Bỏ qua file đã xong (job chạy tiếp sau khi khởi động lại)
+# - File tạm bị mất (đã chuyển vào UPLOAD_DIR ở lần chạy trước) → ingest từ bản đã lưu
+def run_upload_job(job, report):
+    service = UploadService()
+    progress = job.get("progress") or {}
+    done, failed = [], []
+    totals = {"chunks": 0, "embedded": 0, "reused": 0}
+
+    for item in job["payload"]["files"]:
+        filename = item["filename"]
+        if (progress.get(filename) or {}).get("state") == "done":
+            done.append(filename)
+            continue
+
+        if not Path(item["part_path"]).exists():
+            final_path = config.settings.UPLOAD_DIR / filename
+            if not final_path.exists():
+                failed.append(filename)
+                report(filename, state="failed", error="missing upload spool file")
+                continue
+            item = dict(item, part_path=str(final_path))
+
+        try:
+            ingest = service.ingest_received(item, report)
+            for key in totals:
+                totals[key] += ingest[key]
+            done.append(filename)
+        except Exception as e:
+            failed.append(filename)
+            report(filename, state="failed", error=str(e))
+            service.log_error("Upload thất bại", filename=filename, error=str(e))
+
+    return {"done": done, "failed": failed, **totals}
+
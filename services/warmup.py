@@ -0,0 +1,189 @@
+# services/warmup.py
+# Làm nóng hệ thống lúc khởi động + trạng thái sẵn sàng (readiness)
+# Chức năng:
+# - Chạy trong lifespan của FastAPI, dạng task nền → server nhận request ngay,
+#   /api/v1/health vẫn trả lời trong lúc làm nóng
+# - Các bước (theo thứ tự, ghi thời gian từng bước):
+#   + resources: mở container dùng chung (vector store, DB, embedding, ChatService)
+#   + embedding_model: chạy một batch giả qua ONNX session
+#   + collection: mở collection Chroma
+#   + indexes: nạp corpus vào lexical index / catalog / registry (corpus_state)
+#   + prompt: system prompt + BOT RULE (prompt_cache)
+#   + query_cache: embed trước các câu truy vấn nóng (settings.QUERY_EMBED_PREWARM)
+#   + ingest_worker: khởi động worker ingest, chạy tiếp job dở dang
+# - Bước bắt buộc (critical): resources, embedding_model, collection, indexes
+#   → /api/v1/ready trả 200 ngay khi các bước này xong, kể cả khi bước phụ lỗi
+#   (trạng thái "degraded", liệt kê bước lỗi)
+# - Bước lỗi được chạy lại trong nền (backoff tăng dần tới WARMUP_RETRY_MAX_DELAY):
+#   bước bắt buộc thử lại tới khi thành công, bước phụ tối đa WARMUP_RETRIES lần
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.config import settings
+
+logger = logging.getLogger("warmup")
+
+# Batch giả cho model embedding (đủ để khởi tạo mọi nhánh của ONNX session)
+_DUMMY_BATCH = ["warm-up", "Hidemium là gì", "cách tạo profile"]
+
+
+def _resources():
+    from services.resources import resources
+
+    return resources.open()
+
+
+def _embedding_model():
+    from models.embeddings import embed_texts
+
+    embed_texts(_DUMMY_BATCH)
+
+
+def _collection():
+    from services.resources import resources
+
+    return {"chunks": resources.vector.get_collection().count()}
+
+
+def _indexes():
+    from models.corpus import corpus_state
+    from models.lexical_index import lexical_index
+    from services.resources import resources
+
+    corpus_state.ensure_loaded(resources.vector)
+    return lexical_index.stats()
+
+
+def _prompt():
+    from services.prompt_cache import prompt_cache
+    from services.resources import resources
+
+    prompt_cache.system_prompt()
+    prompt_cache.ensure_bot_rule(resources.vector)
+
+
+def _query_cache():
+    if not settings.QUERY_EMBED_PREWARM:
+        return {"skipped": True}
+    from models.embeddings import warm_query_cache
+    from services.chat_service import HIDEMIUM_EXPANSION_QUERIES
+
+    return {"queries": warm_query_cache(HIDEMIUM_EXPANSION_QUERIES + list(settings.WARMUP_QUERIES))}
+
+
+def _ingest_worker():
+    from services.ingest_jobs import ingest_worker
+
+    ingest_worker.start()
+    return ingest_worker.stats()
+
+
+# (tên, hàm, bắt buộc cho readiness)
+STEPS: List[Tuple[str, Callable[[], Any], bool]] = [
+    ("resources", _resources, True),
+    ("embedding_model", _embedding_model, True),
+    ("collection", _collection, True),
+    ("indexes", _indexes, True),
+    ("prompt", _prompt, False),
+    ("query_cache", _query_cache, False),
+    ("ingest_worker", _ingest_worker, False),
+]
+
+
+class Warmup:
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any], bool]]):
+        self.steps = steps
+        self.state = "pending"
+        # Tên bước → kết quả lần chạy gần nhất (giữ thứ tự STEPS)
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    # Sẵn sàng khi mọi bước bắt buộc đã thành công
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "degraded")
+
+    def _failed(self, critical: Optional[bool] = None) -> List[str]:
+        return [
+            name for name, _, crit in self.steps
+            if not self.results.get(name, {}).get("ok") and (critical is None or crit == critical)
+        ]
+
+    async def _run_step(self, name: str, fn: Callable[[], Any], critical: bool) -> None:
+        prev = self.results.get(name)
+        entry: Dict[str, Any] = {
+            "step": name,
+            "critical": critical,
+            "ok": True,
+            "attempts": prev["attempts"] + 1 if prev else 1,
+        }
+        t0 = time.perf_counter()
+        try:
+            detail = await asyncio.to_thread(fn)
+            if detail:
+                entry["detail"] = detail
+        except Exception as e:
+            entry["ok"] = False
+            entry["error"] = str(e)
+            logger.exception(f"[WARMUP] {name} failed (attempt {entry['attempts']})")
+        entry["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        self.results[name] = entry
+        logger.info(f"[WARMUP] {name}: {entry['ms']} ms")
+
+    def _update_state(self) -> None:
+        if self._failed(critical=True):
+            self.state = "retrying"
+        elif self._failed():
+            self.state = "degraded"
+        else:
+            self.state = "ready"
+
+    # Chạy các bước trên thread riêng (không chặn event loop)
+    # Chức năng:
+    # - Lượt đầu chạy đủ các bước theo thứ tự; bước lỗi không chặn bước sau
+    # - retry=True: chạy lại các bước lỗi (theo thứ tự) tới khi bước bắt buộc
+    #   thành công và bước phụ thành công hoặc hết WARMUP_RETRIES
+    async def run(self, retry: bool = True) -> None:
+        self.state = "warming"
+        self.results = {}
+        self.started_at = time.time()
+        self.finished_at = None
+        attempt = 0
+        while True:
+            for name, fn, critical in self.steps:
+                if not self.results.get(name, {}).get("ok"):
+                    await self._run_step(name, fn, critical)
+            self._update_state()
+            if self.ready and self.finished_at is None:
+                self.finished_at = time.time()
+                logger.info(f"[WARMUP] {self.state} in {self.snapshot()['total_ms']} ms")
+            failed = self._failed()
+            if not failed or not retry:
+                break
+            if not self._failed(critical=True) and attempt >= settings.WARMUP_RETRIES:
+                logger.warning(f"[WARMUP] giving up on best-effort steps: {failed}")
+                break
+            delay = min(settings.WARMUP_RETRY_DELAY * (2 ** attempt), settings.WARMUP_RETRY_MAX_DELAY)
+            attempt += 1
+            logger.warning(f"[WARMUP] retrying {failed} in {delay:.1f} s")
+            await asyncio.sleep(delay)
+        if self.finished_at is None:
+            self.finished_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "status": self.state,
+            "ready": self.ready,
+            "total_ms": round((end - self.started_at) * 1000, 1) if self.started_at else None,
+            "failed": self._failed() if self.results else [],
+            "steps": list(self.results.values()),
+        }
+
+
+# Instance dùng chung (main.py chạy, routes/api.py đọc trạng thái)
+warmup = Warmup(STEPS)
@@ -0,0 +1,77 @@
+# tests/conftest.py
+# Cấu hình chung cho test
+# Chức năng:
+# - Đưa thư mục gốc repo vào sys.path (chạy `python -m pytest` hay `pytest` đều được)
+# - Đặt giá trị giả cho các biến môi trường bắt buộc của Settings
+#   (không ghi đè giá trị thật nếu đã có)
+# - Fixture ingest_env: collection Chroma trong bộ nhớ + embedding giả cho test ingest
+
+import os
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+for _name in ("GEMINI_API_KEY", "PARTNER_API_KEY", "JWT_SECRET"):
+    os.environ.setdefault(_name, "test")
+
+
+class ChromaManager:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_collection(self):
+        return self.collection
+
+
+# Vector giả xác định theo nội dung (không cần model embedding)
+def fake_vectors(texts):
+    return np.array(
+        [[len(t), sum(map(ord, t)) % 997, 1.0] for t in texts], dtype=np.float32
+    )
+
+
+# Môi trường ingest: collection Chroma trong bộ nhớ, embedding giả,
+# kho embedding + registry riêng cho từng test
+@pytest.fixture
+def ingest_env(monkeypatch, tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+    import models.ingest as ingest
+    from models.embedding_store import EmbeddingStore
+    from models.source_registry import SourceRegistry
+
+    collection = chromadb.EphemeralClient().create_collection(
+        f"test-{uuid.uuid4().hex}", embedding_function=None
+    )
+    embedded = []
+
+    def embed(texts):
+        embedded.extend(texts)
+        return fake_vectors(texts)
+
+    env = SimpleNamespace(
+        manager=ChromaManager(collection),
+        collection=collection,
+        store=EmbeddingStore(root=tmp_path / "embeddings"),
+        registry=SourceRegistry(),
+        embedded=embedded,
+    )
+    monkeypatch.setattr(ingest, "embed_texts", embed)
+    monkeypatch.setattr(ingest, "embedding_store", env.store)
+    monkeypatch.setattr(ingest, "source_registry", env.registry)
+
+    # Đồng bộ registry với collection như corpus_state.source_added
+    def sync(source):
+        data = collection.get(where={"source": source}, include=["documents", "metadatas"])
+        env.registry.remove_source(source)
+        env.registry.add(data["ids"], data["documents"], data["metadatas"])
+
+    env.sync = sync
+    return env
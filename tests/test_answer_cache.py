@@ -0,0 +1,36 @@
+# tests/test_answer_cache.py
+# Cache câu trả lời: key chuẩn hoá + vô hiệu hoá theo generation của corpus
+
+import unicodedata
+
+from models.corpus import corpus_state
+from services.answer_cache import AnswerCache
+
+
+def test_key_normalizes_case_spacing_and_unicode_form():
+    cache = AnswerCache(maxsize=8, ttl=60)
+    nfd = unicodedata.normalize("NFD", "Hidemium  LÀ gì?")
+    assert cache.make_key(nfd, "vi") == cache.make_key("hidemium là gì?", "vi")
+    assert cache.make_key("hidemium là gì?", "vi") != cache.make_key("hidemium là gì?", "en")
+
+
+def test_hit_and_miss_are_counted():
+    cache = AnswerCache(maxsize=8, ttl=60)
+    key = cache.make_key("giá gói pro", "vi")
+    assert cache.get(key) is None
+    cache.set(key, {"response": "..."})
+    assert cache.get(key) == {"response": "..."}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_corpus_change_invalidates_old_answers():
+    cache = AnswerCache(maxsize=8, ttl=60)
+    key = cache.make_key("giá gói pro", "vi")
+    cache.set(key, "cũ")
+
+    corpus_state.bump("test")
+
+    assert cache.get(cache.make_key("giá gói pro", "vi")) is None
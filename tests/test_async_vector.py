@@ -0,0 +1,91 @@
+# tests/test_async_vector.py
+# Facade vector bất đồng bộ: timeout xếp hàng / timeout gọi, trả slot, thống kê latency
+
+import asyncio
+import threading
+
+import pytest
+
+import models.async_vector as async_vector
+from config.config import settings
+from models.async_vector import AsyncVectorStore, LatencyMetrics
+
+
+@pytest.fixture(autouse=True)
+def one_slot(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "VECTOR_QUEUE_TIMEOUT", 5.0)
+    monkeypatch.setattr(settings, "VECTOR_CALL_TIMEOUT", 5.0)
+    # Semaphore gắn với event loop → mỗi test một semaphore mới
+    monkeypatch.setattr(async_vector, "_semaphore", None)
+    monkeypatch.setattr(async_vector, "metrics", LatencyMetrics())
+
+
+def test_queue_timeout_when_every_slot_is_busy(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_QUEUE_TIMEOUT", 0.05)
+    store = AsyncVectorStore(manager=None)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.create_task(store.run("slow", release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await store.run("queued", lambda: "never")
+        release.set()
+        assert await busy is True
+
+    asyncio.run(scenario())
+    stats = store.stats()
+    assert stats["queued"]["timeouts"] == 1 and stats["queued"]["calls"] == 0
+    assert stats["slow"]["calls"] == 1
+
+
+def test_call_timeout_keeps_slot_until_thread_finishes(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_CALL_TIMEOUT", 0.05)
+    store = AsyncVectorStore(manager=None)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await store.run("slow", release.wait, 5)
+        # Thread vẫn chạy → slot chưa được trả
+        assert async_vector._get_semaphore().locked()
+
+        release.set()
+        assert await store.run("next", lambda: 42) == 42
+        assert not async_vector._get_semaphore().locked()
+
+    asyncio.run(scenario())
+    stats = store.stats()
+    assert stats["slow"]["timeouts"] == 1 and stats["slow"]["calls"] == 1
+    assert stats["next"]["calls"] == 1
+
+
+def test_errors_release_the_slot():
+    store = AsyncVectorStore(manager=None)
+
+    async def scenario():
+        with pytest.raises(ZeroDivisionError):
+            await store.run("broken", lambda: 1 / 0)
+        return await store.run("ok", lambda: "done")
+
+    assert asyncio.run(scenario()) == "done"
+    assert store.stats()["broken"]["errors"] == 1
+
+
+def test_metrics_percentiles():
+    m = LatencyMetrics(window=100)
+    for ms in range(1, 101):
+        m.record("q", float(ms), queue_ms=1.0, error=ms == 100)
+    m.record_timeout("q")
+
+    s = m.snapshot()["q"]
+    assert (s["calls"], s["errors"], s["timeouts"]) == (100, 1, 1)
+    assert (s["p50_ms"], s["p95_ms"], s["max_ms"]) == (51.0, 96.0, 100.0)
+    assert s["avg_ms"] == 50.5 and s["avg_queue_ms"] == 1.0
+
+    # Cửa sổ chỉ giữ các lần gọi gần nhất
+    small = LatencyMetrics(window=2)
+    for ms in (1000.0, 1.0, 2.0):
+        small.record("q", ms, queue_ms=0.0)
+    assert small.snapshot()["q"]["p95_ms"] == 2.0
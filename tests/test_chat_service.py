@@ -0,0 +1,88 @@
+# tests/test_chat_service.py
+# Luồng tri thức của ChatService: answer cache → FAQ (qa_index) → RAG
+
+import asyncio
+import sys
+import types
+
+import pytest
+
+import services.chat_service as chat_service
+from models.qa_index import QAIndex
+from models.tokenizer import normalize_text
+from services.answer_cache import AnswerCache
+from services.chat_service import ChatService
+
+PRICE = "**Q:** Giá gói Pro bao nhiêu?\n**A:** Gói Pro có giá 30 USD mỗi tháng."
+RAG_ANSWER = "Câu trả lời lấy từ tài liệu qua retrieval, đủ dài để không bị thay thế."
+
+
+class LoadedCorpus:
+    loaded = True
+
+
+@pytest.fixture
+def flow(monkeypatch):
+    saved = []
+    # models.db / models.gemini_analyzer được import lười trong handle_knowledge_flow
+    monkeypatch.setitem(sys.modules, "models.db", types.SimpleNamespace(
+        save_message=lambda role, text, session_id: saved.append((role, text)),
+    ))
+    monkeypatch.setitem(sys.modules, "models.gemini_analyzer", types.SimpleNamespace(
+        translate_text=lambda text, lang: text,
+    ))
+
+    qa = QAIndex(threshold=0.5)
+    qa.add(["c1"], [PRICE], [{"source": "faq.md"}])
+    lookups = []
+
+    def lookup(query):
+        lookups.append(query)
+        return qa.lookup(query)
+
+    monkeypatch.setattr(chat_service, "qa_index", types.SimpleNamespace(lookup=lookup))
+    monkeypatch.setattr(chat_service, "corpus_state", LoadedCorpus())
+    monkeypatch.setattr(chat_service, "answer_cache", AnswerCache())
+
+    rag = []
+
+    async def answer_from_corpus(self, query_vi, query_tokens, session_id):
+        rag.append(query_vi)
+        return RAG_ANSWER, True
+
+    monkeypatch.setattr(ChatService, "_answer_from_corpus", answer_from_corpus)
+
+    service = ChatService(resources=object())
+
+    def ask(message):
+        state = {"language": "vi", "deny_count": 0}
+        return asyncio.run(service.handle_knowledge_flow(message, state, "s1"))
+
+    return types.SimpleNamespace(ask=ask, lookups=lookups, rag=rag, saved=saved)
+
+
+def test_faq_hit_skips_rag_then_answer_cache_skips_faq(flow):
+    message = "  Giá gói Pro bao nhiêu??  "
+    first = flow.ask(message)
+
+    assert "30 USD" in first["response"]
+    # FAQ tra bằng câu đã chuẩn hoá, không phải message thô
+    assert flow.lookups == [normalize_text(message)]
+    assert flow.rag == []
+
+    second = flow.ask(message)
+    assert second["response"] == first["response"]
+    assert len(flow.lookups) == 1 and flow.rag == []
+    assert flow.saved == [("bot", first["response"])] * 2
+
+
+def test_faq_miss_falls_back_to_rag_and_caches(flow):
+    message = "Cách cấu hình proxy socks5 cho profile"
+    first = flow.ask(message)
+
+    assert RAG_ANSWER in first["response"]
+    assert flow.lookups == [normalize_text(message)]
+    assert flow.rag == [normalize_text(message)]
+
+    flow.ask(message)
+    assert len(flow.lookups) == 1 and len(flow.rag) == 1
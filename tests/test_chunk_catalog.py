@@ -0,0 +1,67 @@
+# tests/test_chunk_catalog.py
+# Bảng thông tin chunk tính sẵn: trích câu trả lời + đồng bộ thêm / xoá
+
+from models.chunk_catalog import (
+    ChunkCatalog,
+    best_answer,
+    content_hash,
+    extract_answer_text,
+    is_answerable,
+)
+
+FAQ = "## MỤC: Tài khoản\n**Q:** Đổi mật khẩu thế nào?\n**A:** Vào **Cài đặt** → Bảo mật → Đổi mật khẩu."
+
+
+def test_extract_answer_text():
+    assert extract_answer_text(FAQ) == "Vào Cài đặt → Bảo mật → Đổi mật khẩu."
+    assert extract_answer_text("### Tiêu đề\n- dòng một\n- dòng hai") == "Tiêu đề\n• dòng một\n• dòng hai"
+
+
+def test_is_answerable():
+    assert not is_answerable("---")
+    assert not is_answerable("quá ngắn")
+    assert is_answerable("Đủ dài để làm câu trả lời")
+
+
+def test_content_hash_is_stable_and_prefers_metadata():
+    assert content_hash("abc") == content_hash("abc") != content_hash("abd")
+
+    catalog = ChunkCatalog()
+    catalog.add(["x", "y"], ["abc", "abc"], [{"content_hash": 42}, None])
+    assert catalog.hash_of("x") == 42
+    assert catalog.hash_of("y") == content_hash("abc")
+    assert catalog.hash_of("missing") == content_hash("missing")
+
+
+def test_add_remove_clear_keep_source_map_consistent():
+    catalog = ChunkCatalog()
+    catalog.add(["a1", "a2", "b1"], [FAQ, FAQ, FAQ], [{"source": "a.md"}, {"source": "a.md"}, {"source": "b.md"}])
+    assert len(catalog) == 3
+
+    # Thay chunk sang source khác → không còn nằm trong source cũ
+    catalog.add(["a2"], [FAQ], [{"source": "b.md"}])
+    catalog.remove_source("a.md")
+    assert catalog.get("a1") is None
+    assert catalog.get("a2").source == "b.md"
+
+    catalog.remove_ids(["a2", "b1"])
+    assert len(catalog) == 0
+    assert catalog._by_source == {}
+
+    catalog.add(["c1"], [FAQ], [{"source": "c.md"}])
+    catalog.clear()
+    assert len(catalog) == 0 and catalog._by_source == {}
+
+
+def test_best_answer_prefers_soft_match_and_skips_invalid():
+    catalog = ChunkCatalog()
+    catalog.add(
+        ["bad", "first", "match"],
+        ["---", "Nội dung chung về sản phẩm Hidemium", "Hướng dẫn cấu hình proxy cho profile"],
+    )
+    infos = catalog.get_many(["bad", "first", "match"])
+    tokens = [frozenset(), frozenset({"sản", "phẩm"}), frozenset({"proxy", "profile"})]
+
+    assert best_answer(infos, tokens) == "Nội dung chung về sản phẩm Hidemium"
+    assert best_answer(infos, tokens, ["proxy"]) == "Hướng dẫn cấu hình proxy cho profile"
+    assert best_answer(catalog.get_many(["first", "unknown"]), tokens[:2]) is None
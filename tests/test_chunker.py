@@ -0,0 +1,100 @@
+# tests/test_chunker.py
+# Chia chunk markdown theo cấu trúc + token (tokenizer regex, không cần model)
+
+import pytest
+
+from config import config
+from services.chunker import _RegexTokenizer, embed_token_limit, iter_markdown_chunks
+
+TOK = _RegexTokenizer()
+
+
+def _chunks(text, max_tokens=64, overlap=0, pieces=None):
+    blocks = pieces if pieces is not None else [text]
+    return list(iter_markdown_chunks(blocks, max_tokens, overlap, tokenizer=TOK))
+
+
+def _words(n, start=0):
+    return " ".join(f"w{i}" for i in range(start, start + n))
+
+
+def test_token_count_is_exact_and_within_limit():
+    text = "# Tiêu đề\n\n" + "\n\n".join(_words(20, i * 20) for i in range(10))
+    chunks = _chunks(text, max_tokens=64)
+
+    assert len(chunks) > 1
+    for c in chunks:
+        assert c.token_count == TOK.count_many([c.text])[0]
+        assert c.token_count <= 64
+
+
+def test_every_chunk_of_a_section_carries_its_heading():
+    text = "# A\n\n" + "\n\n".join(_words(20, i * 20) for i in range(4)) + "\n\n## B\n\nnội dung B"
+    chunks = _chunks(text, max_tokens=32)
+
+    assert [c.title for c in chunks] == ["A"] * (len(chunks) - 1) + ["B"]
+    assert all(c.text.startswith("# A\n\n") for c in chunks[:-1])
+    assert chunks[-1].text == "## B\n\nnội dung B"
+    assert chunks[-1].heading_level == 2
+
+
+def test_blocks_are_not_split_when_they_fit():
+    code = "```python\nx = 1\n\ny = 2\n```"
+    text = f"intro\n\n{code}\n\n- một\n- hai"
+    chunks = _chunks(text, max_tokens=64)
+
+    assert len(chunks) == 1
+    assert code in chunks[0].text
+    assert chunks[0].chunk_type == "text"
+
+
+def test_qa_pair_stays_together():
+    qa = "**Q:** Đổi mật khẩu?\n\n**A:** Vào Cài đặt.\n\n- bước một\n- bước hai"
+    text = f"# FAQ\n\n{_words(10)}\n\n{qa}\n\n**Q:** Câu khác?\n\n**A:** Trả lời khác."
+    chunks = _chunks(text, max_tokens=40)
+
+    qa_chunks = [c for c in chunks if c.chunk_type == "qa"]
+    assert any(qa in c.text for c in qa_chunks)
+    assert all("**Q:**" not in c.text for c in chunks if c.chunk_type == "text")
+
+
+def test_oversized_block_is_split_on_word_boundaries_with_overlap():
+    text = _words(100)
+    chunks = _chunks(text, max_tokens=30, overlap=5)
+
+    assert all(c.token_count <= 30 for c in chunks)
+    words = [c.text.split() for c in chunks]
+    assert words[0][0] == "w0" and words[-1][-1] == "w99"
+    for prev, cur in zip(words, words[1:]):
+        assert cur[0] in prev[-5:]
+    assert set(w for ws in words for w in ws) == set(text.split())
+
+
+def test_overlap_repeats_whole_trailing_blocks():
+    paras = [_words(8, i * 8) for i in range(6)]
+    chunks = _chunks("\n\n".join(paras), max_tokens=24, overlap=8)
+
+    for prev, cur in zip(chunks, chunks[1:]):
+        last = prev.text.split("\n\n")[-1]
+        assert cur.text.startswith(last)
+
+
+def test_streamed_blocks_give_same_chunks_as_whole_text():
+    text = "# T\n\n" + "\n\n".join(_words(15, i * 15) for i in range(8))
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert _chunks(text, pieces=pieces) == _chunks(text)
+
+
+def test_embed_token_limit_clamps_to_model(monkeypatch):
+    monkeypatch.setattr(config.settings, "EMBEDDING_MAX_TOKENS", 128)
+    assert embed_token_limit(64) == 64
+    assert embed_token_limit(128) == 126
+    assert embed_token_limit(512) == 126
+
+    chunks = _chunks(_words(400), max_tokens=512)
+    assert max(c.token_count for c in chunks) == 126
+
+
+@pytest.mark.parametrize("text", ["", "\n\n", "# Chỉ có tiêu đề"])
+def test_empty_content_gives_no_chunks(text):
+    assert _chunks(text) == []
@@ -0,0 +1,42 @@
+# tests/test_config_service.py
+# Re-ingest khi đổi chunk size: không reset collection, chỉ embed chunk chưa từng thấy
+
+import pytest
+
+import services.chunker as chunker
+from config import config
+from models.corpus import CorpusState
+from services.config_service import ConfigService
+from services.resources import Resources
+
+DOC = "\n\n".join(
+    f"## Mục {i}\n" + " ".join(f"từ{i}_{j}" for j in range(120)) for i in range(2)
+)
+
+
+@pytest.fixture
+def service(ingest_env, monkeypatch, tmp_path):
+    monkeypatch.setattr(config.settings, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(chunker, "_tokenizer", chunker._RegexTokenizer())
+    state = CorpusState()
+    state.register(ingest_env.registry)
+    monkeypatch.setattr("services.config_service.corpus_state", state)
+    (tmp_path / "guide.md").write_text(DOC, encoding="utf-8")
+    return ConfigService(Resources({"vector": lambda: ingest_env.manager}))
+
+
+def test_reingest_only_embeds_chunks_never_seen(service, ingest_env):
+    first = service.reingest_all(chunk_size=64, chunk_overlap=0)
+    assert first["files"] == 1 and first["embedded"] == first["chunks"] > 1
+    ingest_env.embedded.clear()
+
+    again = service.reingest_all(chunk_size=64, chunk_overlap=0)
+    assert again["embedded"] == 0 and again["unchanged"] == again["chunks"]
+
+    # Chunk lớn hơn → chunk mới được embed; quay lại size cũ → dùng lại kho embedding
+    bigger = service.reingest_all(chunk_size=256, chunk_overlap=0)
+    assert bigger["removed"] == first["chunks"]
+    ingest_env.embedded.clear()
+    back = service.reingest_all(chunk_size=64, chunk_overlap=0)
+    assert back["embedded"] == 0 and back["reused"] == first["chunks"]
+    assert ingest_env.collection.count() == first["chunks"]
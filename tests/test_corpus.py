@@ -0,0 +1,128 @@
+# tests/test_corpus.py
+# Đồng bộ chỉ mục phụ với collection qua CorpusState
+
+from models.corpus import CorpusState
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows = {}
+        self.full_reads = 0
+
+    def get(self, ids=None, where=None, include=None):
+        if ids is None and where is None:
+            self.full_reads += 1
+        keys = [
+            k for k, (_, meta) in self.rows.items()
+            if (ids is None or k in ids)
+            and all(meta.get(f) == v for f, v in (where or {}).items())
+        ]
+        return {
+            "ids": keys,
+            "documents": [self.rows[k][0] for k in keys],
+            "metadatas": [self.rows[k][1] for k in keys],
+        }
+
+
+class FakeManager:
+    def __init__(self):
+        self.collection = FakeCollection()
+
+    def get_collection(self):
+        return self.collection
+
+
+class RecordingListener:
+    def __init__(self):
+        self.docs = {}
+
+    def add(self, ids, docs, metas):
+        for key, doc, meta in zip(ids, docs, metas):
+            self.docs[key] = (doc, meta.get("source"))
+
+    def remove_ids(self, ids):
+        for key in ids:
+            self.docs.pop(key, None)
+
+    def remove_source(self, source):
+        for key in [k for k, (_, s) in self.docs.items() if s == source]:
+            del self.docs[key]
+
+    def clear(self):
+        self.docs.clear()
+
+
+def _setup():
+    state = CorpusState()
+    listener = RecordingListener()
+    state.register(listener)
+    state.register(listener)
+    manager = FakeManager()
+    manager.collection.rows = {
+        "a1": ("alpha", {"source": "a.md"}),
+        "b1": ("beta", {"source": "b.md"}),
+    }
+    return state, listener, manager
+
+
+def test_ensure_loaded_reads_collection_once():
+    state, listener, manager = _setup()
+    state.ensure_loaded(manager)
+    state.ensure_loaded(manager)
+    assert manager.collection.full_reads == 1
+    assert set(listener.docs) == {"a1", "b1"}
+
+
+def test_source_added_replaces_only_that_source():
+    state, listener, manager = _setup()
+    state.ensure_loaded(manager)
+    gen = state.generation
+
+    manager.collection.rows.pop("a1")
+    manager.collection.rows["a2"] = ("alpha v2", {"source": "a.md"})
+    state.source_added("a.md", manager)
+
+    assert listener.docs == {"b1": ("beta", "b.md"), "a2": ("alpha v2", "a.md")}
+    assert manager.collection.full_reads == 1
+    assert state.generation == gen + 1
+
+
+def test_removals_and_reset():
+    state, listener, manager = _setup()
+    state.ensure_loaded(manager)
+
+    state.chunks_removed(["b1"])
+    assert set(listener.docs) == {"a1"}
+    state.source_removed("a.md")
+    assert listener.docs == {}
+
+    state.reset()
+    assert not state.loaded
+    state.ensure_loaded(manager)
+    assert set(listener.docs) == {"a1", "b1"}
+
+
+def test_changes_before_load_only_bump_generation():
+    state, listener, manager = _setup()
+    state.source_added("a.md", manager)
+    assert listener.docs == {}
+    assert manager.collection.full_reads == 0
+    assert state.generation == 1
+
+
+def test_late_listener_is_backfilled_alone():
+    state, listener, manager = _setup()
+    state.ensure_loaded(manager)
+    listener.docs["stale"] = ("kept", "x.md")
+
+    late = RecordingListener()
+    state.register(late)
+    assert state.loaded and late.docs == {}
+
+    state.ensure_loaded(manager)
+    assert set(late.docs) == {"a1", "b1"}
+    # Listener đã nạp không bị clear / nạp lại
+    assert "stale" in listener.docs
+    assert manager.collection.full_reads == 2
+    state.ensure_loaded(manager)
+    assert manager.collection.full_reads == 2
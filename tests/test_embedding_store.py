@@ -0,0 +1,103 @@
+# tests/test_embedding_store.py
+# Kho embedding theo hash nội dung (append-only, memmap)
+
+import numpy as np
+
+from models.embedding_store import EmbeddingStore
+
+MODEL = "test-model"
+
+
+def _vec(seed, dim=4):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def test_put_and_get(tmp_path):
+    store = EmbeddingStore(root=tmp_path, model=MODEL)
+    assert store.get_many([1, 2]) == {}
+
+    assert store.put_many([(1, _vec(1)), (2, _vec(2))]) == 2
+    got = store.get_many([2, 1, 3])
+    assert set(got) == {1, 2}
+    np.testing.assert_array_equal(got[1], _vec(1))
+    np.testing.assert_array_equal(got[2], _vec(2))
+
+
+def test_existing_hashes_are_not_written_again(tmp_path):
+    store = EmbeddingStore(root=tmp_path, model=MODEL)
+    store.put_many([(1, _vec(1))])
+    assert store.put_many([(1, _vec(9)), (2, _vec(2)), (2, _vec(8))]) == 1
+    assert len(store) == 2
+    np.testing.assert_array_equal(store.get_many([1])[1], _vec(1))
+    np.testing.assert_array_equal(store.get_many([2])[2], _vec(2))
+
+
+def test_other_process_writes_are_visible(tmp_path):
+    reader = EmbeddingStore(root=tmp_path, model=MODEL)
+    writer = EmbeddingStore(root=tmp_path, model=MODEL)
+    writer.put_many([(5, _vec(5))])
+    np.testing.assert_array_equal(reader.get_many([5])[5], _vec(5))
+
+
+def test_wrong_dimension_is_skipped(tmp_path):
+    store = EmbeddingStore(root=tmp_path, model=MODEL)
+    store.put_many([(1, _vec(1))])
+    assert store.put_many([(2, _vec(2, dim=8))]) == 0
+    assert store.get_many([2]) == {}
+
+
+def test_models_and_dtypes_are_separate(tmp_path):
+    EmbeddingStore(root=tmp_path, model=MODEL).put_many([(1, _vec(1))])
+    assert EmbeddingStore(root=tmp_path, model="other").get_many([1]) == {}
+
+    half = EmbeddingStore(root=tmp_path, model=MODEL, dtype="float16")
+    half.put_many([(1, _vec(1))])
+    np.testing.assert_allclose(half.get_many([1])[1], _vec(1), atol=1e-2)
+
+
+# =========================
+# PHỤC HỒI SAU CRASH
+# =========================
+
+def _files(store):
+    return store._vec_path, store._idx_path
+
+
+def test_torn_vector_tail_is_truncated(tmp_path):
+    store = EmbeddingStore(root=tmp_path, model=MODEL)
+    store.put_many([(1, _vec(1))])
+    vec_path, _ = _files(store)
+    # Crash giữa lúc ghi vector: có byte vector nhưng chưa có hash
+    with open(vec_path, "ab") as f:
+        f.write(_vec(7).tobytes()[:10])
+
+    reopened = EmbeddingStore(root=tmp_path, model=MODEL)
+    assert len(reopened) == 1
+    reopened.put_many([(2, _vec(2))])
+
+    fresh = EmbeddingStore(root=tmp_path, model=MODEL)
+    np.testing.assert_array_equal(fresh.get_many([1])[1], _vec(1))
+    np.testing.assert_array_equal(fresh.get_many([2])[2], _vec(2))
+    assert vec_path.stat().st_size == 2 * 4 * 4
+
+
+def test_torn_index_tail_is_truncated(tmp_path):
+    store = EmbeddingStore(root=tmp_path, model=MODEL)
+    store.put_many([(1, _vec(1))])
+    vec_path, idx_path = _files(store)
+    # Crash giữa lúc ghi hash: vector hàng 2 đã ghi đủ, hash mới được 3 byte
+    with open(vec_path, "ab") as f:
+        f.write(_vec(7).tobytes())
+    with open(idx_path, "ab") as f:
+        f.write(b"\x07\x00\x00")
+
+    reopened = EmbeddingStore(root=tmp_path, model=MODEL)
+    assert len(reopened) == 1
+    assert reopened.put_many([(2, _vec(2)), (3, _vec(3))]) == 2
+    assert idx_path.stat().st_size == 3 * 8
+
+    fresh = EmbeddingStore(root=tmp_path, model=MODEL)
+    assert fresh.get_many([7]) == {}
+    for key in (1, 2, 3):
+        np.testing.assert_array_equal(fresh.get_many([key])[key], _vec(key))
+
@@ -0,0 +1,107 @@
+# tests/test_embeddings.py
+# Micro-batcher embed câu truy vấn + cache LRU vector câu truy vấn
+
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+import pytest
+
+from models.embeddings import EmbeddingBatcher, QueryEmbeddingCache
+
+
+def _fake_embed(texts):
+    return np.array([[len(t), i] for i, t in enumerate(texts)], dtype=np.float32)
+
+
+def test_batcher_groups_concurrent_requests():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return _fake_embed(texts)
+
+    batcher = EmbeddingBatcher(embed, max_batch_size=8, max_wait_ms=50)
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def worker(text):
+        barrier.wait()
+        results[text] = batcher.submit(text).result(timeout=5)
+
+    threads = [threading.Thread(target=worker, args=("x" * n,)) for n in range(1, 5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(len(c) for c in calls) == 4
+    assert len(calls) < 4
+    assert all(results[text][0] == len(text) for text in results)
+    assert batcher.stats()["items"] == 4
+
+
+def test_batcher_respects_max_batch_size_and_propagates_errors():
+    batcher = EmbeddingBatcher(_fake_embed, max_batch_size=2, max_wait_ms=20)
+    vectors = batcher.embed(["a", "bb", "ccc"])
+    assert vectors[:, 0].tolist() == [1, 2, 3]
+    assert batcher.stats()["batches"] >= 2
+
+    def broken(texts):
+        raise RuntimeError("onnx down")
+
+    with pytest.raises(RuntimeError, match="onnx down"):
+        EmbeddingBatcher(broken, max_wait_ms=0).embed(["a"])
+
+
+def test_batcher_fails_every_caller_when_rows_are_missing():
+    batcher = EmbeddingBatcher(lambda texts: _fake_embed(texts)[:1], max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(t) for t in ("a", "bb", "ccc")]
+    for fut in futures:
+        with pytest.raises(RuntimeError, match="vectors for"):
+            fut.result(timeout=5)
+
+
+def test_batcher_wait_is_bounded():
+    release = threading.Event()
+
+    def slow(texts):
+        release.wait(5)
+        return _fake_embed(texts)
+
+    batcher = EmbeddingBatcher(slow, max_wait_ms=0, timeout=0.05)
+    with pytest.raises(FutureTimeout):
+        batcher.embed(["a"])
+    release.set()
+
+
+def test_query_cache_lru_eviction_reuses_rows():
+    cache = QueryEmbeddingCache(maxsize=2)
+    cache.put("a", np.array([1, 0], dtype=np.float32))
+    cache.put("b", np.array([0, 1], dtype=np.float32))
+    assert cache.get("a").tolist() == [1, 0]
+
+    cache.put("c", np.array([1, 1], dtype=np.float32))
+    assert cache.get("b") is None
+    assert cache.get("a").tolist() == [1, 0]
+    assert cache.get("c").tolist() == [1, 1]
+
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (2, 3, 1)
+    assert stats["bytes"] == 2 * 2 * 4
+
+
+def test_query_cache_returns_copies_and_clears():
+    cache = QueryEmbeddingCache(maxsize=4)
+    cache.put("a", np.array([1, 2], dtype=np.float32))
+    got = cache.get("a")
+    got[0] = 99
+    assert cache.get("a").tolist() == [1, 2]
+
+    cache.put("a", np.array([3, 4], dtype=np.float32))
+    assert cache.get("a").tolist() == [3, 4]
+
+    cache.clear()
+    assert cache.get("a") is None
+    cache.put("b", np.array([5, 6], dtype=np.float32))
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,115 @@
+# tests/test_flat_index.py
+# Chỉ mục vector phẳng: top-k chính xác + thêm / xoá / clear giữ ma trận liền
+
+import numpy as np
+import pytest
+
+from models.flat_index import FlatIndex, quantize_int8
+
+DIM = 16
+
+
+def _vectors(n, seed=0):
+    v = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def get(self, ids=None, include=None):
+        self.calls.append(list(ids))
+        found = [cid for cid in ids if cid in self.docs]
+        return {"ids": found, "documents": [self.docs[cid] for cid in found]}
+
+
+COLL = FakeCollection({f"c{i}": f"doc {i}" for i in range(12)})
+
+
+def _index(n=12, dtype="float32", capacity=4):
+    vectors = _vectors(n)
+    ids = [f"c{i}" for i in range(n)]
+    metas = [{"source": f"s{i % 3}.md"} for i in range(n)]
+    index = FlatIndex(dtype=dtype, capacity=capacity)
+    index.add_vectors(ids, metas, vectors)
+    return index, dict(zip(ids, vectors)), dict(zip(ids, metas))
+
+
+def _brute_force(vectors, query, k, keep=None):
+    ids = [cid for cid in vectors if keep is None or keep(cid)]
+    scores = np.array([vectors[cid] @ query for cid in ids])
+    return [ids[i] for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_query_matches_brute_force(dtype):
+    index, vectors, _ = _index(dtype=dtype)
+    queries = _vectors(3, seed=1)
+    coll = FakeCollection(COLL.docs)
+    result = index.query(queries, n_results=4, space="cosine", collection=coll)
+
+    # Một lần get cho mọi câu truy vấn, chỉ các id trong top-k
+    assert len(coll.calls) == 1
+    assert set(coll.calls[0]) == {cid for ids in result["ids"] for cid in ids}
+    for col, q in enumerate(queries):
+        assert result["ids"][col] == _brute_force(vectors, q, 4)
+        want = [1.0 - vectors[cid] @ q for cid in result["ids"][col]]
+        assert result["distances"][col] == pytest.approx(want, abs=2e-2 if dtype == "int8" else 1e-3)
+        assert result["documents"][col] == [f"doc {cid[1:]}" for cid in result["ids"][col]]
+
+
+def test_where_filter_and_unsupported_operators():
+    index, vectors, metas = _index()
+    q = _vectors(1, seed=2)[0]
+    result = index.query(q, n_results=3, where={"source": "s1.md"}, collection=COLL)
+    assert result["ids"][0] == _brute_force(vectors, q, 3, keep=lambda cid: metas[cid]["source"] == "s1.md")
+    assert index.query(q, n_results=3, where={"source": {"$in": ["s1.md"]}}) is None
+
+
+def test_remove_keeps_remaining_rows_addressable():
+    index, vectors, metas = _index()
+    index.remove_ids(["c0", "c5"])
+    index.remove_source("s2.md")
+    for cid in ["c0", "c5"] + [c for c, m in metas.items() if m["source"] == "s2.md"]:
+        vectors.pop(cid, None)
+
+    assert len(index) == len(vectors)
+    assert set(index._row_of) == set(vectors)
+    assert all(index._ids[row] == cid for cid, row in index._row_of.items())
+    assert all(index._metas[row] is metas[cid] for cid, row in index._row_of.items())
+    assert set(index._by_source) == {"s0.md", "s1.md"}
+
+    q = _vectors(1, seed=3)[0]
+    assert index.query(q, n_results=5, collection=COLL)["ids"][0] == _brute_force(vectors, q, 5)
+
+
+def test_replacing_an_id_and_emptying_a_source():
+    index, vectors, _ = _index(n=3)
+    new = _vectors(1, seed=9)
+    index.add_vectors(["c1"], [{"source": "s9.md"}], new)
+
+    assert len(index) == 3
+    assert index._by_source == {"s0.md": {"c0"}, "s9.md": {"c1"}, "s2.md": {"c2"}}
+    coll = FakeCollection({"c1": "doc 1 v2"})
+    assert index.query(new[0], n_results=1, collection=coll)["documents"][0] == ["doc 1 v2"]
+
+    index.remove_ids(["c1"])
+    assert "s9.md" not in index._by_source
+
+
+def test_clear_and_empty_query():
+    index, _, _ = _index()
+    index.clear()
+    assert len(index) == 0 and index.dim is None
+    result = index.query(_vectors(2), n_results=3)
+    assert result["ids"] == [[], []]
+
+
+def test_quantize_int8_roundtrip():
+    v = _vectors(5)
+    v[0] = 0.0
+    q, scale = quantize_int8(v)
+    assert q.dtype == np.int8
+    np.testing.assert_allclose(q * scale[:, None], v, atol=1.0 / 127)
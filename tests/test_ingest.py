@@ -0,0 +1,115 @@
+# tests/test_ingest.py
+# Ingest theo hash nội dung: id ổn định, chỉ embed chunk mới, xoá chunk cũ
+
+from models.chunk_catalog import content_hash
+from models.embedding_store import EmbeddingStore
+from models.ingest import chunk_id, ingest_stream
+
+A = "## Cài đặt\nTải bộ cài từ trang chủ rồi chạy file setup."
+B = "## Đăng nhập\nDùng email đã đăng ký để đăng nhập."
+C = "## Proxy\nHỗ trợ HTTP, HTTPS và SOCKS5."
+D = "## Gói cước\nGói Pro có giá 30 USD mỗi tháng."
+
+
+def _ids(source, *texts):
+    return {chunk_id(source, content_hash(t)) for t in texts}
+
+
+def _stored_ids(env, source):
+    return set(env.collection.get(where={"source": source}, include=[])["ids"])
+
+
+def test_first_ingest_embeds_each_chunk_once(ingest_env):
+    progress = []
+    stats = ingest_stream(
+        ingest_env.manager, "a.md", [A, B, C, A, "   "],
+        batch_size=2, on_progress=progress.append,
+    )
+
+    assert (stats["chunks"], stats["embedded"], stats["reused"]) == (3, 3, 0)
+    assert (stats["unchanged"], stats["removed"]) == (0, 0)
+    assert ingest_env.embedded == [A, B, C]
+    assert _stored_ids(ingest_env, "a.md") == _ids("a.md", A, B, C)
+    assert [p["chunks"] for p in progress] == [2, 3]
+
+    metas = ingest_env.collection.get(where={"source": "a.md"}, include=["metadatas"])["metadatas"]
+    hashes = sorted(m["content_hash"] for m in metas)
+    assert hashes == sorted(content_hash(t) for t in (A, B, C))
+    assert set(ingest_env.store.get_many(hashes)) == set(hashes)
+
+
+def test_reingest_without_changes_embeds_nothing(ingest_env):
+    ingest_stream(ingest_env.manager, "a.md", [A, B, C])
+    ingest_env.embedded.clear()
+
+    stats = ingest_stream(ingest_env.manager, "a.md", [A, B, C])
+    assert (stats["chunks"], stats["embedded"], stats["reused"]) == (3, 0, 0)
+    assert (stats["unchanged"], stats["removed"]) == (3, 0)
+    assert ingest_env.embedded == []
+    assert ingest_env.collection.count() == 3
+
+
+def test_edited_file_embeds_new_chunks_and_drops_stale_ones(ingest_env):
+    ingest_stream(ingest_env.manager, "a.md", [A, B, C])
+    ingest_stream(ingest_env.manager, "b.md", [C])
+    ingest_env.embedded.clear()
+
+    b2 = B.replace("email", "số điện thoại")
+    stats = ingest_stream(ingest_env.manager, "a.md", [A, b2, D])
+
+    assert (stats["chunks"], stats["embedded"], stats["unchanged"], stats["removed"]) == (3, 2, 1, 2)
+    assert ingest_env.embedded == [b2, D]
+    assert _stored_ids(ingest_env, "a.md") == _ids("a.md", A, b2, D)
+    # Chunk cùng nội dung ở file khác không bị xoá theo
+    assert _stored_ids(ingest_env, "b.md") == _ids("b.md", C)
+
+
+def test_new_chunks_reuse_embeddings_from_store_then_collection(ingest_env, monkeypatch, tmp_path):
+    ingest_stream(ingest_env.manager, "a.md", [A, B])
+    ingest_env.embedded.clear()
+
+    # Cùng nội dung ở file khác → embedding lấy từ kho theo hash
+    stats = ingest_stream(ingest_env.manager, "b.md", [A, B])
+    assert (stats["embedded"], stats["reused"]) == (0, 2)
+    assert ingest_env.embedded == []
+
+    # Kho trống (vd. đổi thư mục cache) → lấy từ collection và ghi bổ sung vào kho
+    store = EmbeddingStore(root=tmp_path / "fresh")
+    monkeypatch.setattr("models.ingest.embedding_store", store)
+    stats = ingest_stream(ingest_env.manager, "c.md", [A, C])
+    assert (stats["embedded"], stats["reused"]) == (1, 1)
+    assert ingest_env.embedded == [C]
+    assert set(store.get_many([content_hash(A), content_hash(C)])) == {content_hash(A), content_hash(C)}
+
+    got = ingest_env.collection.get(ids=sorted(_ids("a.md", A) | _ids("c.md", A)), include=["embeddings"])
+    assert got["embeddings"][0].tolist() == got["embeddings"][1].tolist()
+
+
+class RecordingCollection:
+    def __init__(self, collection):
+        self._collection = collection
+        self.updates = []
+
+    def update(self, ids, metadatas):
+        self.updates.append(list(ids))
+        return self._collection.update(ids=ids, metadatas=metadatas)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+def test_file_hash_refreshes_metadata_only_when_the_file_changed(ingest_env):
+    ingest_stream(ingest_env.manager, "a.md", [A, B], file_hash=1)
+    ingest_env.sync("a.md")
+    recording = RecordingCollection(ingest_env.collection)
+    ingest_env.manager.collection = recording
+
+    # Cùng file_hash đã ghi → chunk không đổi không bị ghi lại metadata
+    stats = ingest_stream(ingest_env.manager, "a.md", [A, B], file_hash=1)
+    assert stats["unchanged"] == 2 and recording.updates == []
+
+    stats = ingest_stream(ingest_env.manager, "a.md", [A, C], file_hash=2)
+    assert (stats["unchanged"], stats["embedded"], stats["removed"]) == (1, 1, 1)
+    assert recording.updates == [sorted(_ids("a.md", A))]
+    metas = ingest_env.collection.get(where={"source": "a.md"}, include=["metadatas"])["metadatas"]
+    assert {m["file_hash"] for m in metas} == {2}
@@ -0,0 +1,51 @@
+# tests/test_jobs.py
+# Lưu trữ job ingest (SQLite): id do server sinh, vòng đời, chạy tiếp sau khởi động lại
+
+from models.jobs import DONE, FAILED, QUEUED, RUNNING, JobStore
+
+
+def test_ids_are_generated_server_side(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    payload = {"files": ["a.md"], "upload_id": "same-client-id"}
+    first = store.create("upload", payload)
+    second = store.create("upload", payload)
+
+    assert first != second
+    assert store.get(first)["payload"] == payload
+    assert store.get(second)["state"] == QUEUED
+
+
+def test_lifecycle(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    ok = store.create("upload", {"files": ["a.md"]})
+    bad = store.create("reingest", {})
+
+    store.mark_running(ok)
+    store.update_progress(ok, {"stage": "embedding", "done": 3})
+    job = store.get(ok)
+    assert job["state"] == RUNNING
+    assert job["progress"] == {"stage": "embedding", "done": 3}
+    assert job["duration_s"] is not None
+
+    store.finish(ok, result={"chunks": 12})
+    store.mark_running(bad)
+    store.finish(bad, error="boom")
+
+    assert store.get(ok)["state"] == DONE
+    assert store.get(ok)["result"] == {"chunks": 12}
+    assert (store.get(bad)["state"], store.get(bad)["error"]) == (FAILED, "boom")
+    assert store.get("missing") is None
+
+
+def test_unfinished_jobs_survive_a_restart(tmp_path):
+    path = tmp_path / "jobs.db"
+    store = JobStore(path)
+    queued = store.create("upload", {"n": 1})
+    running = store.create("upload", {"n": 2})
+    done = store.create("upload", {"n": 3})
+    store.mark_running(running)
+    store.finish(done, result={})
+
+    reopened = JobStore(path)
+    assert [j["id"] for j in reopened.unfinished()] == [queued, running]
+    assert [j["id"] for j in reopened.recent(limit=2)] == [done, running]
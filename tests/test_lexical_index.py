@@ -0,0 +1,85 @@
+# tests/test_lexical_index.py
+# Lexical index (BM25 tăng dần): thêm / xoá / clear phải cho kết quả
+# giống hệt chỉ mục dựng lại từ đầu
+
+import pytest
+
+from models.lexical_index import LexicalIndex
+
+DOCS = {
+    "a1": ("Hidemium tạo profile trình duyệt", "a.md"),
+    "a2": ("Cách xoá profile và đồng bộ cookie", "a.md"),
+    "b1": ("Bảng giá gói Pro và gói Team", "b.md"),
+    "b2": ("Thanh toán gói Pro bằng thẻ", "b.md"),
+    "c1": ("Proxy cho profile Hidemium", "c.md"),
+}
+QUERIES = ["profile hidemium", "gói pro", "cookie", "thẻ thanh toán", "proxy"]
+
+
+def _build(keys, **kwargs):
+    index = LexicalIndex(**kwargs)
+    index.add(
+        list(keys),
+        [DOCS[k][0] for k in keys],
+        [{"source": DOCS[k][1]} for k in keys],
+    )
+    return index
+
+
+def _assert_same_results(index, fresh):
+    for q in QUERIES:
+        got = index.search(q, top_k=10)
+        want = fresh.search(q, top_k=10)
+        assert [k for k, _ in got] == [k for k, _ in want], q
+        assert [s for _, s in got] == pytest.approx([s for _, s in want]), q
+
+
+@pytest.mark.parametrize("compact_ratio", [0.0, 0.3, 1.1])
+def test_remove_matches_fresh_build(compact_ratio):
+    index = _build(DOCS, compact_ratio=compact_ratio)
+    index.remove_ids(["a2"])
+    index.remove_source("b.md")
+
+    _assert_same_results(index, _build(["a1", "c1"]))
+    assert index.stats()["docs"] == 2
+    assert index.stats()["sources"] == 2
+
+
+def test_replacing_a_chunk_drops_its_old_terms():
+    index = _build(DOCS)
+    index.add(["c1"], ["Proxy SOCKS5"], [{"source": "c.md"}])
+
+    assert "hidemium" not in index.tokens_for("c1")
+    assert [k for k, _ in index.search("hidemium")] == ["a1"]
+
+
+def test_removing_last_chunk_of_a_source_drops_the_source():
+    index = _build(DOCS)
+    index.remove_ids(["c1"])
+    assert "c.md" not in index._by_source
+
+    index.remove_ids(["b1", "b2"])
+    assert set(index._by_source) == {"a.md"}
+
+
+def test_compaction_keeps_postings_consistent():
+    index = _build(DOCS, compact_ratio=0.0)
+    index.remove_ids(["a1", "b1"])
+
+    stats = index.stats()
+    assert stats["deleted_pending"] == 0
+    assert stats["postings"] == sum(len(index.tokens_for(k)) for k in ("a2", "b2", "c1"))
+    _assert_same_results(index, _build(["a2", "b2", "c1"]))
+
+    index.add(["a1"], [DOCS["a1"][0]], [{"source": "a.md"}])
+    _assert_same_results(index, _build(["a2", "b2", "c1", "a1"]))
+
+
+def test_clear_then_reuse():
+    index = _build(DOCS)
+    index.clear()
+    assert index.search("profile") == []
+    assert index.stats() == {"docs": 0, "deleted_pending": 0, "terms": 0, "postings": 0, "sources": 0}
+
+    index.add(["x"], ["profile"], [{"source": "x.md"}])
+    assert [k for k, _ in index.search("profile")] == ["x"]
@@ -0,0 +1,52 @@
+# tests/test_parallel_embed.py
+# Pool embed song song: giữ thứ tự batch, vector trùng embed tại chỗ,
+# từ chối worker cho vector khác embedding function của collection
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_parallel_embed import SyntheticEmbedding
+from models.parallel_embed import EmbeddingMismatch, ParallelEmbedder
+
+FACTORY = "benchmarks.bench_parallel_embed:SyntheticEmbedding"
+
+
+@pytest.fixture(scope="module")
+def embedder():
+    embedder = ParallelEmbedder(1, max_inflight=2, factory=FACTORY, reference=SyntheticEmbedding()).start()
+    yield embedder
+    embedder.shutdown()
+
+
+def test_batches_come_back_in_order_and_match_local(embedder):
+    local = SyntheticEmbedding()
+    batches = [["tạo profile"], [], ["proxy cho profile", "cookie"], ["api"]]
+
+    results = list(embedder.map_ordered(enumerate(batches)))
+
+    assert [payload for payload, _ in results] == [0, 1, 2, 3]
+    assert results[1][1].shape == (0, local.dim)
+    for (_, vectors), texts in zip(results, batches):
+        if texts:
+            np.testing.assert_allclose(vectors, local(texts), atol=1e-5)
+
+
+def test_embed_single_batch(embedder):
+    vectors = embedder.embed(["hidemium"])
+    assert vectors.shape == (1, SyntheticEmbedding().dim)
+
+
+def test_mismatched_worker_model_is_rejected():
+    def other_model(texts):
+        return SyntheticEmbedding()(texts) * -1.0
+
+    embedder = ParallelEmbedder(1, factory=FACTORY, reference=other_model)
+    with pytest.raises(EmbeddingMismatch):
+        embedder.start()
+    assert embedder._pool is None
+
+
+def test_dimension_mismatch_is_rejected():
+    embedder = ParallelEmbedder(1, factory=FACTORY, reference=lambda texts: np.zeros((len(texts), 8)))
+    with pytest.raises(EmbeddingMismatch, match="dim"):
+        embedder.start()
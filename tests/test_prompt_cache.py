@@ -0,0 +1,101 @@
+# tests/test_prompt_cache.py
+# Cache system prompt / BOT RULE: vô hiệu hoá khi lưu prompt, inject lại khi BOT RULE bị xoá
+
+import asyncio
+
+import pytest
+
+from config import config
+from services.config_service import ConfigService
+from services.prompt_cache import BOT_RULE_SOURCE, PromptCache
+from services.resources import Resources
+
+
+class FakeDB:
+    def __init__(self, prompt="v1"):
+        self.prompt = prompt
+        self.reads = 0
+
+    def get_system_prompt(self):
+        self.reads += 1
+        return self.prompt
+
+    def set_system_prompt(self, prompt):
+        self.prompt = prompt
+
+    def set_config(self, key, value):
+        pass
+
+
+class FakeManager:
+    def __init__(self):
+        self.injects = 0
+
+    def inject_bot_rule(self, force_full=False):
+        self.injects += 1
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(PromptCache, "_db", lambda self: fake)
+    return fake
+
+
+def test_system_prompt_is_read_once_until_saved(db, monkeypatch, tmp_path):
+    cache = PromptCache()
+    monkeypatch.setattr("services.config_service.prompt_cache", cache)
+    monkeypatch.setattr(config.settings, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(config.settings, "CHUNK_SIZE", config.settings.CHUNK_SIZE)
+    monkeypatch.setattr(config.settings, "CHUNK_OVERLAP", config.settings.CHUNK_OVERLAP)
+
+    assert cache.system_prompt() == "v1"
+    assert cache.system_prompt() == "v1"
+    assert db.reads == 1
+
+    service = ConfigService(Resources({"db": lambda: db}))
+    asyncio.run(service.update(config.settings.CHUNK_SIZE, config.settings.CHUNK_OVERLAP, "v2"))
+
+    assert cache.system_prompt() == "v2"
+    assert db.reads == 2
+    assert cache.stats()["prompt_hits"] == 1
+
+
+def _injected(cache):
+    manager = FakeManager()
+    cache.ensure_bot_rule(manager)
+    cache.add(["rule-0", "rule-1", "doc-0"], ["", "", ""], [
+        {"source": BOT_RULE_SOURCE}, {"source": BOT_RULE_SOURCE}, {"source": "a.md"},
+    ])
+    assert not cache.ensure_bot_rule(manager)
+    return manager
+
+
+def test_invalidate_reinjects_bot_rule():
+    cache = PromptCache()
+    manager = _injected(cache)
+    cache.invalidate("save")
+    assert cache.ensure_bot_rule(manager)
+    assert manager.injects == 2
+
+
+@pytest.mark.parametrize("drop", [
+    lambda c: c.remove_source(BOT_RULE_SOURCE),
+    lambda c: c.remove_ids(["rule-1"]),
+    lambda c: c.clear(),
+])
+def test_bot_rule_is_reinjected_after_removal(drop):
+    cache = PromptCache()
+    manager = _injected(cache)
+    drop(cache)
+    assert cache.ensure_bot_rule(manager)
+    assert manager.injects == 2
+
+
+def test_unrelated_removals_keep_bot_rule():
+    cache = PromptCache()
+    manager = _injected(cache)
+    cache.remove_ids(["doc-0"])
+    cache.remove_source("a.md")
+    assert not cache.ensure_bot_rule(manager)
+    assert manager.injects == 1
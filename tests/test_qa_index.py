@@ -0,0 +1,68 @@
+# tests/test_qa_index.py
+# Chỉ mục hỏi–đáp trực tiếp: khớp chính xác / mờ + đồng bộ thêm / xoá
+
+from models.qa_index import QAIndex, parse_qa_pairs
+
+PASSWORD = "**Q:** Làm sao đổi mật khẩu?\n**A:** Vào Cài đặt → Bảo mật → Đổi mật khẩu."
+PRICE = "**Q:** Giá gói Pro bao nhiêu?\n**A:** Gói Pro có giá 30 USD mỗi tháng."
+
+
+def _index(**chunks):
+    index = QAIndex(threshold=0.5)
+    ids = list(chunks)
+    index.add(ids, [chunks[k][0] for k in ids], [{"source": chunks[k][1]} for k in ids])
+    return index
+
+
+def test_parse_qa_pairs():
+    pairs = parse_qa_pairs(PASSWORD + "\n\n" + PRICE)
+    assert [q for q, _ in pairs] == ["Làm sao đổi mật khẩu?", "Giá gói Pro bao nhiêu?"]
+    assert pairs[1][1] == "Gói Pro có giá 30 USD mỗi tháng."
+    assert parse_qa_pairs("**Q:** Câu hỏi?\n**A:** ngắn") == []
+
+
+def test_exact_match_ignores_case_punctuation_and_diacritics():
+    index = _index(c1=(PASSWORD, "a.md"))
+    match = index.lookup("lam sao doi mat khau")
+    assert match.exact and match.score == 1.0
+    assert match.entry.chunk_id == "c1"
+
+
+def test_fuzzy_match_respects_threshold():
+    index = _index(c1=(PRICE, "a.md"))
+    assert index.lookup("giá gói Pro").entry.chunk_id == "c1"
+    assert index.lookup("giá gói Pro", threshold=0.9) is None
+    assert index.lookup("proxy socks5") is None
+
+
+def test_duplicate_question_survives_removal_of_one_chunk():
+    index = _index(c1=(PASSWORD, "a.md"), c2=(PASSWORD, "b.md"))
+    assert index.lookup("Làm sao đổi mật khẩu?").entry.chunk_id == "c1"
+
+    index.remove_ids(["c1"])
+    match = index.lookup("Làm sao đổi mật khẩu?")
+    assert match.exact and match.entry.chunk_id == "c2"
+
+    index.remove_source("b.md")
+    assert index.lookup("Làm sao đổi mật khẩu?") is None
+    assert len(index) == 0
+    assert index._exact == {} and index._postings == {} and index._by_source == {}
+
+
+def test_replacing_a_chunk_drops_its_old_pairs():
+    index = _index(c1=(PASSWORD, "a.md"))
+    index.add(["c1"], [PRICE], [{"source": "a.md"}])
+    assert len(index) == 1
+    assert index.lookup("Làm sao đổi mật khẩu?") is None
+    assert index.lookup("Giá gói Pro bao nhiêu?").entry.chunk_id == "c1"
+
+    index.add(["c1"], ["Không còn FAQ"], [{"source": "a.md"}])
+    assert len(index) == 0
+    assert index._by_source == {}
+
+
+def test_clear():
+    index = _index(c1=(PASSWORD, "a.md"), c2=(PRICE, "a.md"))
+    index.clear()
+    assert len(index) == 0
+    assert index.lookup("Giá gói Pro bao nhiêu?") is None
@@ -0,0 +1,49 @@
+# tests/test_resources.py
+# Container tài nguyên dùng chung: mở một lần, hook tắt máy chạy ngược thứ tự
+
+import threading
+
+from services.resources import Resources
+
+
+def test_each_resource_is_opened_once_across_threads():
+    opened = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            opened.append(1)
+        return object()
+
+    res = Resources({"vector": factory})
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(res.vector)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(opened) == 1
+    assert all(item is got[0] for item in got)
+
+
+def test_open_reports_only_requested_resources():
+    res = Resources({"db": object, "embedding": object})
+    report = res.open(names=("db",))
+    assert set(report) == {"db"}
+    assert report["db"]["open_ms"] >= 0
+    assert "embedding" not in res._items
+
+
+def test_close_runs_hooks_in_reverse_once_even_if_one_fails():
+    calls = []
+    res = Resources({})
+    res.add_shutdown_hook("first", lambda: calls.append("first"))
+    res.add_shutdown_hook("broken", lambda: 1 / 0)
+    res.add_shutdown_hook("last", lambda: calls.append("last"))
+
+    res.close()
+    res.close()
+
+    assert calls == ["last", "first"]
+    assert res.closed
@@ -0,0 +1,100 @@
+# tests/test_retrieval.py
+# Gộp điểm hybrid (min-max / RRF) và thứ tự MMR của retrieval
+
+import numpy as np
+import pytest
+
+import models.retrieval as retrieval
+from models.retrieval import RetrievalResult, _distance_to_similarity, fuse_scores, mmr_order
+
+
+def test_minmax_fusion():
+    dense = np.array([0.9, 0.5, 0.1], dtype=np.float32)
+    lexical = np.array([0.0, 4.0, 2.0], dtype=np.float32)
+    fused = fuse_scores(dense, lexical, alpha=0.5, method="minmax")
+    assert fused == pytest.approx([0.5, 0.75, 0.25])
+
+    # Mọi điểm bằng nhau → chỉ còn phân biệt có / không có điểm
+    flat = fuse_scores(np.array([0.4, 0.4]), np.array([0.0, 0.0]), alpha=1.0, method="minmax")
+    assert flat == pytest.approx([1.0, 1.0])
+
+
+def test_rrf_fusion_is_rank_based_and_scaled():
+    dense = np.array([0.9, 0.5, 0.1], dtype=np.float32)
+    lexical = np.array([0.0, 40.0, 20.0], dtype=np.float32)
+    fused = fuse_scores(dense, lexical, alpha=0.5, method="rrf", rrf_k=1)
+
+    want = 0.5 * np.array([1 / 2, 1 / 3, 1 / 4]) + 0.5 * np.array([0.0, 1 / 2, 1 / 3])
+    assert fused == pytest.approx(want / want.max())
+    assert fused.max() == pytest.approx(1.0)
+    # Chỉ hạng quan trọng: nhân điểm lexical không đổi kết quả
+    assert fuse_scores(dense, lexical * 10, 0.5, "rrf", 1) == pytest.approx(fused)
+
+
+def test_mmr_drops_near_duplicates_and_diversifies():
+    vectors = np.array([[1, 0, 0], [1, 0, 0], [0.8, 0.6, 0], [0, 0, 1]], dtype=np.float32)
+    relevance = np.array([1.0, 0.99, 0.9, 0.5], dtype=np.float32)
+
+    order = mmr_order(relevance, vectors, lam=0.5, dup_threshold=0.95)
+    assert order.tolist() == [0, 3, 2]
+
+    # lambda = 1, ngưỡng > 1 → giữ nguyên thứ tự relevance
+    assert mmr_order(relevance, vectors, lam=1.0, dup_threshold=1.01).tolist() == [0, 1, 2, 3]
+    assert mmr_order(relevance, vectors, lam=1.0, dup_threshold=1.01, limit=2).tolist() == [0, 1]
+
+
+def test_mmr_zero_vectors_are_never_duplicates():
+    vectors = np.zeros((3, 4), dtype=np.float32)
+    order = mmr_order(np.array([0.2, 0.9, 0.5]), vectors, lam=0.75, dup_threshold=0.95)
+    assert order.tolist() == [1, 2, 0]
+
+
+def test_distance_to_similarity():
+    d = np.array([0.0, 0.5, 2.5])
+    assert _distance_to_similarity(d, "cosine") == pytest.approx([1.0, 0.5, 0.0])
+    assert _distance_to_similarity(d, "l2") == pytest.approx([1.0, 0.75, 0.0])
+    assert _distance_to_similarity(np.array([-0.8]), "ip") == pytest.approx([0.8])
+
+
+class _Collection:
+    metadata = {"hnsw:space": "cosine"}
+
+    def __init__(self):
+        self.queried = []
+
+    def count(self):
+        return 10
+
+    def query(self, query_embeddings, n_results, where, include):
+        self.queried.append(len(query_embeddings))
+        return {
+            "ids": [["a", "x"]] * len(query_embeddings),
+            "documents": [["doc a", "doc x"]] * len(query_embeddings),
+            "metadatas": [[{}, {}]] * len(query_embeddings),
+            "distances": [[0.2, 0.4]] * len(query_embeddings),
+        }
+
+
+class _Manager:
+    def __init__(self):
+        self.coll = _Collection()
+
+    def get_collection(self):
+        return self.coll
+
+
+def test_base_result_is_fused_without_requerying(monkeypatch):
+    embedded = []
+    monkeypatch.setattr(retrieval, "embed_queries", lambda qs: embedded.extend(qs) or np.ones((len(qs), 2)))
+    monkeypatch.setattr(retrieval.corpus_state, "ensure_loaded", lambda manager: None)
+    monkeypatch.setattr(retrieval.settings, "RETRIEVAL_BACKEND", "chroma")
+    manager = _Manager()
+    base = RetrievalResult(["a", "b"], ["doc a", "doc b"], [{}, {}], np.array([1.0, 0.5], dtype=np.float32), 0.42)
+
+    res = retrieval.retrieve(manager, ["mở rộng"], alpha=1.0, mmr_lambda=1.0, base=base)
+
+    assert embedded == ["mở rộng"] and manager.coll.queried == [1]
+    # Ứng viên của base đứng đầu, chunk trùng ("a") không lặp lại
+    assert res.ids == ["a", "b", "x"]
+    assert res.top_similarity == 0.42
+    assert retrieval.retrieve(manager, [" "], base=base) is base
@@ -0,0 +1,140 @@
+# tests/test_source_registry.py
+# Danh mục file nguồn: tổng hợp theo file, đồng bộ thêm / xoá, so khớp tên file
+
+from models.source_registry import AhoCorasick, SourceRegistry, make_preview
+
+
+def _meta(source, **extra):
+    return {"source": source, **extra}
+
+
+def _registry():
+    registry = SourceRegistry()
+    registry.add(
+        ["a1", "a2", "b1"],
+        ["một hai ba", "bốn năm", "sáu"],
+        [
+            _meta("huong-dan.md", token_count=5, chunk_type="text", file_hash=1),
+            _meta("huong-dan.md", token_count=3, chunk_type="qa", file_hash=1),
+            _meta("bang-gia.md", chunk_type="table", file_hash=2),
+        ],
+    )
+    return registry
+
+
+def test_summaries_are_kept_incrementally():
+    registry = _registry()
+    assert registry.summaries() == [
+        {"source": "huong-dan.md", "chunks": 2, "tokens": 8, "chunk_types": {"text": 1, "qa": 1}},
+        {"source": "bang-gia.md", "chunks": 1, "tokens": 1, "chunk_types": {"table": 1}},
+    ]
+    assert registry.total_chunks(exclude=("bang-gia.md",)) == 2
+    assert registry.file_hash("bang-gia.md") == 2
+
+    registry.remove_ids(["a2"])
+    assert registry.summaries(exclude=("bang-gia.md",)) == [
+        {"source": "huong-dan.md", "chunks": 1, "tokens": 5, "chunk_types": {"text": 1}},
+    ]
+
+
+def test_removing_all_chunks_drops_the_source():
+    registry = _registry()
+    registry.remove_ids(["b1"])
+    assert "bang-gia.md" not in registry
+    assert registry.file_hash("bang-gia.md") is None
+
+    registry.remove_source("huong-dan.md")
+    assert registry.sources() == []
+    assert registry._id_source == {} and registry._summary == {} and registry._order == {}
+
+    registry.add(["c1"], ["bảy"], [_meta("c.md")])
+    registry.clear()
+    assert registry.sources() == [] and registry._id_source == {} and registry._order == {}
+
+
+def test_re_adding_a_chunk_moves_it():
+    registry = _registry()
+    registry.add(["b1"], ["sáu"], [_meta("huong-dan.md", token_count=1)])
+    assert registry.sources() == ["huong-dan.md"]
+    assert registry.chunk_count("huong-dan.md") == 3
+    assert registry._order == {"huong-dan.md": ["a1", "a2", "b1"]}
+
+
+def test_match_picks_longest_file_name():
+    registry = _registry()
+    assert registry.match("theo file bang-gia thì sao") == "bang-gia.md"
+    assert registry.match("không nhắc tới file nào") is None
+
+    registry.add(["d1"], ["x"], [_meta("bang-gia-team.md")])
+    assert registry.match("xem bang-gia-team giúp mình") == "bang-gia-team.md"
+
+
+def test_aho_corasick_reports_overlapping_matches():
+    matcher = AhoCorasick({"he": 1, "she": 2, "hers": 3})
+    assert sorted(matcher.iter_matches("ushers")) == [(1, 3, 2), (2, 2, 1), (2, 4, 3)]
+
+
+def test_make_preview():
+    assert make_preview("a b c", words=2) == "a b ..."
+    assert make_preview("a b", words=2) == "a b"
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def get(self, ids=None, include=None):
+        self.calls.append(list(ids))
+        keys = [k for k in ids if k in self.docs]
+        return {"ids": keys, "documents": [self.docs[k] for k in keys]}
+
+
+class FakeManager:
+    def __init__(self, docs):
+        self.collection = FakeCollection(docs)
+
+    def get_collection(self):
+        return self.collection
+
+
+def test_registry_does_not_keep_chunk_text():
+    registry = _registry()
+    assert all(not hasattr(c, "text") for chunks in registry._chunks.values() for c in chunks.values())
+
+
+def test_page_fetches_content_only_for_that_page():
+    registry = _registry()
+    manager = FakeManager({"a1": "một hai ba", "a2": "bốn năm", "b1": "sáu"})
+
+    page = registry.page("huong-dan.md", offset=1, limit=1)
+    assert page["total"] == 2
+    assert [c["id"] for c in page["chunks"]] == ["a2"]
+    assert "content" not in page["chunks"][0]
+
+    page = registry.page("huong-dan.md", offset=1, limit=1, manager=manager)
+    assert page["chunks"][0]["content"] == "bốn năm"
+    assert manager.collection.calls == [["a2"]]
+
+
+def test_chunks_for_reads_content_by_id(monkeypatch):
+    monkeypatch.setattr("models.source_registry._FETCH_BATCH", 1)
+    registry = _registry()
+    manager = FakeManager({"a1": "một hai ba", "b1": "sáu"})
+
+    chunks = registry.chunks_for("huong-dan.md", manager)
+    assert [(text, meta["chunk_type"]) for text, meta in chunks] == [("một hai ba", "text")]
+    assert manager.collection.calls == [["a1"], ["a2"]]
+
+
+def test_page_order_follows_adds_and_removals():
+    registry = SourceRegistry()
+    registry.add([f"c{i}" for i in range(6)], [""] * 6, [_meta("f.md")] * 6)
+    registry.remove_ids(["c1", "c4"])
+    registry.add(["c1"], [""], [_meta("f.md")])
+
+    ids = [c["id"] for c in registry.page("f.md", offset=0, limit=10)["chunks"]]
+    assert ids == ["c0", "c2", "c3", "c5", "c1"] == list(registry._chunks["f.md"])
+    assert [c["id"] for c in registry.page("f.md", offset=2, limit=2)["chunks"]] == ["c3", "c5"]
+    assert registry.page("f.md", offset=9)["chunks"] == []
+    assert registry.page("missing.md")["total"] == 0
@@ -0,0 +1,35 @@
+# tests/test_tokenizer.py
+# Bộ chuẩn hoá + tách từ dùng chung
+
+import unicodedata
+
+from models.tokenizer import fold_diacritics, normalize_key, normalize_text, token_set, tokenize
+
+
+def test_nfd_input_tokenizes_like_nfc():
+    text = "Cách đồng bộ profile Hidemium"
+    nfd = unicodedata.normalize("NFD", text)
+    assert nfd != text
+    assert tokenize(nfd) == tokenize(text)
+    assert normalize_key(nfd) == normalize_key(text)
+
+
+def test_fold_diacritics():
+    assert fold_diacritics("Đồng bộ dữ liệu") == "Dong bo du lieu"
+    assert fold_diacritics(unicodedata.normalize("NFD", "giá")) == "gia"
+
+
+def test_stopwords_and_short_tokens_are_dropped():
+    assert tokenize("Hidemium là gì vậy?") == ["hidemium"]
+    assert tokenize("what is a proxy") == ["proxy"]
+    assert tokenize("x proxy", drop_stopwords=False) == ["proxy"]
+
+
+def test_folded_stopwords_are_dropped():
+    assert tokenize("Hidemium la gi", fold=True) == ["hidemium"]
+    assert token_set("Giá của gói Pro", fold=True) == {"gia", "goi", "pro"}
+
+
+def test_normalize_text_strips_punctuation_keeps_case():
+    assert normalize_text("Gói  Pro, giá?") == "Gói Pro giá"
+    assert normalize_key("Gói  Pro, giá?") == "gói pro, giá?"
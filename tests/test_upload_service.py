@@ -0,0 +1,158 @@
+# tests/test_upload_service.py
+# Upload: bỏ qua file không đổi theo hash file, xếp job ingest nền, chạy tiếp job dở
+
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import services.chunker as chunker
+from config import config
+from models.corpus import CorpusState
+from models.ingest import file_digest, ingest_stream, new_file_hasher
+from services.ingest_progress import ingest_progress
+from services.resources import Resources
+from services.upload_service import UploadService
+
+SAME = "## Cài đặt\nTải bộ cài từ trang chủ rồi chạy file setup.\n".encode("utf-8")
+OLD = "## Proxy\nHỗ trợ HTTP và HTTPS.\n".encode("utf-8")
+NEW = "## Proxy\nHỗ trợ HTTP, HTTPS và SOCKS5.\n".encode("utf-8")
+
+
+class FakeUpload:
+    def __init__(self, filename, data):
+        self.filename = filename
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._buf.read(size)
+
+
+def _digest(data):
+    hasher = new_file_hasher()
+    hasher.update(data)
+    return file_digest(hasher)
+
+
+@pytest.fixture
+def upload_env(ingest_env, monkeypatch, tmp_path):
+    monkeypatch.setattr(config.settings, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(chunker, "_tokenizer", chunker._RegexTokenizer())
+    state = CorpusState()
+    state.register(ingest_env.registry)
+    monkeypatch.setattr("services.upload_service.corpus_state", state)
+    monkeypatch.setattr("services.upload_service.source_registry", ingest_env.registry)
+
+    submitted = []
+    monkeypatch.setattr("services.upload_service.ingest_worker", SimpleNamespace(
+        submit=lambda kind, payload: submitted.append((kind, payload)) or "job-1",
+    ))
+    ingest_env.state = state
+    ingest_env.submitted = submitted
+    ingest_env.resources = Resources({"vector": lambda: ingest_env.manager})
+    return ingest_env
+
+
+def test_unchanged_files_are_skipped_without_ingest(upload_env, tmp_path):
+    ingest_stream(upload_env.manager, "same.md", [SAME.decode()], file_hash=_digest(SAME))
+    ingest_stream(upload_env.manager, "proxy.md", [OLD.decode()], file_hash=_digest(OLD))
+
+    service = UploadService(upload_env.resources)
+    files = [
+        FakeUpload("same.md", SAME),
+        FakeUpload("proxy.md", NEW),
+        FakeUpload("new.md", NEW),
+        FakeUpload("scan.pdf", b"%PDF"),
+    ]
+    resp = asyncio.run(service.process(files, upload_id="up-skip"))
+    body = json.loads(resp.body)
+
+    assert body["detail"]["skipped"] == ["same.md"]
+    assert body["detail"]["updated"] == ["proxy.md"]
+    assert body["detail"]["added"] == ["new.md"]
+    assert body["failed"] == 1 and body["job_id"] == "job-1"
+
+    (kind, payload), = upload_env.submitted
+    assert kind == "upload" and payload["upload_id"] == "up-skip"
+    assert [f["filename"] for f in payload["files"]] == ["proxy.md", "new.md"]
+    assert payload["files"][0]["file_hash"] == _digest(NEW)
+    # File tạm của file bị bỏ qua đã xoá, file chờ ingest còn trên đĩa
+    spooled = sorted(p.name for p in tmp_path.glob(".*.part"))
+    assert len(spooled) == 2 and not any(name.startswith(".same.md") for name in spooled)
+
+    files = ingest_progress.snapshot("up-skip")["files"]
+    assert files["same.md"]["state"] == "skipped" and files["same.md"]["chunks"] == 1
+    assert files["new.md"]["state"] == "queued"
+
+
+def test_nothing_to_ingest_finishes_without_a_job(upload_env):
+    ingest_stream(upload_env.manager, "same.md", [SAME.decode()], file_hash=_digest(SAME))
+
+    service = UploadService(upload_env.resources)
+    resp = asyncio.run(service.process([FakeUpload("same.md", SAME)], upload_id="up-none"))
+
+    assert json.loads(resp.body)["status"] == "done"
+    assert upload_env.submitted == []
+    assert ingest_progress.snapshot("up-none")["done"]
+
+
+class FakeDB:
+    def __init__(self):
+        self.files = []
+
+    def add_uploaded_file(self, filename):
+        self.files.append(filename)
+
+
+def test_resumed_job_skips_done_files_and_uses_saved_copies(upload_env, monkeypatch, tmp_path):
+    db = FakeDB()
+    monkeypatch.setattr("services.base_service.shared_resources", Resources({
+        "vector": lambda: upload_env.manager,
+        "db": lambda: db,
+    }))
+    from services.upload_service import run_upload_job
+
+    upload_env.state.ensure_loaded(upload_env.manager)
+    (tmp_path / ".b.md.x.part").write_bytes(NEW)
+    (tmp_path / "c.md").write_bytes(SAME)   # lần chạy trước đã chuyển vào UPLOAD_DIR
+    files = [
+        {"filename": name, "part_path": str(tmp_path / f".{name}.x.part"), "file_hash": _digest(data), "size": len(data)}
+        for name, data in (("a.md", SAME), ("b.md", NEW), ("c.md", SAME), ("d.md", OLD))
+    ]
+    job = {"payload": {"files": files}, "progress": {"a.md": {"state": "done"}}}
+    reports = []
+
+    result = run_upload_job(job, lambda name, **fields: reports.append((name, fields)))
+
+    assert result["done"] == ["a.md", "b.md", "c.md"] and result["failed"] == ["d.md"]
+    assert result["chunks"] == result["embedded"] == 2
+    assert db.files == ["b.md", "c.md"]
+    assert (tmp_path / "b.md").read_bytes() == NEW and not (tmp_path / ".b.md.x.part").exists()
+    assert "a.md" not in {name for name, _ in reports}
+    assert ("d.md", {"state": "failed", "error": "missing upload spool file"}) in reports
+    # Chỉ mục phụ được cập nhật qua collection của service
+    assert upload_env.registry.file_hash("b.md") == _digest(NEW)
+
+    # Chạy lại cùng job sau khi đã xong b.md / c.md → không embed lại
+    upload_env.embedded.clear()
+    job["progress"].update((name, fields) for name, fields in reports if fields.get("state") == "done")
+    again = run_upload_job(job, lambda name, **fields: None)
+    assert again["done"] == ["a.md", "b.md", "c.md"] and again["embedded"] == again["chunks"] == 0
+
+
+def test_ingest_file_streams_small_blocks(upload_env, monkeypatch, tmp_path):
+    from models.ingest import ingest_file
+
+    monkeypatch.setattr(config.settings, "UPLOAD_READ_BLOCK_SIZE", 3)
+    path = tmp_path / "vi.md"
+    path.write_bytes(NEW)
+    progress = []
+
+    stats = ingest_file(upload_env.manager, path, "vi.md", file_hash=_digest(NEW), on_progress=progress.append)
+
+    assert stats["chunks"] == 1 and progress[-1]["chunks"] == 1
+    doc = upload_env.collection.get(where={"source": "vi.md"}, include=["documents"])["documents"][0]
+    # Ký tự nhiều byte bị cắt giữa hai block vẫn được ghép đúng
+    assert "HTTPS và SOCKS5" in doc
@@ -0,0 +1,70 @@
+# tests/test_warmup.py
+# Làm nóng lúc khởi động: readiness theo bước bắt buộc, chạy lại bước lỗi
+
+import asyncio
+
+import pytest
+
+from config.config import settings
+from services.warmup import Warmup
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_RETRY_DELAY", 0.001)
+    monkeypatch.setattr(settings, "WARMUP_RETRY_MAX_DELAY", 0.001)
+    monkeypatch.setattr(settings, "WARMUP_RETRIES", 2)
+
+
+def _flaky(failures):
+    calls = {"n": 0}
+
+    def step():
+        calls["n"] += 1
+        if calls["n"] <= failures:
+            raise RuntimeError(f"fail {calls['n']}")
+        return {"calls": calls["n"]}
+
+    return step, calls
+
+
+def test_all_steps_ok():
+    warmup = Warmup([("a", lambda: None, True), ("b", lambda: {"x": 1}, False)])
+    asyncio.run(warmup.run())
+
+    snap = warmup.snapshot()
+    assert warmup.ready and snap["status"] == "ready"
+    assert snap["failed"] == []
+    assert [s["step"] for s in snap["steps"]] == ["a", "b"]
+    assert snap["steps"][1]["detail"] == {"x": 1}
+
+
+def test_best_effort_failure_is_degraded_but_ready():
+    step, calls = _flaky(failures=100)
+    warmup = Warmup([("core", lambda: None, True), ("cache", step, False)])
+    asyncio.run(warmup.run())
+
+    snap = warmup.snapshot()
+    assert warmup.ready and snap["status"] == "degraded"
+    assert snap["failed"] == ["cache"]
+    assert calls["n"] == 1 + settings.WARMUP_RETRIES
+    assert snap["steps"][1]["attempts"] == calls["n"]
+
+
+def test_critical_step_is_retried_until_it_succeeds():
+    step, calls = _flaky(failures=3)
+    warmup = Warmup([("core", step, True), ("cache", lambda: None, False)])
+    asyncio.run(warmup.run())
+
+    assert warmup.ready and warmup.state == "ready"
+    assert calls["n"] == 4
+    assert warmup.snapshot()["steps"][0]["detail"] == {"calls": 4}
+
+
+def test_not_ready_while_a_critical_step_fails():
+    step, _ = _flaky(failures=100)
+    warmup = Warmup([("core", step, True)])
+    asyncio.run(warmup.run(retry=False))
+
+    assert not warmup.ready
+    assert warmup.snapshot()["failed"] == ["core"]